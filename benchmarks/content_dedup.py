@@ -0,0 +1,45 @@
+import argparse
+import os
+import tempfile
+import time
+
+from yyy.data import load_vault_data
+from benchmarks.synthetic import resubmission_cycles, write_vault
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark archive size and load time of the content-addressed '
+                                                 'review layout on resubmission cycles.')
+    parser.add_argument('--cycles', type=int, default=4, help='number of cycles (venues) in the vault')
+    parser.add_argument('--subs', type=int, default=500, help='submissions per cycle')
+    parser.add_argument('--words', type=int, default=600, help='average number of words of the main review field')
+    parser.add_argument('--duplication', type=float, nargs="+", default=[0.0, 0.5],
+                        help='shares of the submissions of each cycle resubmitted with their reviews')
+    args = parser.parse_args()
+
+    for duplication in args.duplication:
+        cycles = resubmission_cycles(args.cycles, args.subs, duplication, words=args.words)
+
+        results = {}
+        for dedup in [False, True]:
+            with tempfile.TemporaryDirectory() as tmp:
+                start = time.perf_counter()
+                write_vault(tmp, cycles, "benchmark", dedup=dedup)
+                t_store = time.perf_counter() - start
+
+                start = time.perf_counter()
+                loaded = load_vault_data(tmp, "benchmark")
+                t_load = time.perf_counter() - start
+
+                results[dedup] = {v: {sid: {rid: r.content for rid, r in revs.items()}
+                                      for sid, revs in loaded[v].reviews.items()} for v in loaded}
+
+                print("duplication %.2f  %-12s  archive %6.2f MB  store %6.2fs  load %5.2fs" %
+                      (duplication, "deduplicated" if dedup else "plain", os.path.getsize(tmp + os.sep + "data.7z")
+                       / 2 ** 20, t_store, t_load))
+
+        assert results[False] == results[True]
+
+
+if __name__ == "__main__":
+    main()
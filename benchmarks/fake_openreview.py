@@ -0,0 +1,161 @@
+import gzip
+import json
+import random
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from benchmarks.synthetic import WORDS
+
+
+class FakeOpenReview:
+    """
+    Local HTTP stand-in for the endpoints of the OpenReview API used by OpenReviewAPI: paged /notes queries by
+    invitation (exact or regex), /groups and /invitations. Responses are delayed by a fixed latency plus the
+    time to transfer the payload at the given bandwidth, gzip-compressed on request and served over keep-alive
+    connections. The number of opened connections and requests is recorded.
+
+    Use as a context manager; baseurl holds the address to pass to the client.
+    """
+    def __init__(self, venue="Venue", num_subs=200, reviews_per_sub=3, words=300, latency=0.01, bandwidth=None,
+                 max_limit=1000, seed=0):
+        self.venue = venue
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.max_limit = max_limit
+
+        self.connections = 0
+        self.requests = 0
+        self.notes = {}
+        self.groups = {}
+        self._generate(num_subs, reviews_per_sub, words, seed)
+
+        self.server = None
+        self.thread = None
+        self.baseurl = None
+
+    def _generate(self, num_subs, reviews_per_sub, words, seed):
+        rng = random.Random(seed)
+        t = 1640000000000
+
+        subs = []
+        for i in range(1, num_subs + 1):
+            sid = "sub%d" % i
+            subs += [self._note(sid, "%s/-/Blind_Submission" % self.venue, t + i, sid, number=i, original="o" + sid,
+                                content={"title": "Submission %d" % i})]
+
+            for j in range(reviews_per_sub):
+                rid = "rev%d_%d" % (i, j)
+                sig = "%s/Paper%d/Reviewer_%d" % (self.venue, i, j)
+                self.groups[sig] = ["~Reviewer_%d" % rng.randint(0, num_subs)]
+                self.notes.setdefault("%s/Paper%d/-/Official_Review" % (self.venue, i), []).append(
+                    self._note(rid, "%s/Paper%d/-/Official_Review" % (self.venue, i), t + i * 10 + j, sid,
+                               signatures=[sig],
+                               content={"review": " ".join(rng.choice(WORDS) for _ in range(words)),
+                                        "rating": "%d: ok" % rng.randint(1, 5)}))
+
+        self.notes["%s/-/Blind_Submission" % self.venue] = subs
+        self.groups["%s/Reviewers" % self.venue] = sorted(set(m for g in self.groups.values() for m in g))
+
+    @staticmethod
+    def _note(nid, invitation, tcdate, forum, signatures=None, content=None, number=None, original=None):
+        return {"id": nid, "invitation": invitation, "tcdate": tcdate, "cdate": tcdate, "tmdate": tcdate,
+                "forum": forum, "replyto": forum, "number": number, "original": original,
+                "signatures": signatures or [], "readers": ["everyone"], "writers": [], "content": content or {}}
+
+    def query_notes(self, params):
+        invitation = params.get("invitation", "")
+        if ".*" in invitation:
+            pattern = re.compile(invitation)
+            notes = [n for inv, ns in self.notes.items() if pattern.fullmatch(inv) for n in ns]
+        else:
+            notes = self.notes.get(invitation, [])
+
+        if "mintcdate" in params:
+            notes = [n for n in notes if n["tcdate"] >= int(params["mintcdate"])]
+        if params.get("sort", "").startswith("tcdate"):
+            notes = sorted(notes, key=lambda n: n["tcdate"])
+        elif params.get("sort") == "id":
+            notes = sorted(notes, key=lambda n: n["id"])
+
+        # newer clients page with a cursor on the last seen id, older ones with offsets
+        if "after" in params:
+            notes = [n for n in notes if n["id"] > params["after"]]
+
+        offset = int(params.get("offset", 0))
+        limit = min(int(params.get("limit", self.max_limit)), self.max_limit)
+
+        return {"notes": notes[offset:offset + limit], "count": len(notes)}
+
+    def __enter__(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # headers and body are written separately, avoid delayed ACK stalls on reused connections
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                stand_in.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                stand_in.requests += 1
+
+                if url.path == "/notes":
+                    body = stand_in.query_notes(params)
+                elif url.path == "/groups":
+                    body = {"groups": [{"id": params.get("id"), "members": stand_in.groups.get(params.get("id"), []),
+                                        "readers": [], "writers": [], "signatures": [], "signatories": []}]}
+                elif url.path == "/invitations":
+                    body = {"invitations": []}
+                else:
+                    self.send_error(404)
+                    return
+
+                payload = json.dumps(body).encode("utf-8")
+                compressed = "gzip" in self.headers.get("Accept-Encoding", "")
+                if compressed:
+                    payload = gzip.compress(payload, 5)
+
+                delay = stand_in.latency
+                if stand_in.bandwidth:
+                    delay += len(payload) / stand_in.bandwidth
+                time.sleep(delay)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if compressed:
+                    self.send_header("Content-Encoding", "gzip")
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.baseurl = "http://127.0.0.1:%d" % self.server.server_address[1]
+
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def fake_client(baseurl):
+    """
+    Creates an openreview.Client for the stand-in without logging in.
+    """
+    from openreview import openreview
+
+    return openreview.Client(baseurl=baseurl, token="stand-in")
@@ -0,0 +1,92 @@
+import argparse
+import os
+import tempfile
+import time
+
+import pandas
+
+from yyy.data import load_vault_data
+from yyy.features import extract_features, load_feature_table
+from yyy.incidence import parse_score
+from benchmarks.synthetic import multi_venue_dataset, review_data, write_vault
+
+SCORE_FIELDS = ["overall_assessment", "confidence"]
+
+
+def _per_review_features(dataset):
+    """
+    The usual approach: re-tokenize every review into a record of features.
+    """
+    records, index = [], []
+    for sid, revs in dataset.reviews.items():
+        for rid, r in revs.items():
+            record = {}
+            for field, value in r.content.items():
+                record[field + "_present"] = value is not None
+                if field in SCORE_FIELDS:
+                    record[field + "_score"] = parse_score(value)
+                elif type(value) == str:
+                    record[field + "_chars"] = len(value)
+                    record[field + "_tokens"] = len(value.split())
+            records += [record]
+            index += [(sid, rid)]
+
+    return pandas.DataFrame.from_records(records, index=pandas.MultiIndex.from_tuples(index, names=["sid", "rid"]))
+
+
+def _timed(fun, *args):
+    start = time.perf_counter()
+    res = fun(*args)
+    return res, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the per-review feature table: extraction, the cached '
+                                                 'table and vault loads against re-tokenizing every review.')
+    parser.add_argument('--venues', type=int, default=4, help='number of venues')
+    parser.add_argument('--subs', type=int, default=3000, help='submissions per venue')
+    parser.add_argument('--words', type=int, default=300, help='average number of words of the main review field')
+    args = parser.parse_args()
+
+    dataset = multi_venue_dataset(args.venues, args.subs, words=args.words)
+    num_reviews = sum(len(revs) for v in dataset for revs in dataset[v].reviews.values())
+    print("%d venues, %d reviews" % (args.venues, num_reviews))
+
+    t_baseline, t_extract = 0, 0
+    for v in dataset:
+        _, t = _timed(_per_review_features, dataset[v])
+        t_baseline += t
+        _, t = _timed(extract_features, dataset[v])
+        t_extract += t
+
+    print("per-review records       %6.2fs  %8.0f reviews/s" % (t_baseline, num_reviews / t_baseline))
+    print("extract_features         %6.2fs  %8.0f reviews/s" % (t_extract, num_reviews / t_extract))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in ["feature cache (cold)", "feature cache (warm)"]:
+            total = 0
+            for v in dataset:
+                _, t = _timed(load_feature_table, tmp, v, dataset[v], "benchmark", "synthetic")
+                total += t
+            print("%-24s %6.2fs  %8.0f reviews/s" % (label, total, num_reviews / total))
+
+    # end to end: loading a vault with its features
+    with tempfile.TemporaryDirectory() as tmp:
+        venues = {"venue%d" % v: review_data(args.subs, seed=v, venue="venue%d" % v, words=args.words)
+                  for v in range(args.venues)}
+        write_vault(tmp, venues, "benchmark")
+        feature_dir = os.path.join(tmp, "features")
+
+        loaded, t_load = _timed(load_vault_data, tmp, "benchmark")
+        _, t = _timed(lambda: [_per_review_features(loaded[v]) for v in loaded])
+        print("load + per-review records %5.2fs" % (t_load + t))
+
+        for label in ["load, features (cold)", "load, features (warm)"]:
+            loaded, t = _timed(load_vault_data, tmp, "benchmark", None, None, None, feature_dir)
+            print("%-24s %6.2fs" % (label, t))
+
+        assert all(loaded[v].features().shape[0] == sum(map(len, loaded[v].reviews.values())) for v in loaded)
+
+
+if __name__ == "__main__":
+    main()
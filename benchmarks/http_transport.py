@@ -0,0 +1,66 @@
+import argparse
+import time
+
+from benchmarks.fake_openreview import FakeOpenReview, fake_client
+from yyy.or_api import OpenReviewAPI
+
+
+def _crawl(api, venue):
+    """
+    The requests of a collection run: all blind submissions, their reviews and the reviewer groups.
+    """
+    reviewers, _ = api.reviews_by_reviewers(venue)
+    api.reviewers(venue)
+
+    return sum(len(revs) for revs in reviewers.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify and benchmark the HTTP transport against a local stand-in.')
+    parser.add_argument('--subs', type=int, default=100, help='submissions of the fake venue')
+    parser.add_argument('--latency_ms', type=float, default=2, help='latency of the stand-in per request')
+    parser.add_argument('--pool_size', type=int, default=4, help='connections of the transport')
+    args = parser.parse_args()
+
+    with FakeOpenReview(num_subs=args.subs, latency=args.latency_ms / 1000) as server:
+        for mode in ["no keep-alive, uncompressed", "openreview.Client", "Transport"]:
+            api = OpenReviewAPI(pool_size=args.pool_size)
+            api.client = fake_client(server.baseurl)
+            if mode == "no keep-alive, uncompressed":
+                api.client.headers["Connection"] = "close"
+                api.client.headers["Accept-Encoding"] = "identity"
+            elif mode == "Transport":
+                api.transport.install(api.client)
+
+            server.connections, server.requests = 0, 0
+            start = time.perf_counter()
+            num_reviews = _crawl(api, server.venue)
+            wall = time.perf_counter() - start
+
+            print("%-28s %6.2fs  %5d requests  %5d connections  %d reviews" %
+                  (mode, wall, server.requests, server.connections, num_reviews))
+
+        assert server.connections <= args.pool_size, "the transport did not reuse its connections"
+
+        print()
+        print(api.transport.metrics.report())
+
+        wire = sum(m.wire_bytes for m in api.transport.metrics.endpoints.values())
+        content = sum(m.content_bytes for m in api.transport.metrics.endpoints.values())
+        print("\ncompression: %.1f KB on the wire for %.1f KB of responses (%.1fx)" %
+              (wire / 1024, content / 1024, content / wire))
+
+        # requests exceeding the timeout fail instead of hanging
+        server.latency = 0.5
+        api = OpenReviewAPI(timeout=0.1)
+        api.client = api.transport.install(fake_client(server.baseurl))
+        api.client.session.get_adapter(server.baseurl).max_retries.total = 0
+        try:
+            api.reviewers(server.venue)
+            raise AssertionError("the request did not time out")
+        except Exception as e:
+            print("timeout: %s after %.2fs" % (type(e).__name__, api.transport.metrics.endpoints["GET /groups"].seconds))
+
+
+if __name__ == "__main__":
+    main()
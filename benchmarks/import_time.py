@@ -0,0 +1,63 @@
+import argparse
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ["pandas", "pyzipper", "tqdm", "openreview", "numpy"]
+
+TARGETS = {
+    "import yyy.data": ["-c", "import yyy.data"],
+    "collect --help": ["-m", "yyy.collect", "--help"],
+    "license_setup --help": ["-m", "yyy.license_setup", "--help"],
+}
+
+
+def _measure(args):
+    """
+    Runs a fresh interpreter with -X importtime and parses its report.
+
+    :param args: the interpreter arguments
+    :return: the wall time in seconds, the summed import time in ms and the names of all imported modules
+    """
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + args, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+
+    total_us, modules = 0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, _, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        modules.add(name.strip())
+
+    return wall, total_us / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the cold-start import time of the library and the CLIs.')
+    parser.add_argument('--runs', type=int, default=5, help='number of runs per target; the best run is reported')
+    parser.add_argument('--budget_ms', type=float, default=None,
+                        help='fails if the import time of any target exceeds this budget')
+    args = parser.parse_args()
+
+    failed = False
+    for target, interpreter_args in TARGETS.items():
+        results = [_measure(interpreter_args) for _ in range(args.runs)]
+        wall, imports_ms, modules = min(results, key=lambda r: r[1])
+
+        heavy = sorted(m for m in modules if m.split(".")[0] in HEAVY_MODULES and "." not in m)
+        print("%-22s wall %6.1f ms  imports %6.1f ms  heavy modules: %s"
+              % (target, wall * 1000, imports_ms, ", ".join(heavy) if heavy else "none"))
+
+        if heavy or (args.budget_ms is not None and imports_ms > args.budget_ms):
+            failed = True
+
+    if failed:
+        print("Cold start regressed: heavy modules are imported eagerly or the budget is exceeded.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
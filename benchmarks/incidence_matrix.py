@@ -0,0 +1,55 @@
+import argparse
+import time
+
+from scipy import sparse
+
+from yyy.incidence import parse_score
+from benchmarks.synthetic import multi_venue_dataset
+
+
+def _looped_matrix(dataset, weight):
+    """
+    The incidence matrix built from the nested dicts with loops, as done by hand before.
+    """
+    reviewer_ids, sub_ids = {}, {}
+    for v in dataset:
+        for sid, revs in dataset[v].reviews.items():
+            for r in revs.values():
+                reviewer_ids.setdefault(r.reviewer, len(reviewer_ids))
+                sub_ids.setdefault((v, sid), len(sub_ids))
+
+    matrix = sparse.dok_matrix((len(reviewer_ids), len(sub_ids)))
+    for v in dataset:
+        for sid, revs in dataset[v].reviews.items():
+            for r in revs.values():
+                matrix[reviewer_ids[r.reviewer], sub_ids[(v, sid)]] += parse_score(r[weight])
+
+    return matrix.tocsr()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark exporting the reviewer x submission matrix.')
+    parser.add_argument('--venues', type=int, default=5, help='number of venues')
+    parser.add_argument('--subs', type=int, default=4000, help='submissions per venue')
+    parser.add_argument('--reviewers', type=int, default=3000, help='reviewers per venue')
+    args = parser.parse_args()
+
+    dataset = multi_venue_dataset(args.venues, args.subs, num_reviewers=args.reviewers, words=3)
+
+    start = time.perf_counter()
+    matrix, reviewers, subs = dataset.incidence_matrix(weight="overall_assessment")
+    t_vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    looped = _looped_matrix(dataset, "overall_assessment")
+    t_looped = time.perf_counter() - start
+
+    assert matrix.nnz == looped.nnz and abs(matrix.sum() - looped.sum()) < 1e-6
+
+    print("%d reviews, matrix %d x %d" % (matrix.nnz, matrix.shape[0], matrix.shape[1]))
+    print("single pass  %8.1f ms" % (t_vectorized * 1000))
+    print("looped       %8.1f ms  (%.1fx)" % (t_looped * 1000, t_looped / t_vectorized))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import ast
+import io
+import time
+
+import pandas
+
+from yyy.licenses import encode_licenses, decode_licenses, decode_license_csv
+from benchmarks.synthetic import review_data, license_records
+
+
+def _scan(frame, rid):
+    """
+    The usual approach on the CSV licenses: parse the stringified review IDs of every row until the review is found.
+    """
+    for i, review_ids in enumerate(frame["review_ids"]):
+        if rid in ast.literal_eval(review_ids):
+            return i
+
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark loading licenses and looking up the license of every '
+                                                 'review in the typed format against the CSV format.')
+    parser.add_argument('--subs', type=int, default=5000, help='submissions of the venue')
+    parser.add_argument('--reviewers', type=int, default=2000, help='reviewers of the venue')
+    parser.add_argument('--scans', type=int, default=200, help='reviews looked up by scanning the CSV licenses')
+    args = parser.parse_args()
+
+    data = review_data(args.subs, num_reviewers=args.reviewers, words=10)
+    records = license_records(data)
+    rids = [r["id"] for revs in data.values() for r in revs]
+    print("%d licenses covering %d reviews" % (len(records), len(rids)))
+
+    with io.BytesIO() as stream:
+        pandas.DataFrame(records).to_csv(stream)
+        csv = stream.getvalue()
+    typed = encode_licenses(records)
+
+    start = time.perf_counter()
+    frame = pandas.read_csv(io.BytesIO(csv))
+    t_read = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for rid in rids[:args.scans]:
+        _scan(frame, rid)
+    t_scan = (time.perf_counter() - start) / args.scans
+
+    print("csv: read_csv %.3fs, scan %.2f ms per review (%.1fs for all reviews)"
+          % (t_read, t_scan * 1000, t_scan * len(rids)))
+
+    for label, payload, decode in [("csv, parsed and indexed", csv, decode_license_csv),
+                                   ("typed", typed, decode_licenses)]:
+        start = time.perf_counter()
+        index = decode(io.BytesIO(payload))
+        t_load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = sum(index.of_review(rid) is not None for rid in rids)
+        t_lookup = (time.perf_counter() - start) / len(rids)
+
+        assert found == len(rids)
+        print("%s: load %.3fs, lookup %.2f us per review (%.3fs for all reviews), %.1f MB"
+              % (label, t_load, t_lookup * 10 ** 6, t_lookup * len(rids), len(payload) / 2 ** 20))
+
+
+if __name__ == "__main__":
+    main()
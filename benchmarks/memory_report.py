@@ -0,0 +1,45 @@
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+from yyy.memory import memory_report, profile_load
+from benchmarks.synthetic import multi_venue_dataset, review_data, write_vault
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the memory report: its run time and its accuracy '
+                                                 'against the allocations traced while building the datasets.')
+    parser.add_argument('--venues', type=int, default=4, help='number of venues')
+    parser.add_argument('--subs', type=int, nargs="+", default=[250, 1000, 4000], help='submissions per venue')
+    parser.add_argument('--vault_subs', type=int, default=300, help='submissions per venue of the profiled vault')
+    args = parser.parse_args()
+
+    for subs in args.subs:
+        tracemalloc.start()
+        dataset = multi_venue_dataset(args.venues, subs)
+        traced = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        report = memory_report(dataset)
+        elapsed = time.perf_counter() - start
+
+        total = report["bytes"].sum()
+        print("%5d subs/venue  traced %7.1f MB  reported %7.1f MB (%+.1f%%)  report %5.2fs" %
+              (subs, traced / 2 ** 20, total / 2 ** 20, 100 * (total - traced) / traced, elapsed))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_vault(tmp, {"venue%d" % v: review_data(args.vault_subs, seed=v, venue="venue%d" % v)
+                          for v in range(args.venues)}, "benchmark")
+
+        dataset, profile = profile_load(tmp, "benchmark", top=5)
+        total = memory_report(dataset)["bytes"].sum()
+        print("\nprofiled load  %.2fs  traced %.1f MB (peak %.1f MB)  reported %.1f MB" %
+              (profile["seconds"], profile["current"] / 2 ** 20, profile["peak"] / 2 ** 20, total / 2 ** 20))
+        for line, size in profile["top"]:
+            print("%8.2f MB  %s" % (size / 2 ** 20, line))
+
+
+if __name__ == "__main__":
+    main()
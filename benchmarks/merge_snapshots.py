@@ -0,0 +1,66 @@
+import argparse
+import logging
+import time
+
+from benchmarks.synthetic import multi_venue_dataset
+from yyy.data import VenueDataset
+
+
+def _snapshots(dataset, num_snapshots, window):
+    """
+    Splits a venue into overlapping incremental snapshots, each covering a window of its submissions.
+    """
+    sids = list(dataset.reviews)
+    step = max((len(sids) - window) // max(num_snapshots - 1, 1), 1)
+
+    res = []
+    for i in range(num_snapshots):
+        part = sids[i * step:i * step + window]
+        res += [VenueDataset({sid: dataset.submissions[sid] for sid in part},
+                             {sid: dict(dataset.reviews[sid]) for sid in part},
+                             {"snapshot": i})]
+
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark merging many incremental snapshots of a venue.')
+    parser.add_argument('--subs', type=int, default=3000, help='submissions of the venue')
+    parser.add_argument('--snapshots', type=int, default=30, help='number of snapshots')
+    parser.add_argument('--window', type=int, default=500, help='submissions per snapshot')
+    args = parser.parse_args()
+
+    # the chained merge warns on every overlap
+    logging.getLogger().setLevel(logging.ERROR)
+
+    venue = multi_venue_dataset(1, args.subs, words=3)["venue0"]
+    snapshots = _snapshots(venue, args.snapshots, args.window)
+
+    start = time.perf_counter()
+    chained = snapshots[0]
+    for s in snapshots[1:]:
+        chained = chained << s
+    t_chained = time.perf_counter() - start
+
+    start = time.perf_counter()
+    merged = VenueDataset.merge_all(snapshots)
+    t_merge_all = time.perf_counter() - start
+
+    start = time.perf_counter()
+    inplace = VenueDataset({}, {}, {})
+    for s in snapshots:
+        inplace <<= s
+    t_inplace = time.perf_counter() - start
+
+    num_reviews = sum(len(revs) for revs in merged.reviews.values())
+    assert num_reviews == sum(len(revs) for revs in chained.reviews.values())
+    assert len(merged.per_reviewer) == len(chained.per_reviewer) == len(inplace.per_reviewer)
+
+    print("%d snapshots, %d merged reviews" % (len(snapshots), num_reviews))
+    print("a << b << ...  %8.1f ms" % (t_chained * 1000))
+    print("merge_all      %8.1f ms  (%.1fx)" % (t_merge_all * 1000, t_chained / t_merge_all))
+    print("<<=            %8.1f ms  (%.1fx)" % (t_inplace * 1000, t_chained / t_inplace))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import random
+import time
+
+from yyy.dedup import NearDuplicateDetector, shingles
+from benchmarks.synthetic import multi_venue_dataset, WORDS
+
+
+def _edit(text, rng, rate=0.01):
+    """
+    Replaces a small fraction of the words of a text, as for reviews revised for a resubmission.
+    """
+    return " ".join(rng.choice(WORDS) if rng.random() < rate else w for w in text.split(" "))
+
+
+def _all_pairs(items, threshold):
+    """
+    Compares the exact shingle Jaccard similarity of all pairs of reviews.
+    """
+    res = set()
+    for i in range(len(items)):
+        for j in range(i + 1, len(items)):
+            a, b = items[i][1], items[j][1]
+            if len(a | b) > 0 and len(a & b) / len(a | b) >= threshold:
+                res.add(frozenset((items[i][0], items[j][0])))
+
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark MinHash/LSH near-duplicate detection against all pairs.')
+    parser.add_argument('--venues', type=int, default=3, help='number of venues')
+    parser.add_argument('--subs', type=int, default=200, help="submissions per venue")
+    parser.add_argument('--dup_rate', type=float, default=0.2,
+                        help='fraction of reviews resubmitted with small edits to the next venue')
+    parser.add_argument('--threshold', type=float, default=0.8, help='Jaccard similarity threshold')
+    args = parser.parse_args()
+
+    dataset = multi_venue_dataset(args.venues, args.subs, words=200)
+    rng = random.Random(0)
+    venues = list(dataset)
+    num_dups = 0
+    for prev, cur in zip(venues, venues[1:]):
+        targets = [r for revs in dataset[cur].reviews.values() for r in revs.values()]
+        for revs in dataset[prev].reviews.values():
+            for r in revs.values():
+                if rng.random() < args.dup_rate:
+                    target = rng.choice(targets)
+                    target["summary_of_weaknesses"] = _edit(r["summary_of_weaknesses"], rng)
+                    target["paper_summary"] = _edit(r["paper_summary"], rng)
+                    target["summary_of_strengths"] = _edit(r["summary_of_strengths"], rng)
+                    num_dups += 1
+
+    start = time.perf_counter()
+    detector = NearDuplicateDetector(threshold=args.threshold)
+    for v in dataset:
+        detector.add_venue(v, dataset[v])
+    pairs = detector.pairs()
+    t_lsh = time.perf_counter() - start
+
+    start = time.perf_counter()
+    items = [((v, sid, rid), shingles(r)) for v in dataset for sid, revs in dataset[v].reviews.items()
+             for rid, r in revs.items()]
+    exact = _all_pairs(items, args.threshold)
+    t_all = time.perf_counter() - start
+
+    found = set(frozenset((k1, k2)) for k1, k2, _ in pairs)
+    print("%d reviews, %d resubmitted with edits" % (len(items), num_dups))
+    print("MinHash/LSH  %8.2fs  pairs=%d  recall %.3f  precision %.3f"
+          % (t_lsh, len(found), len(found & exact) / max(len(exact), 1), len(found & exact) / max(len(found), 1)))
+    print("all pairs    %8.2fs  pairs=%d  (%.1fx)" % (t_all, len(exact), t_all / t_lsh))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import time
+import warnings
+
+from benchmarks.fake_openreview import FakeOpenReview, fake_client
+from yyy.pagination import NotePaginator
+
+
+def _consume(notes, work_us):
+    """
+    Consumes the notes spending the given time on each, like a caller processing them.
+    """
+    n = 0
+    for _ in notes:
+        n += 1
+        end = time.perf_counter() + work_us / 1e6
+        while time.perf_counter() < end:
+            pass
+
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pipelined, adaptive pagination against tools.iterget_notes.')
+    parser.add_argument('--subs', type=int, default=1500, help='submissions of the fake venue (3 reviews each)')
+    parser.add_argument('--latencies_ms', type=float, nargs="+", default=[5, 25, 100], help='latencies per request')
+    parser.add_argument('--bandwidth_mb', type=float, default=20, help='bandwidth per request of the stand-in in MB/s')
+    parser.add_argument('--work_us', type=float, default=100, help='time the consumer spends per note')
+    args = parser.parse_args()
+
+    from openreview import tools
+
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    with FakeOpenReview(num_subs=args.subs, words=300, bandwidth=args.bandwidth_mb * 1e6) as server:
+        client = fake_client(server.baseurl)
+        invitation = server.venue + "/Paper.*/-/Official_Review"
+
+        for latency in args.latencies_ms:
+            server.latency = latency / 1000
+
+            server.requests = 0
+            start = time.perf_counter()
+            n_fixed = _consume(tools.iterget_notes(client, invitation=invitation), args.work_us)
+            t_fixed, r_fixed = time.perf_counter() - start, server.requests
+
+            server.requests = 0
+            paginator = NotePaginator(client, invitation=invitation)
+            start = time.perf_counter()
+            n_pipelined = _consume(paginator, args.work_us)
+            t_pipelined, r_pipelined = time.perf_counter() - start, server.requests
+
+            assert n_fixed == n_pipelined == 3 * args.subs
+
+            sizes = [p[1] for p in paginator.pages]
+            print("latency %5.0f ms  iterget_notes %6.2fs (%3d requests)  pipelined %6.2fs (%3d requests, "
+                  "pages %d..%d)  saved %4.1f%%" % (latency, t_fixed, r_fixed, t_pipelined, r_pipelined,
+                                                    min(sizes), max(sizes), 100 * (1 - t_pipelined / t_fixed)))
+
+
+if __name__ == "__main__":
+    main()
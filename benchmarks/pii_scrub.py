@@ -0,0 +1,92 @@
+import argparse
+import random
+import re
+import time
+
+from benchmarks.synthetic import review_data
+from yyy.scrub import PIIScrubber
+
+FIRST = ["Jane", "John", "Maria", "Wei", "Ahmed", "Olga", "Pierre", "Yuki", "Carlos", "Priya", "Lars", "Amara"]
+LAST = ["Doe", "Smith", "Garcia", "Zhang", "Hassan", "Ivanova", "Martin", "Tanaka", "Silva", "Patel", "Berg"]
+
+
+def _terms(num_people, rng):
+    """
+    Generates names, emails and profile IDs of synthetic participants.
+    """
+    terms = []
+    for i in range(num_people):
+        first, last = rng.choice(FIRST), rng.choice(LAST) + str(i)
+        terms += ["%s %s" % (first, last), "%s.%s@uni%d.edu" % (first.lower(), last.lower(), i % 50),
+                  "~%s_%s1" % (first, last)]
+
+    return terms
+
+
+def _reviews(num_reviews, terms, leak_rate, rng):
+    revs = [r for revs in review_data(num_reviews // 3, words=300).values() for r in revs]
+    for r in revs:
+        if rng.random() < leak_rate:
+            r["summary_of_weaknesses"] += " As %s I am confident." % rng.choice(terms)
+
+    return revs
+
+
+def _naive(terms):
+    """
+    One case-insensitive regex per term, applied one after another.
+    """
+    patterns = [re.compile(r"\b%s\b" % re.escape(t), re.IGNORECASE) for t in terms]
+
+    def scrub(review):
+        for field in ["paper_summary", "summary_of_strengths", "summary_of_weaknesses"]:
+            for p in patterns:
+                review[field] = p.sub("[REDACTED]", review[field])
+
+    return scrub
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark redacting names, emails and profile IDs from reviews.')
+    parser.add_argument('--reviews', type=int, default=30000, help='number of reviews')
+    parser.add_argument('--people', type=int, nargs="+", default=[100, 1000, 5000],
+                        help='numbers of participants to build the automaton from')
+    parser.add_argument('--leak_rate', type=float, default=0.05, help='share of reviews mentioning a participant')
+    parser.add_argument('--naive_reviews', type=int, default=20, help='reviews to time the per-term regexes on')
+    parser.add_argument('--naive_max_terms', type=int, default=3000,
+                        help='largest number of terms to time the per-term regexes for')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for num_people in args.people:
+        terms = _terms(num_people, rng)
+        reviews = _reviews(args.reviews, terms, args.leak_rate, rng)
+        size = sum(len(r[f]) for r in reviews for f in r if type(r[f]) == str)
+
+        start = time.perf_counter()
+        scrubber = PIIScrubber(terms)
+        t_build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        redacted = sum(scrubber.scrub_review(r) for r in reviews)
+        t_scrub = time.perf_counter() - start
+
+        print("%5d people (%5d terms, %6d states, built in %5.2fs)" % (num_people, len(terms), len(scrubber), t_build))
+        print("  automaton  %7.2fs  %6.1f MB/s  %8.0f reviews/s  %d redactions" %
+              (t_scrub, size / t_scrub / 1e6, len(reviews) / t_scrub, redacted), flush=True)
+
+        if len(terms) > args.naive_max_terms:
+            continue
+
+        sample = reviews[:args.naive_reviews]
+        naive = _naive(terms)
+        start = time.perf_counter()
+        for r in sample:
+            naive(r)
+        t_naive = (time.perf_counter() - start) / len(sample) * len(reviews)
+
+        print("  per-term   %7.2fs  (extrapolated from %d reviews, %.1fx)" % (t_naive, len(sample), t_naive / t_scrub))
+
+
+if __name__ == "__main__":
+    main()
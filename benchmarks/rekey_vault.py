@@ -0,0 +1,96 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from yyy.collect import _load_full_data_securely, _store_full_data_securely
+from yyy.data import load_vault_data
+from yyy.rekey import rekey_vault
+from benchmarks.synthetic import review_data, write_vault
+
+OLD, NEW = ("benchmark-data", "benchmark-licenses"), ("rotated-data", "rotated-licenses")
+
+
+def _add_filler(path, venues, mb, password):
+    """
+    Pads the vault with incompressible, stored (not compressed) entries to reach archive sizes of several GB
+    without spending the time to LZMA-compress them.
+    """
+    import pyzipper
+
+    block = 1 << 20
+    with pyzipper.AESZipFile(path, 'a', compression=pyzipper.ZIP_STORED) as zf:
+        zf.setpassword(bytes(password, 'utf-8'))
+        zf.setencryption(pyzipper.WZ_AES, nbits=256)
+        for v in venues:
+            with zf.open(v + "_filler.bin", 'w', force_zip64=True) as file:
+                for _ in range(mb):
+                    file.write(os.urandom(block))
+
+
+def _traced(fun, *args, **kwargs):
+    """
+    Runs the function and returns its result, the elapsed seconds and the peak of traced allocations in MB.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    res = fun(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+
+    return res, elapsed, peak
+
+
+def _rewrite(path, venues, target):
+    for v in venues:
+        revs, subs, params, stats, rev_lic, sub_lic = _load_full_data_securely(path, True, v + "_", OLD)
+        _store_full_data_securely(revs, subs, rev_lic.to_dict("records"), sub_lic.to_dict("records"), stats,
+                                  params, target, prefix=v + "_", password=NEW)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streaming password rotation against reloading and '
+                                                 'storing a vault.')
+    parser.add_argument('--venues', type=int, default=4, help='number of venues in the vault')
+    parser.add_argument('--subs', type=int, default=500, help='submissions per venue')
+    parser.add_argument('--filler_mb', type=int, default=256, help='incompressible MB added per venue')
+    parser.add_argument('--max_workers', type=int, default=os.cpu_count(), help='largest worker count to test')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        venues = ["venue%d" % v for v in range(args.venues)]
+        path = write_vault(tmp, {v: review_data(args.subs, seed=i, venue=v) for i, v in enumerate(venues)}, OLD)
+
+        # baseline on the review data only: decode everything and compress and encrypt it again
+        rewritten = os.path.join(tmp, "rewritten.7z")
+        _, t_baseline, peak_baseline = _traced(_rewrite, path, venues, rewritten)
+        data_mb = os.path.getsize(path) / 2 ** 20
+        os.remove(rewritten)
+
+        _add_filler(path, venues, args.filler_mb, OLD[0])
+        total_mb = os.path.getsize(path) / 2 ** 20
+        print("%d venues, %.1f MB archive (%.1f MB review data)" % (args.venues, total_mb, data_mb))
+        print("reload + store (review data only)  %6.2fs  %6.1f MB/s  peak %.1f MB" %
+              (t_baseline, data_mb / t_baseline, peak_baseline))
+
+        passwords = [OLD, NEW]
+        workers = 1
+        while workers <= args.max_workers:
+            res, elapsed, peak = _traced(rekey_vault, tmp, passwords[0], passwords[1], workers=workers)
+
+            assert os.path.getsize(path) / 2 ** 20 == total_mb
+            print("rekey workers=%2d                   %6.2fs  %6.1f MB/s  peak %.1f MB  (%d entries)" %
+                  (workers, elapsed, res["data.7z"]["bytes"] / 2 ** 20 / elapsed, peak,
+                   res["data.7z"]["rekeyed"]))
+
+            passwords.reverse()
+            workers *= 2
+
+        loaded = load_vault_data(tmp, passwords[0])
+        assert sorted(loaded.venues) == venues
+
+
+if __name__ == "__main__":
+    main()
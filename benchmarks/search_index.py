@@ -0,0 +1,61 @@
+import argparse
+import time
+
+from yyy.search import InvertedIndex, IGNORED_FIELDS, tokenize
+from benchmarks.synthetic import multi_venue_dataset
+
+
+def _linear_scan(dataset, predicate):
+    hits = set()
+    for v in dataset:
+        for sid, revs in dataset[v].reviews.items():
+            for rid, r in revs.items():
+                texts = [" ".join(tokenize(r[f])) for f in r if f not in IGNORED_FIELDS and type(r[f]) == str]
+                if predicate(texts):
+                    hits.add((v, sid, rid))
+
+    return hits
+
+
+def _contains(texts, phrase):
+    return any(" %s " % phrase in " %s " % t for t in texts)
+
+
+QUERIES = {
+    "term": ('convincing', lambda ts: _contains(ts, "convincing")),
+    "phrase": ('"strong baseline missing"', lambda ts: _contains(ts, "strong baseline missing")),
+    "boolean": ('"related work" AND NOT (unclear OR limited)',
+                lambda ts: _contains(ts, "related work") and not (_contains(ts, "unclear") or _contains(ts, "limited")))
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark inverted index queries against a linear scan.')
+    parser.add_argument('--reviews', type=int, default=100000, help='number of reviews in the corpus')
+    parser.add_argument('--venues', type=int, default=4, help='number of venues to spread the reviews over')
+    parser.add_argument('--words', type=int, default=100, help='average words of the main review field')
+    args = parser.parse_args()
+
+    dataset = multi_venue_dataset(args.venues, args.reviews // (3 * args.venues), words=args.words)
+
+    start = time.perf_counter()
+    index = InvertedIndex()
+    num_reviews = index.update(dataset)
+    print("indexed %d reviews in %.1fs" % (num_reviews, time.perf_counter() - start))
+
+    for kind, (query, predicate) in QUERIES.items():
+        start = time.perf_counter()
+        hits = index.search(query)
+        t_index = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = _linear_scan(dataset, predicate)
+        t_scan = time.perf_counter() - start
+
+        assert hits == expected
+        print("%-8s hits=%6d  index %8.2f ms  linear scan %8.2f ms  speedup %.0fx"
+              % (kind, len(hits), t_index * 1000, t_scan * 1000, t_scan / t_index))
+
+
+if __name__ == "__main__":
+    main()
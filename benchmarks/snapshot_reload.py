@@ -0,0 +1,41 @@
+import argparse
+import os
+import tempfile
+import time
+
+from yyy.data import load_vault_data
+from benchmarks.synthetic import review_data, write_vault
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cold loads against warm reloads from the snapshot cache.')
+    parser.add_argument('--venues', type=int, default=4, help='number of venues in the vault')
+    parser.add_argument('--subs', type=int, default=2000, help='submissions per venue')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vault_dir, cache_dir = os.path.join(tmp, "vault"), os.path.join(tmp, "cache")
+        write_vault(vault_dir, {"venue%d" % v: review_data(args.subs, seed=v, venue="venue%d" % v)
+                                for v in range(args.venues)}, "benchmark")
+
+        start = time.perf_counter()
+        cold = load_vault_data(vault_dir, "benchmark")
+        t_cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        load_vault_data(vault_dir, "benchmark", cache_dir=cache_dir)
+        t_fill = time.perf_counter() - start
+
+        start = time.perf_counter()
+        warm = load_vault_data(vault_dir, "benchmark", cache_dir=cache_dir)
+        t_warm = time.perf_counter() - start
+
+        assert all(len(warm[v].reviews) == len(cold[v].reviews) for v in cold)
+
+        print("cold load            %.2fs" % t_cold)
+        print("cold load + snapshot %.2fs" % t_fill)
+        print("warm reload          %.2fs  (%.1f%% of cold)" % (t_warm, 100 * t_warm / t_cold))
+
+
+if __name__ == "__main__":
+    main()
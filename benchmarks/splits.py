@@ -0,0 +1,72 @@
+import argparse
+import copy
+import random
+import time
+
+from yyy.splits import HashSplitter, stratified_sample
+from benchmarks.synthetic import multi_venue_dataset
+
+SPLITS = {"train": 0.8, "dev": 0.1, "test": 0.1}
+
+
+def _shuffled_copies(dataset, seed=0):
+    """
+    The usual approach: list all submissions, shuffle them and copy their reviews into new datasets.
+    """
+    from yyy.data import VenueDataset, MultiVenueDataset
+
+    keys = [(v, sid) for v in dataset for sid in dataset[v].reviews]
+    random.Random(seed).shuffle(keys)
+
+    result, start = {}, 0
+    for s, share in SPLITS.items():
+        end = start + int(round(share * len(keys)))
+        venues = {v: ({}, {}) for v in dataset}
+        for v, sid in keys[start:end]:
+            venues[v][0][sid] = copy.deepcopy(dataset[v].submissions.get(sid))
+            venues[v][1][sid] = copy.deepcopy(dataset[v].reviews[sid])
+        result[s] = MultiVenueDataset({v: VenueDataset(subs, revs, dict(dataset[v].desc))
+                                       for v, (subs, revs) in venues.items()})
+        start = end
+
+    return result
+
+
+def _timed(fun, *args):
+    start = time.perf_counter()
+    res = fun(*args)
+    return res, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark hash-based splitting and sampling against shuffling '
+                                                 'and copying.')
+    parser.add_argument('--venues', type=int, default=8, help='number of venues')
+    parser.add_argument('--subs', type=int, default=5000, help='submissions per venue')
+    args = parser.parse_args()
+
+    dataset = multi_venue_dataset(args.venues, args.subs, words=30)
+    num_reviews = sum(len(revs) for v in dataset for revs in dataset[v].reviews.values())
+    print("%d venues, %d reviews" % (args.venues, num_reviews))
+
+    for unit in ["submission", "reviewer"]:
+        splitter = HashSplitter(SPLITS, salt="benchmark", unit=unit)
+
+        counts, t = _timed(sum, (1 for _ in splitter.rows(dataset, "test")))
+        print("stream test split by %-10s  %6.2fs  %9.0f reviews/s" % (unit, t, num_reviews / t))
+
+        splits, t = _timed(splitter.materialize, dataset)
+        print("materialize by %-10s        %6.2fs  %9.0f reviews/s" % (unit, t, num_reviews / t))
+
+    sample, t = _timed(list, stratified_sample(dataset, fraction=0.1, salt="benchmark"))
+    print("stratified 10%% sample           %6.2fs  %9.0f reviews/s  (%d reviews)" % (t, num_reviews / t, len(sample)))
+
+    sample, t = _timed(list, stratified_sample(dataset, per_venue=100, salt="benchmark"))
+    print("100 submissions per venue       %6.2fs  %9.0f reviews/s  (%d reviews)" % (t, num_reviews / t, len(sample)))
+
+    _, t = _timed(_shuffled_copies, dataset)
+    print("shuffle and copy                %6.2fs  %9.0f reviews/s" % (t, num_reviews / t))
+
+
+if __name__ == "__main__":
+    main()
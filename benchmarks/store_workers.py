@@ -0,0 +1,48 @@
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+
+from yyy.collect import store_files_securely, load_files_securely
+from benchmarks.synthetic import review_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark storing vault entries with 1 to N worker processes.')
+    parser.add_argument('--venues', type=int, default=4, help='number of venue entries to store')
+    parser.add_argument('--subs', type=int, default=2000, help='submissions per venue')
+    parser.add_argument('--max_workers', type=int, default=os.cpu_count(), help='largest worker count to test')
+    parser.add_argument('--part_mb', type=int, default=4, help='part size in MB')
+    args = parser.parse_args()
+
+    names = ["venue%d_rev_data.json" % v for v in range(args.venues)]
+    payloads = [json.dumps(review_data(args.subs, seed=v, venue="venue%d" % v)).encode() for v in range(args.venues)]
+    total_mb = sum(len(p) for p in payloads) / 2 ** 20
+    print("%d entries, %.1f MB uncompressed" % (len(payloads), total_mb))
+
+    baseline = None
+    workers = 1
+    while workers <= args.max_workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "data.7z")
+
+            start = time.perf_counter()
+            store_files_securely(names, [io.BytesIO(p) for p in payloads], path, "benchmark",
+                                 workers=workers, part_size=args.part_mb * 2 ** 20)
+            elapsed = time.perf_counter() - start
+
+            buffs = [io.BytesIO() for _ in names]
+            load_files_securely(names, buffs, path, "benchmark")
+            assert all(b.getvalue() == p for b, p in zip(buffs, payloads))
+
+            baseline = baseline or elapsed
+            print("workers=%2d  %.2fs  %.1f MB/s  speedup %.2fx  archive %.1f MB"
+                  % (workers, elapsed, total_mb / elapsed, baseline / elapsed, os.path.getsize(path) / 2 ** 20))
+
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import random
+
+from yyy.collect import _store_full_data_securely
+
+WORDS = ["the", "paper", "proposes", "method", "results", "baseline", "strong", "weak", "novel", "dataset",
+         "experiments", "convincing", "unclear", "section", "table", "model", "performance", "ablation",
+         "related", "work", "missing", "authors", "should", "clarify", "evaluation", "metric", "annotation",
+         "language", "review", "contribution", "significant", "limited", "analysis", "writing", "clear"]
+
+
+def _anon(x):
+    return hashlib.sha512(x.encode("utf-8")).hexdigest()
+
+
+def _text(rng, num_words):
+    return " ".join(rng.choice(WORDS) for _ in range(num_words))
+
+
+def review_data(num_subs, reviews_per_sub=3, num_reviewers=None, words=300, seed=0, venue="venue"):
+    """
+    Generates review data in the format stored by collect.py, i.e. a dict of anonymized
+    submission ids to lists of review dicts.
+
+    :param num_subs: number of submissions
+    :param reviews_per_sub: number of reviews per submission
+    :param num_reviewers: size of the reviewer pool; defaults to the number of submissions
+    :param words: average number of words of the main review text field
+    :param seed: random seed
+    :param venue: name used to derive the identifiers
+    :return: the review dataset
+    """
+    rng = random.Random(seed)
+    num_reviewers = num_reviewers or num_subs
+
+    dataset = {}
+    for s in range(num_subs):
+        sid = _anon("%s/sub%d" % (venue, s))
+        reviewers = rng.sample(range(num_reviewers), min(reviews_per_sub, num_reviewers))
+        dataset[sid] = [{
+            "cdate": 1640000000000 + rng.randint(0, 10 ** 9),
+            "tmdate": 1640000000000 + rng.randint(0, 10 ** 9),
+            "tauthor": _anon("~Reviewer_%d" % r),
+            "signature": _anon("%s/sub%d/Reviewer_%d" % (venue, s, r)),
+            "id": _anon("%s/sub%d/review%d" % (venue, s, r)),
+            "title": "Official review of submission %d" % s,
+            "paper_summary": _text(rng, words // 3),
+            "summary_of_strengths": _text(rng, words // 3),
+            "summary_of_weaknesses": _text(rng, rng.randint(words // 2, words)),
+            "overall_assessment": "%d = %s" % (rng.randint(1, 5), _text(rng, 3)),
+            "confidence": "%d = %s" % (rng.randint(1, 5), _text(rng, 3)),
+            "license_date": 1650000000000,
+            "attribution": None
+        } for r in reviewers]
+
+    return dataset
+
+
+def license_records(review_data):
+    """
+    Creates the license agreements of the reviewers of synthetic review data, one per reviewer, like
+    collect.retrieve_protected_data.
+
+    :param review_data: review data as returned by review_data
+    :return: list of license records
+    """
+    records = {}
+    for sid, revs in review_data.items():
+        for r in revs:
+            record = records.setdefault(r["tauthor"], {
+                "rid": "~Reviewer_%s" % r["tauthor"][:8],
+                "signature": ["~Reviewer_%s" % r["tauthor"][:8]],
+                "writers": ["venue", "~Reviewer_%s" % r["tauthor"][:8]],
+                "date": r["license_date"],
+                "attribution": "No",
+                "reviews": [],
+                "reviewer_hash": r["tauthor"],
+                "review_ids": []
+            })
+            record["reviews"] += [("forum_" + sid[:8], "review_" + r["id"][:8])]
+            record["review_ids"] += [r["id"]]
+
+    return list(records.values())
+
+
+def write_vault(target_dir, venues, password, licenses=None, **store_kwargs):
+    """
+    Writes the given per-venue review data to a data.7z vault in the target directory.
+
+    :param target_dir: directory to create the vault in
+    :param venues: dict of venue names to review data as returned by review_data
+    :param password: password or pair of passwords
+    :param licenses: optionally, dict of venue names to review license records
+    :param store_kwargs: further arguments of _store_full_data_securely
+    :return: the path of the vault
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    path = os.path.join(target_dir, "data.7z")
+
+    for v, revdata in venues.items():
+        rev_licenses = licenses.get(v) if licenses is not None else None
+        _store_full_data_securely(revdata, None, rev_licenses, None, {"num_subs": len(revdata)},
+                                  {"time": "2022/01/01, 00:00:00", "hash": "synthetic"}, path,
+                                  prefix=v + "_", password=password, **store_kwargs)
+
+    return path
+
+
+def multi_venue_dataset(num_venues, subs_per_venue, **review_kwargs):
+    """
+    Builds an in-memory MultiVenueDataset of synthetic reviews without going through a vault.
+
+    :param num_venues: number of venues
+    :param subs_per_venue: submissions per venue
+    :param review_kwargs: further arguments of review_data
+    :return: the MultiVenueDataset
+    """
+    from yyy.data import Review, Submission, VenueDataset, MultiVenueDataset
+
+    venues = {}
+    for v in range(num_venues):
+        name = "venue%d" % v
+        revdata = review_data(subs_per_venue, seed=v, venue=name, **review_kwargs)
+        reviews = {sid: {r["id"]: Review(r, r["id"], r["tauthor"]) for r in revs} for sid, revs in revdata.items()}
+        venues[name] = VenueDataset({sid: Submission({}, sid) for sid in reviews}, reviews, {"full_name": name})
+
+    return MultiVenueDataset(venues)
+
+
+def resubmission_cycles(num_cycles, subs_per_cycle, duplication, seed=0, **review_kwargs):
+    """
+    Generates the review data of consecutive cycles in which a share of the submissions are resubmissions
+    of the previous cycle that carry over their reviews unchanged (with new identifiers and dates).
+
+    :param num_cycles: number of cycles (venues)
+    :param subs_per_cycle: submissions per cycle
+    :param duplication: share of the submissions of each later cycle resubmitted from the previous one
+    :param seed: random seed
+    :param review_kwargs: further arguments of review_data
+    :return: dict of venue names to review data
+    """
+    rng = random.Random(seed)
+
+    cycles = {}
+    previous = None
+    for c in range(num_cycles):
+        venue = "cycle%d" % c
+        data = review_data(subs_per_cycle, seed=seed * 1000 + c, venue=venue, **review_kwargs)
+
+        if previous is not None:
+            carried = rng.sample(list(previous.values()), int(duplication * min(len(previous), len(data))))
+            for sid, old_revs in zip(list(data), carried):
+                data[sid] = [dict(old, id=new["id"], signature=new["signature"], cdate=new["cdate"],
+                                  tmdate=new["tmdate"]) for old, new in zip(old_revs, data[sid])]
+
+        cycles[venue] = data
+        previous = data
+
+    return cycles
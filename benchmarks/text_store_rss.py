@@ -0,0 +1,57 @@
+import argparse
+import ctypes
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import review_data, write_vault
+
+
+def _rss_mb():
+    with open("/proc/self/statm") as file:
+        return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def _measure(vault_dir, text_store_dir):
+    from yyy.data import load_vault_data
+
+    before = _rss_mb()
+    dataset = load_vault_data(vault_dir, "benchmark", text_store_dir=text_store_dir)
+
+    # hand memory freed after decoding back to the OS, so RSS reflects what the dataset holds
+    gc.collect()
+    ctypes.CDLL("libc.so.6").malloc_trim(0)
+    after = _rss_mb()
+
+    num_reviews = sum(len(revs) for v in dataset for revs in dataset[v].reviews.values())
+    print("%-12s reviews=%d  RSS of loaded dataset %.1f MB"
+          % ("text store" if text_store_dir else "in heap", num_reviews, after - before))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the resident memory of loaded datasets with and without '
+                                                 'the memory-mapped text store (Linux only).')
+    parser.add_argument('--venues', type=int, default=4, help='number of venues in the vault')
+    parser.add_argument('--subs', type=int, default=2000, help='submissions per venue')
+    parser.add_argument('--measure', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        _measure(args.measure[0], args.measure[1] if args.measure[1] != "-" else None)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vault_dir = os.path.join(tmp, "vault")
+        write_vault(vault_dir, {"venue%d" % v: review_data(args.subs, seed=v, venue="venue%d" % v)
+                                for v in range(args.venues)}, "benchmark")
+
+        # measure each mode in a fresh interpreter
+        for text_store_dir in ["-", os.path.join(tmp, "texts")]:
+            subprocess.run([sys.executable, "-m", "benchmarks.text_store_rss", "--measure", vault_dir, text_store_dir],
+                           check=True)
+
+
+if __name__ == "__main__":
+    main()
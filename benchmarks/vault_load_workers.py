@@ -0,0 +1,43 @@
+import argparse
+import os
+import tempfile
+import time
+
+from yyy.data import load_vault_data
+from benchmarks.synthetic import review_data, write_vault
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark loading a vault with 1 to N decoding processes.')
+    parser.add_argument('--venues', type=int, default=8, help='number of venues in the vault')
+    parser.add_argument('--subs', type=int, default=1000, help='submissions per venue')
+    parser.add_argument('--shards', type=int, default=None, help='store the reviews in this many shards per venue')
+    parser.add_argument('--max_workers', type=int, default=os.cpu_count(), help='largest worker count to test')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_vault(tmp, {"venue%d" % v: review_data(args.subs, seed=v, venue="venue%d" % v)
+                          for v in range(args.venues)}, "benchmark", num_shards=args.shards)
+        print("%d venues, %.1f MB archive, cpus %d" % (args.venues, os.path.getsize(os.path.join(tmp, "data.7z")) / 2 ** 20,
+                                                      os.cpu_count()))
+
+        baseline, expected = None, None
+        workers = 1
+        while workers <= args.max_workers:
+            start = time.perf_counter()
+            loaded = load_vault_data(tmp, "benchmark", workers=workers)
+            elapsed = time.perf_counter() - start
+
+            reviews = {v: {sid: sorted(revs) for sid, revs in loaded[v].reviews.items()} for v in loaded}
+            expected = expected or reviews
+            assert reviews == expected and list(loaded.venues) == list(expected)
+            assert all(len(loaded[v].per_reviewer) > 0 for v in loaded)
+
+            baseline = baseline or elapsed
+            print("workers=%2d  %.2fs  speedup %.2fx" % (workers, elapsed, baseline / elapsed))
+
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
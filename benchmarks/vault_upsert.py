@@ -0,0 +1,71 @@
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import warnings
+
+from yyy.collect import store_files_securely
+from benchmarks.synthetic import review_data
+
+
+def _blind_append(file_names, data, path, password):
+    """
+    The previous writer: appends all members to the archive, shadowing earlier versions.
+    """
+    import pyzipper
+
+    warnings.simplefilter("ignore", UserWarning)  # duplicate names
+    with pyzipper.AESZipFile(path, 'a', compression=pyzipper.ZIP_LZMA) as zf:
+        zf.setpassword(bytes(password, 'utf-8'))
+        zf.setencryption(pyzipper.WZ_AES, nbits=256)
+        for n, d in zip(file_names, data):
+            with zf.open(n, 'w') as file:
+                file.write(d.getvalue())
+
+
+def _files(venues, subs, run, changed):
+    """
+    The files of one collection run; the review data of the first `changed` venues differs in every run.
+    """
+    names, payloads = [], []
+    for v in range(venues):
+        seed = v + 1000 * run if v < changed else v
+        names += ["venue%d_rev_data.json" % v, "venue%d_params.json" % v]
+        payloads += [json.dumps(review_data(subs, seed=seed, venue="venue%d" % v)).encode(),
+                     json.dumps({"time": "run %d" % run if v < changed else "initial"}).encode()]
+
+    return names, payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark repeated collections into the same vault with the '
+                                                 'upserting writer against blind appends.')
+    parser.add_argument('--venues', type=int, default=8, help='number of venues in the vault')
+    parser.add_argument('--subs', type=int, default=300, help='submissions per venue')
+    parser.add_argument('--runs', type=int, default=4, help='number of collection runs')
+    parser.add_argument('--changed', type=int, default=1, help='venues whose data changes in each run')
+    args = parser.parse_args()
+
+    import pyzipper
+
+    runs = [_files(args.venues, args.subs, r, args.changed) for r in range(args.runs)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, store in [("blind append", _blind_append), ("upsert", store_files_securely)]:
+            path = os.path.join(tmp, mode.replace(" ", "_") + ".7z")
+            for r, (names, payloads) in enumerate(runs):
+                start = time.perf_counter()
+                store(names, [io.BytesIO(p) for p in payloads], path, "benchmark")
+                elapsed = time.perf_counter() - start
+
+                with pyzipper.AESZipFile(path, 'r') as zf:
+                    members = len(zf.namelist())
+
+                print("%-12s run %d  %6.2fs  archive %6.2f MB  %3d members" %
+                      (mode, r, elapsed, os.path.getsize(path) / 2 ** 20, members))
+
+
+if __name__ == "__main__":
+    main()
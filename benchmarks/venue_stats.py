@@ -0,0 +1,79 @@
+import argparse
+import random
+import statistics
+import time
+
+from yyy.stats import ReviewTable, venue_stats
+from benchmarks.synthetic import multi_venue_dataset
+
+
+def _looped_stats(dataset):
+    """
+    The per-venue statistics computed with loops over the nested dicts, as done by hand before.
+    """
+    res = {}
+    for v in dataset:
+        reviewer_counts, sub_counts, attributed_reviewers = {}, {}, set()
+        num_reviews, num_attributed = 0, 0
+        for sid, revs in dataset[v].reviews.items():
+            for rid, r in revs.items():
+                reviewer_counts[r.reviewer] = reviewer_counts.get(r.reviewer, 0) + 1
+                sub_counts[sid] = sub_counts.get(sid, 0) + 1
+                num_reviews += 1
+                if r["attribution"] is not None:
+                    num_attributed += 1
+                    attributed_reviewers.add(r.reviewer)
+
+        res[v] = {
+            "num_subs_agreed": len(sub_counts),
+            "num_active_reviewers_agreed": len(reviewer_counts),
+            "num_active_responses_attributed": len(attributed_reviewers),
+            "num_revs_agreed_effective": num_reviews,
+            "attribution_rate": num_attributed / num_reviews,
+            "reviews_per_reviewer_mean": statistics.mean(reviewer_counts.values()),
+            "reviews_per_reviewer_median": statistics.median(reviewer_counts.values()),
+            "reviews_per_reviewer_max": max(reviewer_counts.values()),
+            "reviews_per_submission_mean": statistics.mean(sub_counts.values()),
+        }
+
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the vectorized venue statistics against loops.')
+    parser.add_argument('--venues', type=int, default=10, help='number of venues')
+    parser.add_argument('--subs', type=int, default=5000, help='submissions per venue')
+    parser.add_argument('--reviewers', type=int, default=3000, help='reviewers per venue')
+    args = parser.parse_args()
+
+    dataset = multi_venue_dataset(args.venues, args.subs, num_reviewers=args.reviewers, words=3)
+    rng = random.Random(0)
+    for v in dataset:
+        for revs in dataset[v].reviews.values():
+            for r in revs.values():
+                r["attribution"] = "~Reviewer" if rng.random() < 0.3 else None
+
+    start = time.perf_counter()
+    table = ReviewTable(dataset)
+    t_table = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = venue_stats(table)
+    t_vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    looped = _looped_stats(dataset)
+    t_looped = time.perf_counter() - start
+
+    for v, expected in looped.items():
+        for k, value in expected.items():
+            assert abs(vectorized.loc[v, k] - value) < 1e-9, (v, k)
+
+    print("%d reviews in %d venues" % (len(table), args.venues))
+    print("building arrays   %8.1f ms (once per dataset)" % (t_table * 1000))
+    print("vectorized stats  %8.1f ms" % (t_vectorized * 1000))
+    print("looped stats      %8.1f ms  (%.1fx)" % (t_looped * 1000, t_looped / t_vectorized))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import pickle
+import struct
+import tempfile
+
+SNAPSHOT_MAGIC = b"YYYSNAP1"
+KDF_ITERATIONS = 100000
+
+
+def load_snapshot(cache_dir, archive_path, password):
+    """
+    Loads the decoded dataset of the given archive from the snapshot cache. Snapshots are keyed by the
+    archive path and validated against the modification time, size and content hash of the archive.
+    Stale and corrupt snapshots are removed; snapshots failing authentication (a wrong password) are kept.
+
+    :param cache_dir: the directory of the snapshot cache
+    :param archive_path: the path of the archive the snapshot was created from
+    :param password: the (data) password of the archive, used to derive the snapshot key
+    :return: the cached object or None, if there is no valid snapshot
+    """
+    return load_encrypted(_snapshot_path(cache_dir, archive_path), password,
+                          lambda meta: _is_fresh(meta, archive_path))
+
+
+def store_snapshot(cache_dir, archive_path, password, obj):
+    """
+    Stores the decoded dataset of the given archive in the snapshot cache, encrypted with AES-GCM using
+    a key derived from the password.
+
+    :param cache_dir: the directory of the snapshot cache
+    :param archive_path: the path of the archive the object was loaded from
+    :param password: the (data) password of the archive, used to derive the snapshot key
+    :param obj: the object to store
+    :return: the path of the snapshot
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+
+    stat = os.stat(archive_path)
+    meta = {
+        "path": os.path.abspath(archive_path),
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": _content_hash(archive_path)
+    }
+
+    return store_encrypted(_snapshot_path(cache_dir, archive_path), password, meta, obj)
+
+
+def load_encrypted(path, password, is_fresh):
+    """
+    Loads an object stored by store_encrypted. Files whose metadata is rejected by is_fresh and truncated or
+    corrupt files are removed. Files failing authentication, e.g. due to a wrong password, are kept, since they
+    may still be valid for the right one.
+
+    :param path: the path of the file
+    :param password: the password used to derive the key
+    :param is_fresh: function deciding on the (unencrypted, but authenticated) metadata dict whether the file
+                     is still valid
+    :return: the stored object or None, if there is no valid file
+    """
+    from Cryptodome.Cipher import AES
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as file:
+        magic = file.read(len(SNAPSHOT_MAGIC))
+        try:
+            header_len, = struct.unpack("<I", file.read(4))
+            header = file.read(header_len)
+            meta = json.loads(header) if magic == SNAPSHOT_MAGIC else None
+        except (struct.error, ValueError):
+            meta = None
+        salt, nonce, tag = file.read(16), file.read(12), file.read(16)
+        ciphertext = file.read()
+
+    if type(meta) != dict or len(tag) != 16 or not is_fresh(meta):
+        os.remove(path)
+        return None
+
+    cipher = AES.new(_derive_key(password, salt), AES.MODE_GCM, nonce=nonce)
+    cipher.update(header)
+    try:
+        payload = cipher.decrypt_and_verify(ciphertext, tag)
+    except ValueError:
+        return None
+
+    return pickle.loads(payload)
+
+
+def store_encrypted(path, password, meta, obj):
+    """
+    Pickles an object and stores it encrypted with AES-GCM using a key derived from the password. The
+    metadata is stored in plain text, but authenticated.
+
+    :param path: the path of the file
+    :param password: the password used to derive the key
+    :param meta: JSON serializable dict describing what the object was derived from
+    :param obj: the object to store
+    :return: the path
+    """
+    from Cryptodome.Cipher import AES
+
+    header = json.dumps(meta).encode()
+
+    salt, nonce = os.urandom(16), os.urandom(12)
+    cipher = AES.new(_derive_key(password, salt), AES.MODE_GCM, nonce=nonce)
+    cipher.update(header)
+    ciphertext, tag = cipher.encrypt_and_digest(pickle.dumps(obj, protocol=5))
+
+    # write to a unique temporary file first, so readers never see partial files
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(SNAPSHOT_MAGIC)
+            file.write(struct.pack("<I", len(header)))
+            file.write(header)
+            file.write(salt)
+            file.write(nonce)
+            file.write(tag)
+            file.write(ciphertext)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return path
+
+
+def _snapshot_path(cache_dir, archive_path):
+    key = hashlib.sha256(os.path.abspath(archive_path).encode("utf-8")).hexdigest()
+    return cache_dir + os.sep + key + ".snapshot"
+
+
+def _is_fresh(meta, archive_path):
+    """
+    Checks the snapshot metadata against the archive. The content hash is only computed if the
+    cheap checks pass. Metadata lacking any of the keys, e.g. of other versions, is never fresh.
+    """
+    if meta.get("path") != os.path.abspath(archive_path) or not os.path.exists(archive_path):
+        return False
+
+    stat = os.stat(archive_path)
+    if meta.get("mtime") != stat.st_mtime_ns or meta.get("size") != stat.st_size:
+        return False
+
+    return meta.get("sha256") == _content_hash(archive_path)
+
+
+def _content_hash(path, chunk_size=2 ** 22):
+    h = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+def _derive_key(password, salt):
+    pwd = b"" if password is None else bytes(password, "utf-8")
+    return hashlib.pbkdf2_hmac("sha256", pwd, salt, KDF_ITERATIONS, dklen=32)
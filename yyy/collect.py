@@ -1,20 +1,20 @@
 import argparse
+import copy
 import datetime
 import hashlib
+import hmac
 import io
 import json
 import logging
 import os
-import pathlib
 import random
+import re
 import shutil
 import string
+import tempfile
+from collections import Counter
 from getpass import getpass
 
-import pandas
-import pyzipper
-from tqdm import tqdm
-
 from yyy import or_api
 
 
@@ -23,7 +23,12 @@ def retrieve_protected_data(venue,
                             anon_hash,
                             store_agreement=True,
                             password_protect=None,
-                            api=None):
+                            api=None,
+                            workers=None,
+                            part_size=None,
+                            num_shards=None,
+                            scrub_pii=False,
+                            dedup=False):
     """
     Retrieves the so-called protected dataset of the 3Y workflow after having setup the license tasks for
     reviewers.
@@ -34,26 +39,18 @@ def retrieve_protected_data(venue,
     :param store_agreement: True, if agreements and licenses should be stored
     :param password_protect: either one password or a pair of passwords used for the data and the licenses (second)
     :param api: the OR api object o be used
+    :param workers: number of processes compressing and encrypting the stored files; None for a single process
+    :param part_size: optionally, the size in bytes above which stored files are split into parts
+    :param num_shards: optionally, the number of shards to split the review data into for random access
+    :param scrub_pii: True, if names, emails and profile IDs of reviewers and authors should be redacted from the
+                      review texts before storing them
+    :param dedup: True, if review bodies should be stored once per archive under their digest, e.g. to share
+                  the identical reviews of resubmissions between the venues of one archive
     :return: the stats of the collection?
     """
-    # stats
-    stats = {
-        "num_subs": 0,
-        "num_subs_agreed": 0,
-
-        "num_reviewers": 0,
-        "num_reviewers_agreed": 0,
-
-        "num_active_reviewers": 0,
-        "num_active_reviewers_agreed": 0,
+    from tqdm import tqdm
 
-        "num_responses": 0,
-        "num_responses_attributed": 0,
-        "num_active_responses": 0,
-        "num_active_responses_attributed": 0,
-
-        "num_revs_agreed_effective": 0
-    }
+    from yyy.stats import collection_stats
 
     # output data
     dataset = {}
@@ -87,7 +84,16 @@ def retrieve_protected_data(venue,
     pid_to_submission = {bs.id: bs for bs in blind_submissions}
 
     active_reviewers_agreed = [r for r in reviewers_agreed if r in reviewer_to_reviews.keys()]
-    active_reviewers_attributed = [r for r in reviewers_attributed if r in reviewer_to_reviews.keys()]
+
+    all_reviewers = api.reviewers(venue)
+
+    scrubber = None
+    if scrub_pii:
+        from yyy.scrub import PIIScrubber
+
+        logging.info("Collecting identifying terms of %s for scrubbing" % venue)
+        scrubber = PIIScrubber(api.identity_terms(venue, set(all_reviewers) | set(reviewer_to_reviews)))
+        params["pii_redactions"] = 0
 
     # storing actual data
     # include peer reviews without author's agreement. Only for the protected review_dataset in the vault
@@ -98,9 +104,11 @@ def retrieve_protected_data(venue,
         for r in reviews:
             sid_anon = anon_hash(r.forum)
             license = reviewer_to_response[rid]
-            dataset[sid_anon] = dataset.get(sid_anon, []) + \
-                                [_review_data(r, license, anon_hash, api, venue,
-                                              pid_to_submission[r.forum])]
+            review_data = _review_data(r, license, anon_hash, api, venue, pid_to_submission[r.forum])
+            if scrubber is not None:
+                params["pii_redactions"] += scrubber.scrub_review(review_data)
+
+            dataset[sid_anon] = dataset.get(sid_anon, []) + [review_data]
 
         agreement = reviewer_to_response[rid]
 
@@ -110,22 +118,20 @@ def retrieve_protected_data(venue,
             "writers": agreement.writers,
             "date": agreement.cdate,
             "attribution": agreement.content["attribution"] if "attribution" in agreement.content else "No",
-            "reviews": [(r.forum, r.id) for r in reviews]
+            "reviews": [(r.forum, r.id) for r in reviews],
+            "reviewer_hash": anon_hash(rid),
+            "review_ids": [anon_hash(r.id) for r in reviews]
         }]
 
     # compute extended statistics
-    all_reviewers = api.reviewers(venue)
-    stats["num_reviewers"] = len(all_reviewers)
-    stats["num_active_reviewers"] = len(reviewer_to_reviews.keys())
-
-    stats["num_responses"] = len(reviewer_to_response.keys())
-    stats["num_responses_attributed"] = len(reviewers_attributed)
-    stats["num_active_responses"] = len(
-        set(reviewer_to_response.keys()).intersection(set(reviewer_to_reviews.keys())))
-    stats["num_active_responses_attributed"] = len(active_reviewers_attributed)
-
-    stats["num_reviewers_agreed"] = len(reviewers_agreed)
-    stats["num_active_reviewers_agreed"] = len(active_reviewers_agreed)
+    stats = collection_stats(all_reviewers,
+                             reviewer_to_response,
+                             reviewer_to_reviews,
+                             reviewers_agreed,
+                             reviewers_attributed,
+                             num_subs=len(blind_submissions),
+                             num_subs_agreed=len(dataset),
+                             num_revs_agreed=sum(len(revs) for revs in dataset.values()))
 
     # storing dataset + licenses
     if not os.path.exists(target_dir) or os.path.isfile(target_dir):
@@ -138,7 +144,11 @@ def retrieve_protected_data(venue,
                               stats,
                               params,
                               target_dir + os.sep + escape_venue_file_name(venue) + ".7z",
-                              password=password_protect)
+                              password=password_protect,
+                              workers=workers,
+                              part_size=part_size,
+                              num_shards=num_shards,
+                              dedup=dedup)
 
     return stats
 
@@ -172,9 +182,13 @@ def _review_data(review, license, anon_hash, api, venue, blind_sub):
 
 
 def _store_full_data_securely(review_dataset, submission_dataset, rev_licenses, sub_licenses, stats, params, path,
-                              prefix="", password=None):
+                              prefix="", password=None, workers=None, part_size=None, num_shards=None, dedup=False):
     """
-    Stores the data using the provided passwords.
+    Stores the data using the provided passwords. If a number of shards is given, the review data is split into
+    shards partitioned by the hash of the anonymized submission IDs and stored along with an index, so that
+    single submissions and reviewers can be loaded without decrypting the full review data. With dedup, the
+    review bodies are stored once per archive under their digest (shared by all venues) and the review data
+    only holds references to them. Bodies no longer referenced by any venue are dropped.
 
     :param review_dataset: dataset of review data
     :param submission_dataset: dataset of submission data (or empty)
@@ -185,59 +199,68 @@ def _store_full_data_securely(review_dataset, submission_dataset, rev_licenses,
     :param path: the path to store the data at
     :param prefix: possibly, a prefix for the file names
     :param password: the password or passwords (pair) to encrypt the data
+    :param workers: number of processes compressing and encrypting the entries; None for a single process
+    :param part_size: optionally, the size in bytes above which entries are split into independently encrypted parts
+    :param num_shards: optionally, the number of shards to split the review data into
+    :param dedup: True, if review bodies should be stored in the content-addressed layout
     :return: None
     """
+    from yyy.licenses import encode_licenses
+
+    data_password, license_password = password if type(password) == tuple else (password, password)
+
+    # all files of the venue are written in a single rewrite of the archive
+    groups = []
+    remove = []
+
     # store sensitive data
     if rev_licenses is None:
         rev_licenses = []
     if sub_licenses is None:
         sub_licenses = []
 
-    with io.BytesIO() as stream0, io.BytesIO() as stream1:
-        file_names = [prefix + s for s in ["sub_licenses.csv", "rev_licenses.csv"]]
+    groups += [([prefix + s for s in LICENSE_FILES],
+                [io.BytesIO(encode_licenses(sub_licenses)), io.BytesIO(encode_licenses(rev_licenses))],
+                license_password)]
 
-        pandas.DataFrame(rev_licenses).to_csv(stream0)
-        pandas.DataFrame(sub_licenses).to_csv(stream1)
-        data = [stream0, stream1]
-
-        if type(password) == tuple:
-            store_files_securely(file_names, data, path, password[1])
-        else:
-            store_files_securely(file_names, data, path, password)
+    # licenses stored as CSV by earlier collections are replaced
+    remove += [prefix + s for s in LEGACY_LICENSE_FILES]
 
     # store data and params
     if review_dataset is None:
         review_dataset = {}
 
-    with io.BytesIO() as stream0, io.BytesIO() as stream1, io.BytesIO() as stream2:
-        file_names = [prefix + s for s in ["rev_data.json", "params.json", "stats.json"]]
+    bodies = {}
+    if dedup:
+        review_dataset, bodies = _deduplicate_review_data(review_dataset)
 
-        stream0.write(json.dumps(review_dataset).encode())
-        stream1.write(json.dumps(params).encode())
-        stream2.write(json.dumps(stats).encode())
-        data = [stream0, stream1, stream2]
+    # the venue may reference other bodies than before (or none, if it is no longer deduplicated)
+    content, stale = _content_files(bodies, path, prefix, data_password)
+    groups += [content]
+    remove += stale
 
-        if type(password) == tuple:
-            store_files_securely(file_names, data, path, password[0])
-        else:
-            store_files_securely(file_names, data, path, password)
+    if num_shards is None:
+        rev_files = {"rev_data.json": review_dataset}
+    else:
+        rev_files = _shard_review_data(review_dataset, num_shards)
 
     if submission_dataset is None:
         submission_dataset = {}
 
-    with io.BytesIO() as stream0:
-        file_names = [prefix + s for s in ["sub_data.json"]]
+    file_names = [prefix + s for s in list(rev_files) + ["params.json", "stats.json", "sub_data.json"]]
+    data = [io.BytesIO(json.dumps(d).encode()) for d in rev_files.values()] + \
+        [io.BytesIO(json.dumps(d).encode()) for d in [params, stats, submission_dataset]]
+    groups += [(file_names, data, data_password)]
 
-        stream0.write(json.dumps(submission_dataset).encode())
-        data = [stream0]
+    # drop review files of a previously stored layout (or number of shards)
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        remove += [f for f in _stored_files(path) if f.startswith(prefix) and f not in file_names and
+                   _REVIEW_FILE_PATTERN.match(f[len(prefix):])]
 
-        if type(password) == tuple:
-            store_files_securely(file_names, data, path, password[0])
-        else:
-            store_files_securely(file_names, data, path, password)
+    _store_file_groups_securely(groups, path, workers, part_size, remove)
 
 
-def _load_full_data_securely(path, with_licenses, prefix="", password=None):
+def _load_full_data_securely(path, with_licenses, prefix="", password=None, content_cache=None):
     """
     Loads the stored data.
 
@@ -245,37 +268,37 @@ def _load_full_data_securely(path, with_licenses, prefix="", password=None):
     :param with_licenses: True, if licenses should also be loaded
     :param prefix: optionally a prefix for the files to load
     :param password: password or pair of passwords
+    :param content_cache: optionally, a dict of loaded content buckets shared across calls
     :return:
     """
     sub_license, rev_license = None, None
 
     # load sensitive data
     if with_licenses:
-        with io.BytesIO() as stream0, io.BytesIO() as stream1:
-            file_names = [prefix + s for s in ["sub_licenses.csv", "rev_licenses.csv"]]
-            buffs = [stream0, stream1]
-
-            if type(password) == tuple:
-                load_files_securely(file_names, buffs, path, password[1])
-            else:
-                load_files_securely(file_names, buffs, path, password)
+        if type(password) == tuple:
+            sub_licenses, rev_licenses = load_licenses_securely(path, prefix, password[1])
+        else:
+            sub_licenses, rev_licenses = load_licenses_securely(path, prefix, password)
 
-            sub_license = pandas.read_csv(stream0)
-            rev_license = pandas.read_csv(stream1)
+        sub_license, rev_license = sub_licenses.frame(), rev_licenses.frame()
 
     # load review data and params
-    with io.BytesIO() as stream0, io.BytesIO() as stream1, io.BytesIO() as stream2:
-        file_names = [prefix + s for s in ["rev_data.json", "params.json", "stats.json"]]
-        buffs = [stream0, stream1, stream2]
+    with io.BytesIO() as stream0, io.BytesIO() as stream1:
+        file_names = [prefix + s for s in ["params.json", "stats.json"]]
+        buffs = [stream0, stream1]
 
         if type(password) == tuple:
             load_files_securely(file_names, buffs, path, password[0])
         else:
             load_files_securely(file_names, buffs, path, password)
 
-        review_data = json.load(stream0)
-        params = json.load(stream1)
-        stats = json.load(stream2)
+        params = json.load(stream0)
+        stats = json.load(stream1)
+
+    if type(password) == tuple:
+        review_data = load_review_data_securely(path, prefix, password[0], content_cache)
+    else:
+        review_data = load_review_data_securely(path, prefix, password, content_cache)
 
     # load sub data
     with io.BytesIO() as stream0:
@@ -292,6 +315,414 @@ def _load_full_data_securely(path, with_licenses, prefix="", password=None):
     return review_data, submission_data, params, stats, rev_license, sub_license
 
 
+def _shard_of(sid, num_shards):
+    """
+    Returns the shard of the given (anonymized) submission ID. Deterministic.
+
+    :param sid: the submission ID
+    :param num_shards: the total number of shards
+    :return: the shard number
+    """
+    return int(hashlib.sha1(sid.encode("utf-8")).hexdigest()[:8], 16) % num_shards
+
+
+def _shard_review_data(review_dataset, num_shards):
+    """
+    Partitions review data by the hash of submission IDs and creates the index over the shards.
+
+    :param review_dataset: dataset of review data
+    :param num_shards: the number of shards
+    :return: dict of file names (without prefix) to their content; the index first followed by the shards
+    """
+    shards = [{} for _ in range(num_shards)]
+    index = {
+        "num_shards": num_shards,
+        "submissions": {},
+        "reviewers": {}
+    }
+
+    for sid, revs in review_dataset.items():
+        shard = _shard_of(sid, num_shards)
+        shards[shard][sid] = revs
+        index["submissions"][sid] = shard
+
+        for r in revs:
+            reviewer_sids = index["reviewers"].setdefault(r["tauthor"], [])
+            if sid not in reviewer_sids:
+                reviewer_sids += [sid]
+
+    files = {"rev_index.json": index}
+    files.update({"rev_shard%04d.json" % i: shard for i, shard in enumerate(shards)})
+
+    return files
+
+
+def is_sharded(file_names, prefix=""):
+    """
+    Checks whether the most recently stored review data for the given prefix uses the sharded layout.
+
+    :param file_names: the names of the files contained in the archive in order of storage
+    :param prefix: the prefix of the file names
+    :return: True, if the review data is sharded
+    """
+    sharded = False
+    for f in file_names:
+        part = _PART_PATTERN.match(f)
+        name = part.group(1) if part is not None else f
+
+        if name == prefix + "rev_data.json":
+            sharded = False
+        elif name == prefix + "rev_index.json":
+            sharded = True
+
+    return sharded
+
+
+def load_review_index_securely(path, prefix, password):
+    """
+    Loads the index of sharded review data or None, if the review data is not sharded.
+
+    :param path: the path to the archive
+    :param prefix: the prefix of the file names
+    :param password: the password of the review data
+    :return: the index dict or None
+    """
+    if not is_sharded(load_zip_structure_securely(path, password), prefix):
+        return None
+
+    with io.BytesIO() as stream0:
+        load_files_securely([prefix + "rev_index.json"], [stream0], path, password)
+        return json.load(stream0)
+
+
+def load_review_shards_securely(path, prefix, shards, password, content_cache=None):
+    """
+    Loads the given shards of sharded review data. Review bodies stored in the content-addressed layout are
+    resolved, unless content_cache is False.
+
+    :param path: the path to the archive
+    :param prefix: the prefix of the file names
+    :param shards: the shard numbers to load
+    :param password: the password of the review data
+    :param content_cache: optionally, a dict of loaded content buckets shared across calls; False to not resolve
+    :return: the review data contained in the shards
+    """
+    shards = sorted(set(shards))
+    file_names = [prefix + "rev_shard%04d.json" % i for i in shards]
+    buffs = [io.BytesIO() for _ in shards]
+
+    load_files_securely(file_names, buffs, path, password)
+
+    review_data = {}
+    for buff in buffs:
+        review_data.update(json.load(buff))
+        buff.close()
+
+    if content_cache is not False:
+        resolve_content_securely(review_data, path, password, content_cache)
+
+    return review_data
+
+
+def load_review_data_securely(path, prefix, password, content_cache=None):
+    """
+    Loads the full review data stored either as a single file or in shards. Review bodies stored in the
+    content-addressed layout are resolved, unless content_cache is False.
+
+    :param path: the path to the archive
+    :param prefix: the prefix of the file names
+    :param password: the password of the review data
+    :param content_cache: optionally, a dict of loaded content buckets shared across calls; False to not resolve
+    :return: the review data
+    """
+    index = load_review_index_securely(path, prefix, password)
+    if index is not None:
+        return load_review_shards_securely(path, prefix, range(index["num_shards"]), password, content_cache)
+
+    with io.BytesIO() as stream0:
+        load_files_securely([prefix + "rev_data.json"], [stream0], path, password)
+        review_data = json.load(stream0)
+
+    if content_cache is not False:
+        resolve_content_securely(review_data, path, password, content_cache)
+
+    return review_data
+
+
+# fields describing a review rather than its body; the body is stored once under its digest in the
+# content-addressed layout
+REVIEW_META_FIELDS = {"cdate", "tmdate", "tauthor", "signature", "id", "license_date", "attribution"}
+CONTENT_REFERENCE = "$content"
+
+
+CONTENT_BUCKET_PATTERN = re.compile(r"^cas-([0-9a-f]+)\.json$")
+CONTENT_INDEX = "cas-index.json"
+
+# average number of bodies per bucket above which bodies are bucketed by one more character of their digest
+CONTENT_BUCKET_SIZE = 1024
+
+
+def _content_bucket(digest, depth):
+    """
+    Returns the name of the archive file holding the body with the given digest. Bodies are bucketed by the first
+    depth characters of their digest: every archive entry costs a key derivation on loading, which outweighs
+    decoding some bodies that are not needed, yet single reviews should not require decoding all of them.
+    """
+    return "cas-%s.json" % digest[:depth]
+
+
+def content_depth(file_names):
+    """
+    Returns the number of digest characters keying the content buckets of an archive. All buckets of an archive
+    share the depth.
+
+    :param file_names: the names of the files contained in the archive
+    :return: the depth or None, if the archive has no content buckets
+    """
+    for f in file_names:
+        match = CONTENT_BUCKET_PATTERN.match(f)
+        if match is not None:
+            return len(match.group(1))
+
+    return None
+
+
+def _required_depth(num_bodies):
+    """
+    :return: the smallest bucket depth keeping the buckets at CONTENT_BUCKET_SIZE bodies on average
+    """
+    depth = 1
+    while num_bodies > CONTENT_BUCKET_SIZE * 16 ** depth:
+        depth += 1
+
+    return depth
+
+
+def _deduplicate_review_data(review_dataset):
+    """
+    Replaces the bodies of all reviews by references to their digest. The body fields are replaced by a single
+    reference field at the position of the first one, so resolving restores the order of the fields. The digest
+    covers the order of the body fields as well, so equal bodies with differently ordered fields are stored
+    separately and each review gets its own order back.
+
+    :param review_dataset: dataset of review data
+    :return: pair of the review data with references and a dict of digests to bodies
+    """
+    bodies = {}
+    result = {}
+    for sid, revs in review_dataset.items():
+        result[sid] = []
+        for r in revs:
+            body = {k: v for k, v in r.items() if k not in REVIEW_META_FIELDS}
+            if len(body) == 0:
+                result[sid] += [r]
+                continue
+
+            digest = hashlib.sha256(json.dumps(body).encode()).hexdigest()[:32]
+            bodies[digest] = body
+
+            ref = {}
+            for k, v in r.items():
+                if k in REVIEW_META_FIELDS:
+                    ref[k] = v
+                elif CONTENT_REFERENCE not in ref:
+                    ref[CONTENT_REFERENCE] = digest
+            result[sid] += [ref]
+
+    return result, bodies
+
+
+def _load_content_index(path, file_names, password):
+    """
+    Loads the index of the content-addressed layout. Archives stored before the index existed are indexed by
+    reading the references of all venues.
+
+    :param path: the path to the archive
+    :param file_names: the names of the files contained in the archive
+    :param password: the password of the review data
+    :return: dict with the bucket depth (None without buckets) and the references, a dict of venue prefixes to
+             the sorted digests referenced by the venue
+    """
+    if CONTENT_INDEX in file_names:
+        with io.BytesIO() as stream0:
+            load_files_securely([CONTENT_INDEX], [stream0], path, password)
+            return json.load(stream0)
+
+    references = {}
+    depth = content_depth(file_names)
+    if depth is not None:
+        for v in venues_of(file_names):
+            review_data = load_review_data_securely(path, v + "_", password, content_cache=False)
+            digests = set(r[CONTENT_REFERENCE] for revs in review_data.values() for r in revs
+                          if CONTENT_REFERENCE in r)
+            if len(digests) > 0:
+                references[v + "_"] = sorted(digests)
+
+    return {"depth": depth, "references": references}
+
+
+def _content_files(bodies, path, prefix, password):
+    """
+    Updates the content buckets of an archive to the bodies now referenced by a venue. The content index counts
+    the references of all venues: bodies no longer referenced by any venue are dropped, new ones are added.
+    Only the buckets gaining or losing bodies are read and rewritten, unless the bucket depth grows with the
+    amount of content, which redistributes all bodies. The depth is never reduced, so compacting does not
+    rewrite all buckets back and forth.
+
+    :param bodies: dict of digests to the bodies referenced by the venue; empty without deduplication
+    :param path: the path to the archive
+    :param prefix: the prefix of the venue files
+    :param password: the password of the review data
+    :return: pair of the (file names, buffers, password) triple of the files to write, see
+             _store_file_groups_securely, and the names of the buckets to remove
+    """
+    file_names = load_zip_structure_securely(path, password) if os.path.exists(path) and \
+        os.path.getsize(path) > 0 else []
+
+    index = _load_content_index(path, file_names, password)
+    if len(bodies) == 0 and prefix not in index["references"]:
+        return ([], [], password), []
+
+    before = Counter(d for digests in index["references"].values() for d in digests)
+    if len(bodies) > 0:
+        index["references"][prefix] = sorted(bodies)
+    else:
+        del index["references"][prefix]
+    after = Counter(d for digests in index["references"].values() for d in digests)
+
+    added = set(bodies) - set(before)
+    unreferenced = set(before) - set(after)
+
+    stored = [f for f in file_names if CONTENT_BUCKET_PATTERN.match(f)]
+    depth = max(index["depth"] or 1, _required_depth(len(after)))
+    if depth != index["depth"]:
+        read = stored
+    else:
+        read = sorted(set(_content_bucket(d, depth) for d in added | unreferenced) & set(stored))
+    index["depth"] = depth
+
+    content = load_content_buckets_securely(path, read, password) if len(read) > 0 else {}
+
+    buckets = {}
+    for bucket in content.values():
+        for d, body in bucket.items():
+            if d in after:
+                buckets.setdefault(_content_bucket(d, depth), {})[d] = body
+    for d in added:
+        buckets.setdefault(_content_bucket(d, depth), {})[d] = bodies[d]
+
+    names = sorted(buckets)
+    data = [io.BytesIO(json.dumps(buckets[b]).encode()) for b in names] + [io.BytesIO(json.dumps(index).encode())]
+
+    return (names + [CONTENT_INDEX], data, password), [b for b in read if b not in buckets]
+
+
+def load_content_buckets_securely(path, buckets, password):
+    """
+    Loads content buckets of the content-addressed layout.
+
+    :param path: the path to the archive
+    :param buckets: the bucket file names
+    :param password: the password of the review data
+    :return: dict of bucket names to dicts of digests to bodies
+    """
+    buckets = list(buckets)
+    buffs = [io.BytesIO() for _ in buckets]
+    load_files_securely(buckets, buffs, path, password)
+
+    return {b: json.load(buff) for b, buff in zip(buckets, buffs)}
+
+
+def resolve_content(review_data, content, depth):
+    """
+    Replaces the references of the content-addressed layout by the bodies they point to, in place.
+
+    :param review_data: dataset of review data
+    :param content: dict of bucket names to dicts of digests to bodies, covering all referenced digests
+    :param depth: the bucket depth of the archive, see content_depth
+    :return: the review data
+    """
+    for revs in review_data.values():
+        for i, r in enumerate(revs):
+            if CONTENT_REFERENCE in r:
+                revs[i] = resolve_record(r, content, depth)
+
+    return review_data
+
+
+def resolve_record(record, content, depth):
+    """
+    Resolves the reference of a single review record of the content-addressed layout.
+
+    :param record: the review record holding a reference
+    :param content: dict of bucket names to dicts of digests to bodies, covering the referenced digest
+    :param depth: the bucket depth of the archive, see content_depth
+    :return: the review record with its reference replaced by the body
+    """
+    resolved = {}
+    for k, v in record.items():
+        if k == CONTENT_REFERENCE:
+            resolved.update(content[_content_bucket(v, depth)][v])
+        else:
+            resolved[k] = v
+
+    return resolved
+
+
+def resolve_content_securely(review_data, path, password, content_cache=None):
+    """
+    Resolves the references of the content-addressed layout, loading the buckets they point to.
+
+    :param review_data: dataset of review data
+    :param path: the path to the archive
+    :param password: the password of the review data
+    :param content_cache: optionally, a dict of loaded buckets shared across calls
+    :return: the review data
+    """
+    content_cache = {} if content_cache is None else content_cache
+
+    references = [r[CONTENT_REFERENCE] for revs in review_data.values() for r in revs if CONTENT_REFERENCE in r]
+    if len(references) == 0:
+        return review_data
+
+    depth = content_depth(load_zip_structure_securely(path, password))
+    missing = set(_content_bucket(d, depth) for d in references) - set(content_cache)
+    if len(missing) > 0:
+        content_cache.update(load_content_buckets_securely(path, sorted(missing), password))
+
+    return resolve_content(review_data, content_cache, depth)
+
+
+LICENSE_FILES = ["sub_licenses.json", "rev_licenses.json"]
+LEGACY_LICENSE_FILES = ["sub_licenses.csv", "rev_licenses.csv"]
+
+
+def load_licenses_securely(path, prefix, password):
+    """
+    Loads the submission and review licenses of a venue. Licenses stored as CSV by earlier collections are
+    read as well, with their stringified list columns parsed.
+
+    :param path: the path to the archive
+    :param prefix: the prefix of the venue files
+    :param password: the password of the licenses
+    :return: pair of LicenseIndex objects of the submission and review licenses
+    """
+    from yyy.licenses import decode_licenses, decode_license_csv
+
+    file_names = load_zip_structure_securely(path, password)
+    if prefix + LICENSE_FILES[1] in file_names:
+        names, decode = LICENSE_FILES, decode_licenses
+    else:
+        # earlier collections wrote the review licenses to sub_licenses.csv and the submission licenses to
+        # rev_licenses.csv
+        names, decode = LEGACY_LICENSE_FILES[::-1], decode_license_csv
+
+    buffs = [io.BytesIO(), io.BytesIO()]
+    load_files_securely([prefix + s for s in names], buffs, path, password)
+
+    return tuple(decode(io.BytesIO(b.getvalue())) for b in buffs)
+
+
 def load_protected_data_across_venues(dir, venues=None, password=None, with_process_data=False):
     """
     Loads stored data possibly from multiple venues stored in the same file.
@@ -314,14 +745,16 @@ def load_protected_data_across_venues(dir, venues=None, password=None, with_proc
             filenames = load_zip_structure_securely(default_file, password[0])
         else:
             filenames = load_zip_structure_securely(default_file, password)
-        venues = [f.split("_")[0] for f in filenames]
+        venues = venues_of(filenames)
 
-    # access metadata file and load information
+    # access metadata file and load information; content buckets shared by the venues are loaded once
+    content_cache = {}
     for v in venues:
         loaded = _load_full_data_securely(default_file,
                                           with_licenses=False,
                                           prefix=escape_venue_file_name(v) + "_",
-                                          password=password)
+                                          password=password,
+                                          content_cache=content_cache)
         revdata, subdata, params, stats = loaded[0], loaded[1], loaded[2], loaded[3]
 
         result_revdata[v] = revdata
@@ -335,6 +768,17 @@ def load_protected_data_across_venues(dir, venues=None, password=None, with_proc
         return result_revdata, result_subdata
 
 
+def venues_of(file_names):
+    """
+    Returns the (escaped) venue names of the files in an archive. Files without a venue prefix, such as the
+    manifest and the content buckets, are skipped.
+
+    :param file_names: the names of the files contained in the archive
+    :return: list of venue names in order of storage
+    """
+    return list(dict.fromkeys(f.split("_")[0] for f in file_names if "_" in f))
+
+
 def escape_venue_file_name(venue):
     """
     Escapes the venue name (OR ID) to be formatted appropriately for storing. Deterministic.
@@ -361,21 +805,24 @@ def load_zip_structure_securely(path, password):
 
     :param path: path to file
     :param password: used password
-    :return: the loaded files from within the zip
+    :return: the loaded files from within the zip (without the manifest); files stored in parts are listed once
     """
+    import pyzipper
+
     with pyzipper.AESZipFile(path, 'r', compression=pyzipper.ZIP_LZMA) as zf:
         if password is not None:
             zf.setpassword(bytes(password, 'utf-8'))
             zf.setencryption(pyzipper.WZ_AES, nbits=256)
 
-        contained_files = zf.namelist()
+        contained_files = list(dict.fromkeys(_PART_PATTERN.sub(r"\1", f) for f in zf.namelist() if f != MANIFEST_NAME))
 
     return contained_files
 
 
 def load_files_securely(file_names, target_buffers, path, password):
     """
-    Loads the files contained in an AES encrypted zip file.
+    Loads the files contained in an AES encrypted zip file. Files stored in several parts are
+    reassembled transparently.
 
     :param file_names: list of files to load from the zip
     :param target_buffers: list of buffers to read the result into
@@ -383,38 +830,346 @@ def load_files_securely(file_names, target_buffers, path, password):
     :param password: the password used during encryption
     :return: void
     """
+    import pyzipper
+
     with pyzipper.AESZipFile(path, 'r', compression=pyzipper.ZIP_LZMA) as zf:
         if password is not None:
             zf.setpassword(bytes(password, 'utf-8'))
             zf.setencryption(pyzipper.WZ_AES, nbits=256)
 
         for fn, buff in zip(file_names, target_buffers):
-            with zf.open(fn, "r") as file:
-                buff.write(file.read())
-                buff.seek(0)
+            for info in _resolve_entry(zf, fn):
+                with zf.open(info, "r") as file:
+                    buff.write(file.read())
+            buff.seek(0)
 
 
-def store_files_securely(file_names, data, path, password):
+def store_files_securely(file_names, data, path, password, workers=None, part_size=None, remove=None):
     """
-    Stores the given files within an AES encrypted zip file.
+    Stores the given files within an AES encrypted zip file. Files already contained in the archive are replaced:
+    the remaining members are streamed into a new archive (without recompressing them) along with the new
+    entries, which then atomically replaces the old one. Shadowed versions of files left by earlier appends are
+    dropped on the way. A manifest records the size and a password-keyed checksum of each file, so files stored
+    again with the same content and password are skipped. With several workers, the entries are compressed and
+    encrypted in a process pool and the finished members are appended to the archive by this process.
 
     :param file_names: list of file names
     :param data: associated buffers, one per file name
     :param path: the path to store
     :param password: the password to use
-    :return: void
+    :param workers: number of processes compressing and encrypting the entries; None for a single process
+    :param part_size: optionally, the size in bytes above which entries are split into independently encrypted parts
+    :param remove: optionally, names of further files to remove from the archive
+    :return: the names of the files that were written
     """
-    if not os.path.exists(path):
-        pathlib.Path(path).touch()
+    return _store_file_groups_securely([(file_names, data, password)], path, workers, part_size, remove)
 
-    with pyzipper.AESZipFile(path, 'a', compression=pyzipper.ZIP_LZMA) as zf:
-        if password is not None:
-            zf.setpassword(bytes(password, 'utf-8'))
-            zf.setencryption(pyzipper.WZ_AES, nbits=256)
 
+def _store_file_groups_securely(groups, path, workers=None, part_size=None, remove=None):
+    """
+    Stores groups of files encrypted with different passwords, e.g. the data and the licenses of a venue, like
+    store_files_securely, but with a single rewrite of the archive. The new archive is written to a uniquely
+    named temporary file next to the archive.
+
+    :param groups: list of (file names, buffers, password) triples
+    :param path: the path to store
+    :param workers: number of processes compressing and encrypting the entries; None for a single process
+    :param part_size: optionally, the size in bytes above which entries are split into independently encrypted parts
+    :param remove: optionally, names of further files to remove from the archive
+    :return: the names of the files that were written
+    """
+    import pyzipper
+
+    exists = os.path.exists(path) and os.path.getsize(path) > 0
+    manifest = _read_manifest(path) if exists else None
+    if manifest is None:
+        manifest = {"salt": os.urandom(16).hex(), "entries": {}}
+
+    stored = _stored_files(path) if exists else {}
+
+    keys = {}
+    changed_names, entries = [], []
+    for file_names, data, password in groups:
+        if password not in keys:
+            keys[password] = _manifest_key(password, bytes.fromhex(manifest["salt"]))
+
+        names, payloads = [], []
         for n, d in zip(file_names, data):
-            with zf.open(n, 'w') as file:
-                file.write(d.getvalue())
+            payload = d.getvalue()
+            entry = {"size": len(payload), "hmac": hmac.new(keys[password], payload, hashlib.sha256).hexdigest()}
+            if n in stored and manifest["entries"].get(n) == entry:
+                continue
+
+            manifest["entries"][n] = entry
+            names += [n]
+            payloads += [d]
+
+        pwd = bytes(password, 'utf-8') if password is not None else None
+        changed_names += names
+        entries += [(n, d, pwd) for n, d in _split_entries(names, payloads, part_size)]
+
+    removed = set(remove or []) & set(stored)
+    for n in removed:
+        manifest["entries"].pop(n, None)
+
+    if len(changed_names) == 0 and len(removed) == 0:
+        return []
+
+    kept = [info for n, infos in stored.items() if n not in removed and n not in changed_names for info in infos]
+
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=name + ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        with pyzipper.AESZipFile(tmp_path, 'w', compression=pyzipper.ZIP_LZMA) as zf:
+            if len(kept) > 0:
+                _copy_zip_members(path, sorted(kept, key=lambda info: info.header_offset), zf)
+
+            names, payloads, pwds = [n for n, _, _ in entries], [d for _, d, _ in entries], [p for _, _, p in entries]
+            if workers is None or workers <= 1:
+                for member in map(_build_zip_member, names, payloads, pwds):
+                    _append_zip_member(zf, member)
+            else:
+                from concurrent.futures import ProcessPoolExecutor
+
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    for member in pool.map(_build_zip_member, names, payloads, pwds):
+                        _append_zip_member(zf, member)
+
+            # the manifest is not encrypted; it only holds sizes and keyed checksums
+            _append_zip_member(zf, _build_zip_member(MANIFEST_NAME, json.dumps(manifest).encode(), None))
+
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return changed_names
+
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_KDF_ITERATIONS = 100000
+
+
+def _manifest_key(password, salt):
+    """
+    Derives the key of the manifest checksums from the password of the files.
+    """
+    pwd = b"" if password is None else bytes(password, "utf-8")
+    return hashlib.pbkdf2_hmac("sha256", pwd, salt, MANIFEST_KDF_ITERATIONS, dklen=32)
+
+
+def _read_manifest(path):
+    """
+    Reads the manifest of an archive.
+
+    :param path: the path to the archive
+    :return: the manifest dict or None, if the archive has none
+    """
+    import pyzipper
+
+    with pyzipper.AESZipFile(path, 'r') as zf:
+        if MANIFEST_NAME not in zf.NameToInfo:
+            return None
+
+        with zf.open(MANIFEST_NAME, "r") as file:
+            return json.load(file)
+
+
+def venue_fingerprints(path):
+    """
+    Fingerprints the review data of every venue of an archive by the checksums its manifest holds for the
+    review files, without decrypting anything. A fingerprint changes whenever the review files of the venue
+    change, which includes the bodies they reference in the content-addressed layout.
+
+    :param path: the path to the archive
+    :return: dict of venue prefixes to hex digests; empty, if the archive has no manifest
+    """
+    manifest = _read_manifest(path)
+    if manifest is None:
+        return {}
+
+    fingerprints = {}
+    for n, entry in sorted(manifest["entries"].items()):
+        if "_" not in n:
+            continue
+
+        prefix = n[:n.index("_") + 1]
+        if _REVIEW_FILE_PATTERN.match(n[len(prefix):]):
+            fingerprints.setdefault(prefix, hashlib.sha256()).update((n + entry["hmac"]).encode())
+
+    return {p: h.hexdigest() for p, h in fingerprints.items()}
+
+
+def _stored_files(path):
+    """
+    Lists the files stored in an archive along with the members holding their most recent version.
+
+    :param path: the path to the archive
+    :return: dict of file names to lists of ZipInfo objects (the file itself or its parts)
+    """
+    import pyzipper
+
+    with pyzipper.AESZipFile(path, 'r') as zf:
+        names = dict.fromkeys(_PART_PATTERN.sub(r"\1", f) for f in zf.namelist() if f != MANIFEST_NAME)
+
+        return {n: _resolve_entry(zf, n) for n in names}
+
+
+def _copy_zip_members(path, infos, zf):
+    """
+    Streams members of an archive into another one opened for writing, without recompressing or
+    re-encrypting them.
+
+    :param path: the path to the source archive
+    :param infos: the ZipInfo objects of the members to copy, sorted by their position
+    :param zf: the target zip file
+    :return: void
+    """
+    import pyzipper
+
+    with pyzipper.AESZipFile(path, 'r') as src:
+        # a member spans from its local header to the next member or the central directory
+        offsets = sorted(info.header_offset for info in src.infolist()) + [src.start_dir]
+        ends = dict(zip(offsets[:-1], offsets[1:]))
+
+    with open(path, "rb") as fp:
+        for info in infos:
+            end = ends[info.header_offset]
+            fp.seek(info.header_offset)
+
+            copied = copy.copy(info)
+            copied.header_offset = zf.start_dir
+            zf.fp.seek(zf.start_dir)
+
+            remaining = end - info.header_offset
+            while remaining > 0:
+                chunk = fp.read(min(remaining, 1 << 22))
+                zf.fp.write(chunk)
+                remaining -= len(chunk)
+
+            zf.start_dir = zf.fp.tell()
+            zf.filelist.append(copied)
+            zf.NameToInfo[copied.filename] = copied
+            zf._didModify = True
+
+
+_PART_PATTERN = re.compile(r"^(.*)\.part(\d{5})of(\d{5})$")
+_REVIEW_FILE_PATTERN = re.compile(r"^(rev_data|rev_index|rev_shard\d{4})\.json$")
+
+
+def _part_name(file_name, i, n):
+    """
+    Returns the member name of the i-th out of n parts of the given file.
+    """
+    return "%s.part%05dof%05d" % (file_name, i, n)
+
+
+def _split_entries(file_names, data, part_size):
+    """
+    Pairs file names with their payload, splitting payloads larger than part_size into parts.
+
+    :param file_names: list of file names
+    :param data: associated buffers, one per file name
+    :param part_size: maximum size of a part in bytes or None to never split
+    :return: list of (member name, bytes) pairs
+    """
+    entries = []
+    for n, d in zip(file_names, data):
+        payload = d.getvalue()
+        if part_size is None or len(payload) <= part_size:
+            entries += [(n, payload)]
+            continue
+
+        num_parts = (len(payload) + part_size - 1) // part_size
+        for i in range(num_parts):
+            entries += [(_part_name(n, i, num_parts), payload[i * part_size:(i + 1) * part_size])]
+
+    return entries
+
+
+def _resolve_entry(zf, file_name):
+    """
+    Finds the members holding the most recently stored version of a file, which is either the
+    file itself or the complete sequence of its parts.
+
+    :param zf: the opened zip file
+    :param file_name: the name of the stored file
+    :return: list of ZipInfo objects to read in order
+    """
+    latest = []
+    for info in zf.infolist():
+        if info.filename == file_name:
+            latest = [info]
+            continue
+
+        match = _PART_PATTERN.match(info.filename)
+        if match is None or match.group(1) != file_name:
+            continue
+
+        i, n = int(match.group(2)), int(match.group(3))
+        if i == 0:
+            latest = [info]
+        elif len(latest) == i and _part_name(file_name, i - 1, n) == latest[-1].filename:
+            latest += [info]
+
+    if len(latest) == 0:
+        raise KeyError("There is no item named %r in the archive" % file_name)
+
+    match = _PART_PATTERN.match(latest[-1].filename)
+    if match is not None and int(match.group(2)) + 1 != int(match.group(3)):
+        raise ValueError("The archive only contains %d parts of %s." % (len(latest), file_name))
+
+    return latest
+
+
+def _build_zip_member(name, payload, password):
+    """
+    Compresses and encrypts one entry into a standalone single-member zip archive. Runs in the
+    worker processes of store_files_securely.
+
+    :param name: the member name
+    :param payload: the bytes to store
+    :param password: the encoded password or None
+    :return: the bytes of the single-member archive
+    """
+    import pyzipper
+
+    with io.BytesIO() as buff:
+        with pyzipper.AESZipFile(buff, 'w', compression=pyzipper.ZIP_LZMA) as zf:
+            if password is not None:
+                zf.setpassword(password)
+                zf.setencryption(pyzipper.WZ_AES, nbits=256)
+
+            with zf.open(name, 'w') as file:
+                file.write(payload)
+
+        return buff.getvalue()
+
+
+def _append_zip_member(zf, member):
+    """
+    Appends the finished member of a single-member archive to an archive opened for appending,
+    without recompressing or re-encrypting it.
+
+    :param zf: the zip file opened in 'a' mode
+    :param member: the bytes of a single-member archive produced by _build_zip_member
+    :return: void
+    """
+    import pyzipper
+
+    with pyzipper.AESZipFile(io.BytesIO(member), 'r') as src:
+        info = src.infolist()[0]
+        raw = member[:src.start_dir]
+
+    zf.fp.seek(zf.start_dir)
+    info.header_offset = zf.start_dir
+    zf.fp.write(raw)
+    zf.start_dir = zf.fp.tell()
+
+    zf.filelist.append(info)
+    zf.NameToInfo[info.filename] = info
+    zf._didModify = True
 
 
 def copy_readme(path, readme_path="resources/README.md"):
@@ -474,6 +1229,29 @@ def main():
                         required=False,
                         choices=["yes", "no"],
                         help='sets the salt of the hashing algorithm explicitly; asked to enter on prompt.')
+    parser.add_argument('--workers',
+                        required=False,
+                        type=int,
+                        help='number of processes used for compressing and encrypting the stored files')
+    parser.add_argument('--part_mb',
+                        required=False,
+                        type=int,
+                        help='files larger than this many MB are stored in parts, which can be processed in parallel')
+    parser.add_argument('--shards',
+                        required=False,
+                        type=int,
+                        help='stores the reviews in this many shards to allow loading single submissions or reviewers')
+    parser.add_argument('--metrics_file',
+                        required=False,
+                        help='path to store the per-endpoint request metrics of the run in (JSON)')
+    parser.add_argument('--scrub_pii',
+                        required=False,
+                        choices=["yes", "no"],
+                        help='yes, if names, emails and profile IDs of reviewers and authors should be redacted')
+    parser.add_argument('--dedup',
+                        required=False,
+                        choices=["yes", "no"],
+                        help='yes, if identical review bodies should be stored only once per archive')
 
     args = parser.parse_args()
 
@@ -523,11 +1301,25 @@ def main():
         salt = random_salt(32).encode("utf-8")
     hash = HashWrapper(fun, salt, repetitions=10000)  # default ot 10000 repetitions for security
 
+    api = or_api.OpenReviewAPI()
+    api.login()
+
     retrieve_protected_data(venue=args.venue,
                             target_dir=dir,
                             anon_hash=hash,
                             store_agreement=agreement,
-                            password_protect=(password, password_l))
+                            password_protect=(password, password_l),
+                            api=api,
+                            workers=args.workers,
+                            part_size=args.part_mb * 1024 * 1024 if args.part_mb else None,
+                            num_shards=args.shards,
+                            scrub_pii=args.scrub_pii == "yes",
+                            dedup=args.dedup == "yes")
+
+    print(api.transport.metrics.report())
+    if args.metrics_file:
+        with open(args.metrics_file, "w") as f:
+            json.dump(api.transport.metrics.to_dict(), f, indent=2)
 
 
 if __name__ == "__main__":
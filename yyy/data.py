@@ -1,38 +1,357 @@
 import copy
+import io
+import json
 import logging
+import os
 
-from yyy.collect import load_protected_data_across_venues
+from yyy.collect import load_protected_data_across_venues, escape_venue_file_name, load_files_securely, \
+    load_review_index_securely, load_review_shards_securely, load_review_data_securely, load_zip_structure_securely, \
+    load_content_buckets_securely, load_licenses_securely, venues_of, is_sharded, resolve_record, \
+    content_depth, CONTENT_BUCKET_PATTERN, CONTENT_REFERENCE
+from yyy.cache import load_snapshot, store_snapshot
+from yyy.query import Query
+from yyy.textstore import TextStore, LazyContent
 
 
-def load_vault_data(parent_dir, password):
+def load_vault_data(parent_dir, password, cache_dir=None, text_store_dir=None, workers=None, feature_dir=None,
+                    licenses=False):
     """
     Loads the protected (or "vault") dataset from the provided directory and the given password(s).
     They are parsed into a VenueDataset each and added to a MultiVenueDataset.
     :param parent_dir: the directory to load from
     :param password: password or pair of passwords encrypting the files
+    :param cache_dir: optionally, a directory for encrypted snapshots of the decoded dataset to speed up reloading
+    :param text_store_dir: optionally, a directory for memory-mapped text stores keeping the review texts off the heap
+    :param workers: number of processes decoding the venues (and the shards of sharded venues); None for one process
+    :param feature_dir: optionally, a directory for the cached per-review feature tables, see VenueDataset.features
+    :param licenses: True, if the review licenses should be loaded too (with the second password of a pair); they
+                     are never part of the snapshots in the cache_dir
     :return: the MultiVenueDataset loaded from disc
     """
-    fullrev_data, fullsub_data, fparams, fstats = load_protected_data_across_venues(parent_dir,
-                                                                                    venues=None,
-                                                                                    password=password,
-                                                                                    with_process_data=True)
+    archive_path = parent_dir + os.sep + "data.7z"
+    data_password = password[0] if type(password) == tuple else password
 
-    venues = {}
-    for v in fullrev_data:
-        reviews = {pid: {r["id"]: Review(r, r["id"], r["tauthor"]) for r in revs}
-                   for pid, revs in fullrev_data[v].items()}
-        submissions = {pid: sub for pid, sub in fullsub_data[v].items()}
-        if len(submissions) == 0:
-            submissions = {s: Submission({}, s) for s in reviews}
+    if cache_dir is not None:
+        cached = load_snapshot(cache_dir, archive_path, data_password)
+        if cached is not None:
+            if feature_dir is not None:
+                _load_feature_tables(cached, feature_dir, archive_path, data_password)
+            if licenses:
+                _load_licenses(cached, archive_path, password)
+            if text_store_dir is not None:
+                _move_to_text_stores(cached, text_store_dir)
+            return cached
 
-        name = v + "_full_" + fparams[v]["time"]
+    if workers is None or workers <= 1:
+        fullrev_data, fullsub_data, fparams, fstats = load_protected_data_across_venues(parent_dir,
+                                                                                        venues=None,
+                                                                                        password=password,
+                                                                                        with_process_data=True)
 
-        cd = VenueDataset(submissions, reviews, {"full_name": name,
-                                                 "full_stats": fstats[v]
-                                                 })
-        venues[v] = cd
+        venues = {}
+        for v in fullrev_data:
+            venues[v] = _venue_dataset(v, _reviews_of(fullrev_data[v]), fullsub_data[v], fparams[v], fstats[v])
+    else:
+        venues = _load_venues_in_parallel(parent_dir, password, workers)
 
-    return MultiVenueDataset(venues)
+    result = MultiVenueDataset(venues)
+
+    if cache_dir is not None:
+        store_snapshot(cache_dir, archive_path, data_password, result)
+
+    if feature_dir is not None:
+        _load_feature_tables(result, feature_dir, archive_path, data_password)
+
+    if licenses:
+        _load_licenses(result, archive_path, password)
+
+    if text_store_dir is not None:
+        _move_to_text_stores(result, text_store_dir)
+
+    return result
+
+
+def _reviews_of(review_data):
+    """
+    Parses stored review data into dicts of review IDs to Reviews per submission.
+    """
+    return {pid: {r["id"]: Review(r, r["id"], r["tauthor"]) for r in revs} for pid, revs in review_data.items()}
+
+
+def _venue_dataset(venue, reviews, sub_data, params, stats):
+    """
+    Creates the VenueDataset of a loaded venue.
+    """
+    submissions = {pid: sub for pid, sub in sub_data.items()}
+    if len(submissions) == 0:
+        submissions = {s: Submission({}, s) for s in reviews}
+
+    name = venue + "_full_" + params["time"]
+
+    return VenueDataset(submissions, reviews, {"full_name": name,
+                                               "full_stats": stats
+                                               })
+
+
+def _load_venues_in_parallel(parent_dir, password, workers):
+    """
+    Loads all venues of the vault in a process pool. Each venue is decoded by one task, sharded venues by one task
+    per shard, so that large venues are spread over several processes as well. The workers return the parsed
+    Reviews; this process only assembles the datasets and builds their indices. Content buckets of deduplicated
+    review bodies are decoded once by their own tasks and the references are resolved here.
+
+    :param parent_dir: the directory to load from
+    :param password: password or pair of passwords encrypting the files
+    :param workers: the number of processes
+    :return: dict of venue names to VenueDatasets in the order of the archive
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    path = parent_dir + os.sep + "data.7z"
+    if not os.path.exists(path):
+        raise ValueError("Passed directory does not contain a data.7z file. Aborting.")
+
+    data_password = password[0] if type(password) == tuple else password
+
+    file_names = load_zip_structure_securely(path, data_password)
+    venues = venues_of(file_names)
+    prefixes = {v: escape_venue_file_name(v) + "_" for v in venues}
+    buckets = [f for f in file_names if CONTENT_BUCKET_PATTERN.match(f)]
+    depth = content_depth(file_names)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        content = [pool.submit(load_content_buckets_securely, path, [b], data_password) for b in buckets]
+
+        # review data stored as one file is decoded right away, sharded data once the index tells the shards
+        meta = {v: pool.submit(_decode_venue_meta, path, prefixes[v], data_password) for v in venues}
+        review_parts = {v: [pool.submit(_decode_reviews, path, prefixes[v], None, data_password)]
+                        for v in venues if not is_sharded(file_names, prefixes[v])}
+
+        for v in venues:
+            if v not in review_parts:
+                num_shards = meta[v].result()[3]
+                review_parts[v] = [pool.submit(_decode_reviews, path, prefixes[v], i, data_password)
+                                   for i in range(num_shards)]
+
+        bodies = {}
+        for c in content:
+            bodies.update(c.result())
+
+        result = {}
+        for v in venues:
+            params, stats, sub_data, _ = meta[v].result()
+
+            reviews = {}
+            for part in review_parts[v]:
+                reviews.update(part.result())
+
+            for revs in reviews.values():
+                for r in revs.values():
+                    if CONTENT_REFERENCE in r.content:
+                        r.content = resolve_record(r.content, bodies, depth)
+
+            result[v] = _venue_dataset(v, reviews, sub_data, params, stats)
+
+    return result
+
+
+def _decode_venue_meta(path, prefix, password):
+    """
+    Decodes the parameters, statistics and submission data of a venue. Runs in the worker processes of
+    load_vault_data.
+
+    :return: tuple of params, stats, submission data and the number of review shards (None, if not sharded)
+    """
+    buffs = [io.BytesIO() for _ in range(3)]
+    load_files_securely([prefix + s for s in ["params.json", "stats.json", "sub_data.json"]], buffs, path, password)
+    params, stats, sub_data = [json.load(b) for b in buffs]
+
+    index = load_review_index_securely(path, prefix, password)
+
+    return params, stats, sub_data, index["num_shards"] if index is not None else None
+
+
+def _decode_reviews(path, prefix, shard, password):
+    """
+    Decodes the review data of a venue, or one shard of it, into Reviews. Runs in the worker processes of
+    load_vault_data.
+
+    :param shard: the shard number or None for review data stored as a single file
+    :return: dict of submission IDs to dicts of review IDs to Reviews, with unresolved content references
+    """
+    if shard is None:
+        return _reviews_of(load_review_data_securely(path, prefix, password, content_cache=False))
+
+    return _reviews_of(load_review_shards_securely(path, prefix, [shard], password, content_cache=False))
+
+
+def _load_feature_tables(dataset, feature_dir, path, password):
+    """
+    Attaches the feature table of every venue from the feature cache, computing the missing and stale ones.
+    Tables are validated against the fingerprints of the venues in the archive manifest.
+
+    :param dataset: the MultiVenueDataset
+    :param feature_dir: the directory of the feature cache
+    :param path: the path to the archive the dataset was loaded from
+    :param password: the data password
+    :return: None
+    """
+    from yyy.collect import venue_fingerprints
+    from yyy.features import load_feature_table
+
+    fingerprints = venue_fingerprints(path)
+    stat = os.stat(path)
+
+    for v in dataset:
+        # archives without a manifest are fingerprinted as a whole, like the snapshots of cache.py
+        fingerprint = fingerprints.get(escape_venue_file_name(str(v)) + "_", "%d-%d" % (stat.st_mtime_ns, stat.st_size))
+        dataset[v]._features = load_feature_table(feature_dir, v, dataset[v], password, fingerprint)
+
+
+def _load_licenses(dataset, path, password):
+    """
+    Attaches the review licenses of every venue.
+
+    :param dataset: the MultiVenueDataset
+    :param path: the path to the archive
+    :param password: password or pair of passwords encrypting the files
+    :return: None
+    """
+    license_password = password[1] if type(password) == tuple else password
+
+    for v in dataset:
+        _, dataset[v].licenses = load_licenses_securely(path, escape_venue_file_name(str(v)) + "_", license_password)
+
+
+def _move_to_text_stores(dataset, text_store_dir):
+    """
+    Moves the text fields of all reviews into one memory-mapped TextStore per venue.
+
+    :param dataset: the MultiVenueDataset
+    :param text_store_dir: the directory to create the stores in
+    :return: None
+    """
+    os.makedirs(text_store_dir, exist_ok=True)
+
+    for v in dataset:
+        store = TextStore(text_store_dir, prefix=escape_venue_file_name(str(v)) + "_")
+        for sid, revs in dataset[v].reviews.items():
+            for r in revs.values():
+                r.content = LazyContent.from_dict(store, r.content)
+
+        store.seal()
+
+
+class Vault:
+    """
+    Random access to single submissions and reviewers of the protected (or "vault") dataset. For venues stored
+    in the sharded layout, only the index and the shards holding the requested reviews are decrypted. Venues
+    stored as a single file are loaded in full on first access. Loaded data is cached.
+    """
+    def __init__(self, parent_dir, password):
+        self.path = parent_dir + os.sep + "data.7z"
+        if not os.path.exists(self.path):
+            raise ValueError("Passed directory does not contain a data.7z file. Aborting.")
+
+        self.password = password[0] if type(password) == tuple else password
+
+        self._indices = {}
+        self._shards = {}
+        self._submissions = {}
+        self._content = {}
+
+    def get_submission(self, venue, sid):
+        """
+        Returns the submission and its reviews.
+
+        :param venue: the venue name
+        :param sid: the anonymized submission ID
+        :return: pair of the submission and a dict of review IDs to reviews
+        """
+        prefix = escape_venue_file_name(venue) + "_"
+
+        review_data = self._review_data(prefix, [sid])
+        if sid not in review_data:
+            raise KeyError("Submission %s is not contained in venue %s" % (sid, venue))
+
+        reviews = {r["id"]: Review(r, r["id"], r["tauthor"]) for r in review_data[sid]}
+
+        return self._submission(prefix, sid), reviews
+
+    def get_reviewer(self, venue, rid):
+        """
+        Returns the submissions reviewed by the reviewer along with their reviews.
+
+        :param venue: the venue name
+        :param rid: the anonymized reviewer ID
+        :return: pair of the list of submissions and a dict of submission IDs to dicts of review IDs to reviews
+        """
+        prefix = escape_venue_file_name(venue) + "_"
+
+        index = self._index(prefix)
+        if index is not None:
+            if rid not in index["reviewers"]:
+                raise KeyError("Reviewer %s is not contained in venue %s" % (rid, venue))
+            sids = index["reviewers"][rid]
+        else:
+            sids = self._review_data(prefix, None).keys()
+
+        review_data = self._review_data(prefix, sids)
+
+        subs, reviews = [], {}
+        for sid in sids:
+            revs = {r["id"]: Review(r, r["id"], r["tauthor"]) for r in review_data[sid] if r["tauthor"] == rid}
+            if len(revs) > 0:
+                subs += [self._submission(prefix, sid)]
+                reviews[sid] = revs
+
+        if len(reviews) == 0:
+            raise KeyError("Reviewer %s is not contained in venue %s" % (rid, venue))
+
+        return subs, reviews
+
+    def _index(self, prefix):
+        if prefix not in self._indices:
+            self._indices[prefix] = load_review_index_securely(self.path, prefix, self.password)
+
+        return self._indices[prefix]
+
+    def _review_data(self, prefix, sids):
+        """
+        Returns the review data covering at least the given submissions (all, if None).
+        """
+        index = self._index(prefix)
+        shards = self._shards.setdefault(prefix, {})
+
+        if index is None:
+            if None not in shards:
+                shards[None] = load_review_data_securely(self.path, prefix, self.password, self._content)
+            return shards[None]
+
+        if sids is None:
+            needed = set(range(index["num_shards"]))
+        else:
+            needed = set(index["submissions"][sid] for sid in sids if sid in index["submissions"])
+
+        missing = needed - set(shards)
+        for shard in missing:
+            shards[shard] = load_review_shards_securely(self.path, prefix, [shard], self.password, self._content)
+
+        review_data = {}
+        for shard in needed:
+            review_data.update(shards[shard])
+
+        return review_data
+
+    def _submission(self, prefix, sid):
+        if prefix not in self._submissions:
+            with io.BytesIO() as stream0:
+                load_files_securely([prefix + "sub_data.json"], [stream0], self.path, self.password)
+                self._submissions[prefix] = json.load(stream0)
+
+        submissions = self._submissions[prefix]
+
+        return Submission(submissions[sid], sid) if sid in submissions else Submission({}, sid)
 
 
 class Review:
@@ -134,8 +453,16 @@ class PerReviewerIndex:
         self.index = {}
         for sid, revs in self.reviews.items():
             for rid, r in revs.items():
-                reviewer = r.reviewer
-                self.index[reviewer] = self.index.get(reviewer, []) + [(sid, r.rid)]
+                self.add(sid, r)
+
+    def add(self, sid, review):
+        """
+        Registers a review that was added to the underlying reviews.
+
+        :param sid: the submission ID of the review
+        :param review: the Review
+        """
+        self.index.setdefault(review.reviewer, []).append((sid, review.rid))
 
     def __getitem__(self, item):  # item == reviewer id
         reviewed_ids = self.index[item]
@@ -192,7 +519,7 @@ class VenueDataset:
     This object can be merged with other VenueDatasets using <<, where the left operands
     (this objects) reviews are kept in the case of collisions.
     """
-    def __init__(self, submissions: dict, reviews: dict, desc: dict):
+    def __init__(self, submissions: dict, reviews: dict, desc: dict, licenses=None):
         self.submissions = submissions
         self.reviews = reviews
 
@@ -200,43 +527,291 @@ class VenueDataset:
         self.per_reviewer = PerReviewerIndex(self.submissions, self.reviews)
 
         self.desc = desc
+        self.licenses = licenses
 
-    def __lshift__(self, other):
-        new_submissions = copy.deepcopy(self.submissions)
-        new_reviews = copy.deepcopy(self.reviews)
-        new_desc = copy.deepcopy(self.desc)
+        self._features = None
+
+    def license_of(self, review):
+        """
+        Looks up the license of a review by its ID or, if no license lists the review, by its reviewer; see
+        licenses.LicenseIndex. Requires the licenses, e.g. via load_vault_data(licenses=True).
+
+        :param review: the Review
+        :return: the license record or None, if there is none
+        """
+        licenses = getattr(self, "licenses", None)
+        if licenses is None:
+            raise ValueError("No licenses loaded for this venue.")
+
+        record = licenses.of_review(review.rid)
+        return record if record is not None else licenses.of_reviewer(review.reviewer)
+
+    def features(self, refresh=False):
+        """
+        The per-review feature table of this venue: field presence, character and token lengths of the text
+        fields and parsed score fields, with one row per review in the iteration order of self.reviews; see
+        features.extract_features. Computed on first access (or loaded from the feature_dir passed to
+        load_vault_data) and dropped on merges. Use .to_numpy() for a plain array.
+
+        :param refresh: recompute the table, e.g. after altering reviews directly
+        :return: pandas DataFrame indexed by (sid, rid)
+        """
+        if refresh or getattr(self, "_features", None) is None:
+            from yyy.features import extract_features
+
+            self._features = extract_features(self)
+
+        return self._features
+
+    def query(self):
+        """
+        Starts a lazy query over the reviews of this venue; see query.Query.
+
+        :return: the Query
+        """
+        return Query.of(self)
+
+    def split(self, splits, salt="", unit="submission"):
+        """
+        Splits the reviews of this venue by a salted hash of their submission, reviewer or review ID; see
+        splits.HashSplitter. The splits share the Submission and Review objects with this dataset.
+
+        :param splits: dict of split names to their shares, e.g. {"train": 0.8, "dev": 0.1, "test": 0.1}
+        :param salt: the salt of the hash
+        :param unit: "submission", "reviewer" or "review"
+        :return: dict of split names to VenueDatasets
+        """
+        from yyy.splits import HashSplitter
+
+        return HashSplitter(splits, salt, unit).materialize(self)
+
+    def memory_report(self):
+        """
+        Breaks down the memory of this venue by content field and index structure; see memory.memory_report.
+
+        :return: pandas DataFrame with the columns venue, category, name and bytes
+        """
+        from yyy.memory import memory_report
+
+        return memory_report(self)
+
+    def incidence_matrix(self, weight=None, format="csr"):
+        """
+        Exports the sparse reviewer x submission matrix of this venue; see incidence.incidence_matrix.
+
+        :param weight: None for a binary matrix, the name of a score field or a function mapping reviews to weights
+        :param format: "csr" or "coo"
+        :return: triple of the matrix, the reviewer IDs of the rows and the submission IDs of the columns
+        """
+        from yyy.incidence import incidence_matrix
 
-        # to update description
+        return incidence_matrix(self, weight, format)
+
+    def __lshift__(self, other):
+        return self.merge(other)
+
+    def __ilshift__(self, other):
+        """
+        Merges the other dataset into this one in place, keeping this dataset's data on collisions. The
+        indices are updated incrementally instead of being rebuilt.
+        """
+        self._merge_described(other)
+
+        return self
+
+    def merge(self, other, near_duplicates=False):
+        """
+        Merges this dataset with another one like <<, keeping this dataset's data on collisions. Optionally,
+        reviews of the other dataset that are near-duplicates of reviews in this one (e.g. due to
+        resubmissions) are listed in the descriptor under "near_duplicate_reviews".
+
+        :param other: the VenueDataset to merge into a copy of this one
+        :param near_duplicates: True or a dict of dedup.NearDuplicateDetector parameters to annotate near-duplicates
+        :return: the merged VenueDataset
+        """
+        res = VenueDataset(copy.deepcopy(self.submissions), copy.deepcopy(self.reviews), copy.deepcopy(self.desc),
+                           getattr(self, "licenses", None))
+        res <<= other
+
+        if near_duplicates:
+            res.desc["near_duplicate_reviews"] = self._near_duplicates(other, near_duplicates)
+
+        return res
+
+    @staticmethod
+    def merge_all(datasets):
+        """
+        Merges a sequence of datasets, e.g. incremental snapshots of the same venue, in a single pass. Like
+        a << b << c, earlier datasets win on collisions, but the descriptor lists the conflicting and
+        overlapping submissions and reviews of all merges instead of only the last one.
+
+        :param datasets: list of VenueDatasets; none of them is altered
+        :return: the merged VenueDataset
+        """
+        if len(datasets) == 0:
+            raise ValueError("Need at least one dataset to merge.")
+
+        first = datasets[0]
+        res = VenueDataset(copy.deepcopy(first.submissions), copy.deepcopy(first.reviews), copy.deepcopy(first.desc),
+                           getattr(first, "licenses", None))
+
+        sub_conflicting, sub_overlap, rev_overlap = [], [], []
+        for other in datasets[1:]:
+            conflicting, overlap, overlap_revs, _ = res._merge_into(other)
+            sub_conflicting += conflicting
+            sub_overlap += overlap
+            rev_overlap += overlap_revs
+
+            res.desc.update(other.desc)
+
+        res.desc["conflicting_submissions"] = sub_conflicting
+        res.desc["overlapping_submissions"] = sub_overlap
+        res.desc["overlapping_reviews"] = rev_overlap
+
+        return res
+
+    def _merge_described(self, other):
+        """
+        Merges the other dataset into this one in place and describes the merge like << does.
+
+        :param other: the VenueDataset to merge
+        :return: the added (sid, Review) pairs
+        """
+        sub_conflicting, sub_overlap, rev_overlap, added = self._merge_into(other)
+
+        self.desc.update(other.desc)
+        self.desc["conflicting_submissions"] = sub_conflicting
+        self.desc["overlapping_submissions"] = sub_overlap
+        self.desc["overlapping_reviews"] = rev_overlap
+
+        return added
+
+    def _merge_into(self, other):
+        """
+        Adds the submissions and reviews of the other dataset missing in this one and registers the added
+        reviews in the per-reviewer index. The descriptor is left untouched.
+
+        :param other: the VenueDataset to merge
+        :return: the conflicting and overlapping submission IDs, the overlapping review IDs and the added
+                 (sid, Review) pairs
+        """
         sub_conflicting = []
         sub_overlap = []
         rev_overlap = []
+        added = []
+
+        self._features = None
+
+        if getattr(other, "licenses", None) is not None:
+            own = getattr(self, "licenses", None)
+            self.licenses = other.licenses if own is None else own.merge(other.licenses)
 
         for sid, sub in other.submissions.items():
-            if sid not in new_submissions:
-                new_submissions[sid] = sub
-            elif sid in new_submissions and sub != new_submissions[sid]:
-                logging.warning("Merging two datasets with differing submissions. Will keep left OPs data.")
+            if sid not in self.submissions:
+                self.submissions[sid] = sub
+            elif sub != self.submissions[sid]:
                 sub_conflicting += [sid]
-            elif sid in new_submissions:  # submissions covered by both datasets
+            else:  # submissions covered by both datasets
                 sub_overlap += [sid]
 
         for sid, reviews in other.reviews.items():
-            if sid not in new_reviews:
-                new_reviews[sid] = {}
+            if sid not in self.reviews:
+                self.reviews[sid] = {}
 
-            for r in reviews:
-                if r in new_reviews[sid]:
-                    logging.warning("Merging two datasets with conflicting reviews. Will keep left OPs data.")
+            own = self.reviews[sid]
+            for r, review in reviews.items():
+                if r in own:
                     rev_overlap += [r]
                 else:
-                    new_reviews[sid][r] = reviews[r]
+                    own[r] = review
+                    self.per_reviewer.add(sid, review)
+                    added += [(sid, review)]
+
+        if len(sub_conflicting) > 0:
+            logging.warning("Merging two datasets with %d differing submissions. Will keep left OPs data."
+                            % len(sub_conflicting))
+        if len(rev_overlap) > 0:
+            logging.warning("Merging two datasets with %d conflicting reviews. Will keep left OPs data."
+                            % len(rev_overlap))
+
+        return sub_conflicting, sub_overlap, rev_overlap, added
+
+    def _near_duplicates(self, other, params):
+        """
+        Finds the near-duplicates between the reviews of this and the other dataset.
+
+        :return: list of (rid of this dataset, rid of the other dataset, estimated similarity) triples
+        """
+        from yyy.dedup import NearDuplicateDetector
+
+        detector = NearDuplicateDetector(**(params if type(params) == dict else {}))
+        for side, dataset in [(0, self), (1, other)]:
+            for sid, revs in dataset.reviews.items():
+                for rid, review in revs.items():
+                    detector.add((side, rid), review)
+
+        return [(k1[1], k2[1], sim) if k1[0] == 0 else (k2[1], k1[1], sim)
+                for k1, k2, sim in detector.pairs() if k1[0] != k2[0] and k1[1] != k2[1]]
+
 
-        new_desc.update(other.desc)
-        new_desc["conflicting_submissions"] = sub_conflicting
-        new_desc["overlapping_submissions"] = sub_overlap
-        new_desc["overlapping_reviews"] = rev_overlap
+class GlobalReviewerIndex:
+    """
+    Maps reviewers to all their reviews across the venues of a MultiVenueDataset as (venue, sid, rid)
+    triples. It is maintained incrementally when venues are added, replaced or removed through the
+    MultiVenueDataset; changes made directly to a contained VenueDataset require calling update_venue.
+    """
+    def __init__(self, venues):
+        self.index = {}
+        self.venue_reviewers = {}
+
+        for key, dataset in venues.items():
+            self.add_venue(key, dataset)
 
-        return VenueDataset(new_submissions, new_reviews, new_desc)
+    def add_venue(self, key, dataset):
+        reviewers = set()
+        for reviewer, reviewed_ids in dataset.per_reviewer.index.items():
+            entries = self.index.setdefault(reviewer, [])
+            entries.extend((key, sid, rid) for sid, rid in reviewed_ids)
+            reviewers.add(reviewer)
+
+        self.venue_reviewers[key] = reviewers
+
+    def remove_venue(self, key):
+        for reviewer in self.venue_reviewers.pop(key, set()):
+            entries = [e for e in self.index[reviewer] if e[0] != key]
+            if len(entries) > 0:
+                self.index[reviewer] = entries
+            else:
+                del self.index[reviewer]
+
+    def update_venue(self, key, dataset):
+        self.remove_venue(key)
+        self.add_venue(key, dataset)
+
+    def add_reviews(self, key, added):
+        """
+        Registers reviews that were added to a contained venue, e.g. by an in-place merge.
+
+        :param key: the venue name
+        :param added: list of (sid, Review) pairs
+        """
+        reviewers = self.venue_reviewers.setdefault(key, set())
+        for sid, review in added:
+            self.index.setdefault(review.reviewer, []).append((key, sid, review.rid))
+            reviewers.add(review.reviewer)
+
+    def __getitem__(self, item):  # item == reviewer id
+        return self.index[item]
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def __iter__(self):
+        for reviewer_id in self.index:
+            yield reviewer_id
+
+    def __len__(self):
+        return len(self.index)
 
 
 class MultiVenueDataset:
@@ -254,30 +829,158 @@ class MultiVenueDataset:
         else:
             raise ValueError("Passed venue object is of type %s. Expected list or dict." % str(type(venues)))
 
+        self._reviewer_index = None
+
+    @property
+    def reviewer_index(self):
+        """
+        The GlobalReviewerIndex of all venues, built on first access.
+        """
+        if self._reviewer_index is None:
+            self._reviewer_index = GlobalReviewerIndex(self.venues)
+
+        return self._reviewer_index
+
+    def reviews_of(self, reviewer):
+        """
+        Returns all reviews of a reviewer across venues.
+
+        :param reviewer: the reviewer ID
+        :return: list of (venue, sid, Review) triples
+        """
+        return [(v, sid, self.venues[v].reviews[sid][rid]) for v, sid, rid in self.reviewer_index[reviewer]]
+
     def __getitem__(self, item):
         return self.venues[item]
 
     def __delitem__(self, key):
         del self.venues[key]
 
+        if self._reviewer_index is not None:
+            self._reviewer_index.remove_venue(key)
+
     def __setitem__(self, key, value):
         self.venues[key] = value
 
+        if self._reviewer_index is not None:
+            self._reviewer_index.update_venue(key, value)
+
     def __iter__(self):
         for c in self.venues:
             yield c
 
+    def query(self):
+        """
+        Starts a lazy query over the reviews of all venues; see query.Query.
+
+        :return: the Query
+        """
+        return Query.of(self)
+
+    def split(self, splits, salt="", unit="submission"):
+        """
+        Splits the reviews of all venues by a salted hash of their submission, reviewer or review ID; see
+        splits.HashSplitter. The splits share the Submission and Review objects with this dataset.
+
+        :param splits: dict of split names to their shares, e.g. {"train": 0.8, "dev": 0.1, "test": 0.1}
+        :param salt: the salt of the hash
+        :param unit: "submission", "reviewer" or "review"
+        :return: dict of split names to MultiVenueDatasets
+        """
+        from yyy.splits import HashSplitter
+
+        return HashSplitter(splits, salt, unit).materialize(self)
+
+    def features(self, refresh=False):
+        """
+        The per-review feature tables of all venues; see VenueDataset.features.
+
+        :param refresh: recompute the tables
+        :return: pandas DataFrame indexed by (venue, sid, rid)
+        """
+        import pandas
+
+        return pandas.concat({v: self.venues[v].features(refresh) for v in self.venues}, names=["venue"])
+
+    def memory_report(self):
+        """
+        Breaks down the memory of all venues by venue, content field and index structure; see
+        memory.memory_report.
+
+        :return: pandas DataFrame with the columns venue, category, name and bytes
+        """
+        from yyy.memory import memory_report
+
+        return memory_report(self)
+
+    def incidence_matrix(self, weight=None, format="csr"):
+        """
+        Exports the sparse reviewer x submission matrix of all venues with (venue, sid) pairs as columns;
+        see incidence.incidence_matrix.
+
+        :param weight: None for a binary matrix, the name of a score field or a function mapping reviews to weights
+        :param format: "csr" or "coo"
+        :return: triple of the matrix, the reviewer IDs of the rows and the (venue, sid) pairs of the columns
+        """
+        from yyy.incidence import incidence_matrix
+
+        return incidence_matrix(self, weight, format)
+
     def __lshift__(self, other):
-        new_venues = {}
-        for k, v in self.venues.items():
+        res = MultiVenueDataset({k: copy.deepcopy(v) for k, v in self.venues.items()})
+        res <<= other
+
+        return res
+
+    def __ilshift__(self, other):
+        """
+        Merges the venues of the other dataset into this one in place; see VenueDataset.__ilshift__. The reviewer
+        index is updated incrementally, if it was built already.
+        """
+        for k, v in other.venues.items():
             new_v = copy.deepcopy(v)
-            new_venues[k] = new_v
+
+            if k in self.venues:
+                added = self.venues[k]._merge_described(new_v)
+
+                if self._reviewer_index is not None:
+                    self._reviewer_index.add_reviews(k, added)
+            else:
+                self[k] = new_v
+
+        return self
+
+    @staticmethod
+    def merge_all(datasets):
+        """
+        Merges a sequence of MultiVenueDatasets venue by venue in a single pass; see VenueDataset.merge_all.
+
+        :param datasets: list of MultiVenueDatasets; none of them is altered
+        :return: the merged MultiVenueDataset
+        """
+        per_venue = {}
+        for d in datasets:
+            for k, v in d.venues.items():
+                per_venue.setdefault(k, []).append(v)
+
+        return MultiVenueDataset({k: VenueDataset.merge_all(vs) for k, vs in per_venue.items()})
+
+    def merge(self, other, near_duplicates=False):
+        """
+        Merges this dataset with another one like <<, optionally annotating near-duplicate reviews of each
+        merged venue; see VenueDataset.merge.
+
+        :param other: the MultiVenueDataset to merge into a copy of this one
+        :param near_duplicates: True or a dict of dedup.NearDuplicateDetector parameters to annotate near-duplicates
+        :return: the merged MultiVenueDataset
+        """
+        new_venues = {k: copy.deepcopy(v) for k, v in self.venues.items()}
 
         for k, v in other.venues.items():
             new_v = copy.deepcopy(v)
 
             if k in new_venues:
-                new_venues[k] <<= new_v
+                new_venues[k] = new_venues[k].merge(new_v, near_duplicates)
             else:
                 new_venues[k] = new_v
 
@@ -0,0 +1,194 @@
+import zlib
+
+import numpy
+
+from yyy.search import IGNORED_FIELDS, tokenize
+
+_PRIME = 4294967311  # smallest prime above 2^32
+
+
+def shingles(review, size=5, fields=None):
+    """
+    Returns the word shingles of the text fields of a review.
+
+    :param review: the Review
+    :param size: the number of words per shingle
+    :param fields: optionally, the fields to consider; defaults to all text fields except identifiers
+    :return: set of shingles
+    """
+    res = set()
+    for field in review:
+        if (fields is not None and field not in fields) or (fields is None and field in IGNORED_FIELDS):
+            continue
+        if type(review[field]) != str:
+            continue
+
+        tokens = tokenize(review[field])
+        res.update(" ".join(tokens[i:i + size]) for i in range(max(len(tokens) - size + 1, 1)))
+
+    res.discard("")
+    return res
+
+
+class NearDuplicateDetector:
+    """
+    Finds near-duplicate reviews with MinHash signatures of their word shingles and locality-sensitive hashing:
+    the signatures are split into bands and reviews sharing a band are candidates, which are confirmed if their
+    estimated Jaccard similarity reaches the threshold. Keys of the added reviews are arbitrary, e.g.
+    (venue, sid, rid) triples. Reviews without shingles (e.g. empty ones or ones shorter than a shingle) share
+    no text to compare; they are not bucketed, never reported as near-duplicates and listed in empty instead.
+    """
+    def __init__(self, threshold=0.8, num_perm=128, bands=16, shingle_size=5, fields=None, seed=0):
+        if num_perm % bands != 0:
+            raise ValueError("The number of permutations needs to be divisible by the number of bands.")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.fields = fields
+
+        rng = numpy.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 32, size=num_perm, dtype=numpy.uint64)
+        self._b = rng.randint(0, 2 ** 32, size=num_perm, dtype=numpy.uint64)
+
+        self.keys = []
+        self.signatures = []
+        self.buckets = [{} for _ in range(bands)]
+        self.empty = set()
+
+    def signature(self, review):
+        """
+        Computes the MinHash signature of a review.
+
+        :param review: the Review
+        :return: numpy array of num_perm hash values; all _PRIME (which no hash value reaches) without shingles
+        """
+        hashes = numpy.array([zlib.crc32(s.encode("utf-8")) for s in
+                              shingles(review, self.shingle_size, self.fields)], dtype=numpy.uint64)
+        if len(hashes) == 0:
+            return numpy.full(self.num_perm, _PRIME, dtype=numpy.uint64)
+
+        return ((numpy.outer(self._a, hashes) + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def add(self, key, review):
+        """
+        Adds a review to the detector.
+
+        :param key: the key identifying the review
+        :param review: the Review
+        :return: the number of the added item
+        """
+        item = len(self.keys)
+        sig = self.signature(review)
+
+        self.keys += [key]
+        self.signatures += [sig]
+
+        if sig[0] == _PRIME:
+            self.empty.add(item)
+            return item
+
+        rows = self.num_perm // self.bands
+        for band, buckets in enumerate(self.buckets):
+            buckets.setdefault(sig[band * rows:(band + 1) * rows].tobytes(), []).append(item)
+
+        return item
+
+    def add_venue(self, venue, dataset):
+        """
+        Adds all reviews of a VenueDataset with (venue, sid, rid) keys.
+        """
+        for sid, revs in dataset.reviews.items():
+            for rid, review in revs.items():
+                self.add((venue, sid, rid), review)
+
+    def candidates(self, item):
+        """
+        :return: the items sharing at least one band with the given item
+        """
+        if item in self.empty:
+            return set()
+
+        rows = self.num_perm // self.bands
+        sig = self.signatures[item]
+
+        res = set()
+        for band, buckets in enumerate(self.buckets):
+            res.update(buckets[sig[band * rows:(band + 1) * rows].tobytes()])
+
+        res.discard(item)
+        return res
+
+    def similarity(self, i, j):
+        """
+        :return: the Jaccard similarity of two items estimated from their signatures; 0 if one has no shingles
+        """
+        if i in self.empty or j in self.empty:
+            return 0.0
+
+        return float(numpy.mean(self.signatures[i] == self.signatures[j]))
+
+    def pairs(self):
+        """
+        Finds all pairs of near-duplicates. Reviews without shingles are never paired.
+
+        :return: list of (key, key, similarity) triples
+        """
+        seen = set()
+        res = []
+        for buckets in self.buckets:
+            for items in buckets.values():
+                for x in range(len(items)):
+                    for y in range(x + 1, len(items)):
+                        i, j = items[x], items[y]
+                        if (i, j) in seen or i in self.empty or j in self.empty:
+                            continue
+                        seen.add((i, j))
+
+                        sim = self.similarity(i, j)
+                        if sim >= self.threshold:
+                            res += [(self.keys[i], self.keys[j], sim)]
+
+        return res
+
+    def clusters(self):
+        """
+        Groups near-duplicates into clusters (connected components of the near-duplicate pairs).
+
+        :return: list of lists of keys, each with at least two elements
+        """
+        item_of = {k: i for i, k in enumerate(self.keys)}
+        parent = list(range(len(self.keys)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for k1, k2, _ in self.pairs():
+            r1, r2 = find(item_of[k1]), find(item_of[k2])
+            if r1 != r2:
+                parent[r2] = r1
+
+        groups = {}
+        for i, k in enumerate(self.keys):
+            groups.setdefault(find(i), []).append(k)
+
+        return [g for g in groups.values() if len(g) > 1]
+
+
+def near_duplicate_clusters(multi_dataset, **kwargs):
+    """
+    Finds clusters of near-duplicate reviews within and across the venues of a MultiVenueDataset.
+
+    :param multi_dataset: the MultiVenueDataset
+    :param kwargs: parameters of the NearDuplicateDetector
+    :return: list of clusters, each a list of (venue, sid, rid) triples
+    """
+    detector = NearDuplicateDetector(**kwargs)
+    for v in multi_dataset:
+        detector.add_venue(v, multi_dataset[v])
+
+    return detector.clusters()
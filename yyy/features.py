@@ -0,0 +1,137 @@
+import os
+
+import numpy
+import pandas
+
+from yyy.incidence import parse_score
+
+# bump whenever the extracted features change, so cached tables are recomputed
+FEATURE_VERSION = 1
+
+
+def _field_values(dataset):
+    """
+    Collects the values of all review fields in one pass.
+
+    :return: pair of the (sid, rid) keys of all reviews in iteration order and a dict of field names to lists
+             of (row, value) pairs of the reviews having the field
+    """
+    keys, fields = [], {}
+    for sid, revs in dataset.reviews.items():
+        for rid, review in revs.items():
+            row = len(keys)
+            keys += [(sid, rid)]
+            for field, value in review.content.items():
+                if value is not None:
+                    fields.setdefault(field, []).append((row, value))
+
+    return keys, fields
+
+
+def _token_counts(values):
+    """
+    Counts the whitespace-separated tokens of many strings at once on their concatenated UTF-8 bytes: a token
+    starts at every byte above the ASCII space following a byte up to the space. Hence ASCII whitespace and
+    control characters separate tokens, other Unicode whitespace does not.
+
+    :param values: list of strings
+    :return: int32 array of token counts
+    """
+    encoded = [v.encode("utf-8") for v in values]
+    # every string is followed by a separator, so no segment is empty and tokens never span two strings
+    data = numpy.frombuffer(b" ".join(encoded) + b" ", dtype=numpy.uint8)
+
+    space = data <= 32
+    starts = numpy.empty_like(space)
+    starts[0] = not space[0]
+    numpy.greater(space[:-1], space[1:], out=starts[1:])
+
+    offsets = numpy.zeros(len(encoded), dtype=numpy.int64)
+    numpy.cumsum(numpy.fromiter(map(len, encoded), dtype=numpy.int64, count=len(encoded))[:-1] + 1,
+                 out=offsets[1:])
+
+    return numpy.add.reduceat(starts, offsets, dtype=numpy.int32) if len(encoded) > 0 else \
+        numpy.zeros(0, dtype=numpy.int32)
+
+
+def extract_features(dataset):
+    """
+    Computes the feature table of a VenueDataset: one row per review in the iteration order of
+    dataset.reviews, indexed by (sid, rid). For every field occurring in the reviews there is a boolean
+    column <field>_present. Fields whose values all parse as numbers (see incidence.parse_score), like
+    "4 = Strong: ...", get a float column <field>_score with NaN for missing fields, all other string fields the
+    int columns <field>_chars and <field>_tokens (whitespace-separated) with 0 for missing fields. Tokens are
+    counted in bulk on the encoded texts of a field instead of splitting every text.
+
+    :param dataset: the VenueDataset
+    :return: pandas DataFrame
+    """
+    keys, fields = _field_values(dataset)
+    n = len(keys)
+
+    columns = {}
+    for field in sorted(fields):
+        rows, values = zip(*fields[field])
+        rows = numpy.array(rows, dtype=numpy.int64)
+
+        present = numpy.zeros(n, dtype=bool)
+        present[rows] = True
+        columns[field + "_present"] = present
+
+        # text fields are recognized by their first value without parsing the others
+        scores = None
+        if not numpy.isnan(parse_score(values[0])):
+            scores = numpy.fromiter(map(parse_score, values), dtype=numpy.float64, count=len(values))
+
+        if scores is not None and not numpy.isnan(scores).any():
+            column = numpy.full(n, numpy.nan)
+            column[rows] = scores
+            columns[field + "_score"] = column
+        elif all(type(v) == str for v in values):
+            chars = numpy.zeros(n, dtype=numpy.int32)
+            chars[rows] = numpy.fromiter(map(len, values), dtype=numpy.int32, count=len(values))
+            tokens = numpy.zeros(n, dtype=numpy.int32)
+            tokens[rows] = _token_counts(values)
+
+            columns[field + "_chars"] = chars
+            columns[field + "_tokens"] = tokens
+
+    index = pandas.MultiIndex.from_tuples(keys, names=["sid", "rid"]) if n > 0 else \
+        pandas.MultiIndex.from_arrays([[], []], names=["sid", "rid"])
+
+    return pandas.DataFrame(columns, index=index)
+
+
+def _table_path(feature_dir, venue):
+    from yyy.collect import escape_venue_file_name
+
+    return feature_dir + os.sep + escape_venue_file_name(str(venue)) + ".features"
+
+
+def load_feature_table(feature_dir, venue, dataset, password, fingerprint):
+    """
+    Returns the feature table of a venue from the feature cache or computes and caches it. Tables are
+    stored encrypted like the snapshots of cache.py and are recomputed as soon as the fingerprint of the
+    source data or the FEATURE_VERSION changes. The fingerprint is not computed from the reviews, which would
+    take a good part of the extraction; see collect.venue_fingerprints for one read from the archive.
+
+    :param feature_dir: the directory of the feature cache, e.g. next to the vault
+    :param venue: the venue name
+    :param dataset: the VenueDataset of the venue
+    :param password: the (data) password, used to derive the key
+    :param fingerprint: a string changing whenever the reviews of the venue change
+    :return: the feature table; see extract_features
+    """
+    from yyy.cache import load_encrypted, store_encrypted
+
+    path = _table_path(feature_dir, venue)
+    meta = {"version": FEATURE_VERSION, "fingerprint": fingerprint}
+
+    table = load_encrypted(path, password, lambda stored: stored == meta)
+    if table is None:
+        table = extract_features(dataset)
+
+        os.makedirs(feature_dir, exist_ok=True)
+        store_encrypted(path, password, meta, table)
+
+    return table
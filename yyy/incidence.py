@@ -0,0 +1,82 @@
+import re
+
+import numpy
+from scipy import sparse
+
+_SCORE_PATTERN = re.compile(r"^\s*(-?\d+(?:\.\d+)?)")
+
+
+def parse_score(value):
+    """
+    Parses a score field into a number. Scores are either numbers or strings starting with a number,
+    like "4 = Strong: This study provides sufficient support for all of its claims".
+
+    :param value: the field value
+    :return: the score as float or NaN, if it cannot be parsed
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+
+    match = _SCORE_PATTERN.match(value) if isinstance(value, str) else None
+
+    return float(match.group(1)) if match is not None else numpy.nan
+
+
+def incidence_matrix(dataset, weight=None, format="csr"):
+    """
+    Builds the sparse reviewer x submission incidence matrix of a VenueDataset or MultiVenueDataset.
+    Rows and columns are numbered by the sorted reviewer IDs and submission IDs (for several venues
+    (venue, sid) pairs), so the numbering is stable across loads. Several reviews of the same reviewer
+    for one submission are summed up.
+
+    :param dataset: the VenueDataset or MultiVenueDataset
+    :param weight: None for a binary matrix, the name of a score field or a function mapping reviews to weights;
+                   reviews without a parseable score are weighted NaN
+    :param format: "csr" or "coo"
+    :return: triple of the matrix, the reviewer IDs of the rows and the submission IDs of the columns
+    """
+    venues = dataset.venues if hasattr(dataset, "venues") else {None: dataset}
+    multi = hasattr(dataset, "venues")
+
+    if weight is None:
+        weigh = None
+    elif callable(weight):
+        weigh = weight
+    else:
+        weigh = lambda r: parse_score(r.content.get(weight))
+
+    venue_keys = sorted(venues, key=str)
+
+    reviewers, venue_codes, subs, weights = [], [], [], []
+    for i, v in enumerate(venue_keys):
+        for sid, revs in venues[v].reviews.items():
+            for r in revs.values():
+                reviewers += [r.reviewer]
+                venue_codes += [i]
+                subs += [sid]
+                if weigh is not None:
+                    weights += [weigh(r)]
+
+    reviewer_ids, rows = numpy.unique(numpy.array(reviewers, dtype=object), return_inverse=True)
+    sid_names, sid_codes = numpy.unique(numpy.array(subs, dtype=object), return_inverse=True)
+
+    # number the columns by (venue, sid) pairs
+    stride = max(len(sid_names), 1)
+    pairs, cols = numpy.unique(numpy.array(venue_codes, dtype=numpy.int64) * stride + sid_codes,
+                               return_inverse=True)
+    if multi:
+        sub_ids = [(venue_keys[p // stride], sid_names[p % stride]) for p in pairs]
+    else:
+        sub_ids = [sid_names[p] for p in pairs]
+
+    data = numpy.ones(len(rows)) if weigh is None else numpy.array(weights, dtype=float)
+    matrix = sparse.coo_matrix((data, (rows, cols)), shape=(len(reviewer_ids), len(sub_ids)))
+
+    if format == "csr":
+        matrix = matrix.tocsr()
+    elif format == "coo":
+        matrix.sum_duplicates()
+    else:
+        raise ValueError("Unsupported format %s. Expected csr or coo." % format)
+
+    return matrix, list(reviewer_ids), sub_ids
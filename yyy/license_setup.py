@@ -1,11 +1,13 @@
 import argparse
 import datetime
 import json
+import os
+import time
 
 from yyy import or_api
 
 
-def setup_license_agreement_task_authors(api, venue_id, task_config, submission_ids=None):
+def setup_license_agreement_task_authors(api, venue_id, task_config, submission_ids=None, skip_existing=False):
     """
     Sets up the license task for authors on the OpenReview.net server
 
@@ -13,7 +15,8 @@ def setup_license_agreement_task_authors(api, venue_id, task_config, submission_
     :param venue_id: the venue id, for which you want to setup the license
     :param task_config: the configuration of the task as a dict incl. e.g. start date,...
     :param submission_ids: optionally list of submission OR ids
-    :return: None
+    :param skip_existing: True, if papers that already have a license task should be skipped
+    :return: dict of the ids of the created and the skipped invitations
     """
     if api is None:
         # OR API
@@ -31,23 +34,34 @@ def setup_license_agreement_task_authors(api, venue_id, task_config, submission_
     if submission_ids is not None:
         submissions = [bs for bs in submissions if bs.id in submission_ids]
 
-    api.author_agreement_task(venue_id,
-                              submissions=submissions,
-                              task_name="License_Agreement",
-                              task=form,
-                              start_date=aut_task_start,
-                              due_date=aut_task_due,
-                              exp_date=aut_task_exp)
+    skipped = []
+    if skip_existing:
+        existing = api.existing_invitations(venue_id + "/Paper.*/-/License_Agreement")
+        inv_ids = {bs.id: venue_id + "/Paper%d/-/License_Agreement" % bs.number for bs in submissions}
 
+        skipped = [inv_ids[bs.id] for bs in submissions if inv_ids[bs.id] in existing]
+        submissions = [bs for bs in submissions if inv_ids[bs.id] not in existing]
 
-def setup_license_agreement_task_reviewers(api, venue_id, task_config):
+    invs = api.author_agreement_task(venue_id,
+                                     submissions=submissions,
+                                     task_name="License_Agreement",
+                                     task=form,
+                                     start_date=aut_task_start,
+                                     due_date=aut_task_due,
+                                     exp_date=aut_task_exp)
+
+    return {"created": [inv.id for inv in invs], "skipped": skipped}
+
+
+def setup_license_agreement_task_reviewers(api, venue_id, task_config, skip_existing=False):
     """
     Sets up the license task for reviewers.
 
     :param api: OR api object to be used, make sure you have PC rights for the given venue
     :param venue_id: the venue id, for which you want to setup the license
     :param task_config: the configuration of the task as a dict incl. e.g. start date,...
-    :return: None
+    :param skip_existing: True, if nothing should be done if the registration task already exists
+    :return: dict of the ids of the created and the skipped invitations
     """
     if api is None:
         # OR API
@@ -63,13 +77,132 @@ def setup_license_agreement_task_reviewers(api, venue_id, task_config):
     instructions = task_config["instructions"]
     form = task_config["license_form"]
 
-    api.set_reviewer_task(venue_id,
-                          title=title,
-                          instructions=instructions,
-                          task=form,
-                          start_date=rev_task_start,
-                          due_date=rev_task_due,
-                          exp_date=rev_task_exp)
+    registration_id = venue_id + "/Reviewers/-/Registration"
+    if skip_existing and registration_id in api.existing_invitations(registration_id):
+        return {"created": [], "skipped": [registration_id]}
+
+    inv = api.reviewer_agreement_task(venue_id,
+                                      title=title,
+                                      instructions=instructions,
+                                      task=form,
+                                      start_date=rev_task_start,
+                                      due_date=rev_task_due,
+                                      exp_date=rev_task_exp)
+
+    return {"created": [inv.id], "skipped": []}
+
+
+def load_manifest(path):
+    """
+    Loads a manifest of license tasks to set up for several venues. The manifest is a JSON file with a list of
+    "tasks", each giving the "venue", the "role" (Reviewers or Authors), the "license_file", the "start_date",
+    "due_date" and "expiry_date" (%Y-%m-%dT%H:%M:%SAOE) and for reviewers the "title" and "instructions".
+    Authors tasks may give a "submissions_file". Fields shared by all tasks can be given once under "defaults".
+    Relative paths are resolved against the directory of the manifest; each file and date is parsed once.
+
+    :param path: path to the manifest
+    :return: list of (venue id, role, task config, submission ids) tuples
+    """
+    with open(path, "r") as file:
+        manifest = json.load(file)
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    parsed = {}
+
+    def cached(kind, value, parse):
+        if (kind, value) not in parsed:
+            parsed[(kind, value)] = parse(value)
+        return parsed[(kind, value)]
+
+    def read_json(file_path):
+        with open(os.path.join(base_dir, file_path), "r") as file:
+            return json.load(file)
+
+    def read_lines(file_path):
+        with open(os.path.join(base_dir, file_path), "r") as file:
+            return [l.strip() for l in file.readlines()]
+
+    tasks = []
+    for entry in manifest["tasks"]:
+        entry = dict(manifest.get("defaults", {}), **entry)
+
+        for f in ["venue", "role", "license_file", "start_date", "due_date", "expiry_date"]:
+            assert f in entry, f"{f} is missing in a task of the manifest. This field is mandatory"
+        assert entry["role"] in ["Reviewers", "Authors"], f"Unknown role {entry['role']} in the manifest"
+
+        task_config = _task_config(cached("license", entry["license_file"], read_json),
+                                   cached("date", entry["start_date"], _parse_date),
+                                   cached("date", entry["due_date"], _parse_date),
+                                   cached("date", entry["expiry_date"], _parse_date),
+                                   entry.get("title"),
+                                   entry.get("instructions"))
+
+        submissions = None
+        if entry["role"] == "Authors" and entry.get("submissions_file"):
+            submissions = cached("submissions", entry["submissions_file"], read_lines)
+
+        tasks += [(entry["venue"], entry["role"], task_config, submissions)]
+
+    return tasks
+
+
+def setup_license_tasks_batch(api, tasks, workers=4, skip_existing=True):
+    """
+    Sets up the license tasks of several venues with one shared, logged in client. At most workers tasks are set
+    up concurrently; a failing task does not stop the others.
+
+    :param api: OR api object to be used, make sure you have PC rights for all given venues
+    :param tasks: list of (venue id, role, task config, submission ids) tuples, e.g. from load_manifest
+    :param workers: the maximum number of tasks set up at the same time
+    :param skip_existing: True, if invitations that already exist should be skipped
+    :return: list of per-task result dicts with the venue, role, created and skipped invitations, seconds and error
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def run(task):
+        venue_id, role, task_config, submissions = task
+        result = {"venue": venue_id, "role": role, "created": [], "skipped": [], "error": None}
+
+        start = time.perf_counter()
+        try:
+            if role == "Reviewers":
+                result.update(setup_license_agreement_task_reviewers(api, venue_id, task_config, skip_existing))
+            else:
+                result.update(setup_license_agreement_task_authors(api, venue_id, task_config, submissions,
+                                                                   skip_existing))
+        except Exception as e:
+            result["error"] = "%s: %s" % (type(e).__name__, str(e))
+        result["seconds"] = time.perf_counter() - start
+
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run, tasks))
+
+
+def _task_config(license_form, start, due, expiry, title=None, instructions=None):
+    """
+    Creates the configuration of a license task and checks the dates.
+
+    :return: the task config dict
+    """
+    task_config = {
+        "start": start,
+        "due": due,
+        "expiry": expiry,
+        "license_form": license_form
+    }
+
+    assert task_config["due"] > task_config["start"], "Due date needs to lie after the start date."
+    assert task_config["expiry"] >= task_config["due"], "Expiry date needs to lie after or at the same time as due date"
+
+    if title and instructions:
+        task_config.update({
+            "title": title,
+            "instructions": instructions
+        })
+
+    return task_config
 
 
 def _parse_date(utc_date_str):
@@ -86,27 +219,38 @@ def _parse_date(utc_date_str):
     return aoe_date
 
 
+def _dump_metrics(api, metrics_file=None):
+    """
+    Prints the per-endpoint request metrics of the run and optionally stores them.
+    """
+    print(api.transport.metrics.report())
+    if metrics_file:
+        with open(metrics_file, "w") as file:
+            json.dump(api.transport.metrics.to_dict(), file, indent=2)
+
+
 def main():
-    parser = argparse.ArgumentParser(description='Setup the license tasks for reviewers (and authors)')
+    parser = argparse.ArgumentParser(description='Setup the license tasks for reviewers (and authors) of one '
+                                                 'venue or, with --manifest, of several venues')
     parser.add_argument('--venue',
-                        required=True,
+                        required=False,
                         help='name of the venue in OpenReview (the base group id)')
     parser.add_argument('--license_file',
-                        required=True,
+                        required=False,
                         help='path to license file to setup')
     parser.add_argument('--role',
-                        required=True,
+                        required=False,
                         choices=["Reviewers", "Authors"],
                         help='the role for which the license task should be setup')
     parser.add_argument('--start_date',
-                        required=True,
-                        help='start date in format: %Y-%m-%dT%H:%M:%SAOE')
+                        required=False,
+                        help='start date in format: %%Y-%%m-%%dT%%H:%%M:%%SAOE')
     parser.add_argument('--due_date',
-                        required=True,
-                        help='due date in format: %Y-%m-%dT%H:%M:%SAOE')
+                        required=False,
+                        help='due date in format: %%Y-%%m-%%dT%%H:%%M:%%SAOE')
     parser.add_argument('--expiry_date',
-                        required=True,
-                        help='expiry date (after that date no changes possible anymore) in format: %Y-%m-%dT%H:%M:%SAOE')
+                        required=False,
+                        help='expiry date (after that date no changes possible anymore) in format: %%Y-%%m-%%dT%%H:%%M:%%SAOE')
     parser.add_argument('--title',
                         required=False,
                         help='if Reviewers, specify title')
@@ -116,33 +260,66 @@ def main():
     parser.add_argument('--submissions_file',
                         required=False,
                         help='if Authors, you can specify a file with a list of OR paper IDs (one per line)')
+    parser.add_argument('--manifest',
+                        required=False,
+                        help='path to a JSON manifest of tasks for several venues and roles; see load_manifest')
+    parser.add_argument('--workers',
+                        required=False,
+                        type=int,
+                        default=4,
+                        help='with a manifest, the maximum number of tasks set up concurrently')
+    parser.add_argument('--report',
+                        required=False,
+                        help='with a manifest, path to write the per-task results to (JSON)')
+    parser.add_argument('--metrics_file',
+                        required=False,
+                        help='path to store the per-endpoint request metrics of the run in (JSON)')
 
     args = parser.parse_args()
 
+    if args.manifest:
+        tasks = load_manifest(args.manifest)
+        print(f"Setting up {len(tasks)} license tasks from {args.manifest}")
+
+        print("Logging into OpenReview...")
+        api = or_api.OpenReviewAPI()
+        api.login()
+
+        results = setup_license_tasks_batch(api, tasks, workers=args.workers)
+        for r in results:
+            if r["error"] is None:
+                print(f"{r['venue']} {r['role']}: created {len(r['created'])}, skipped {len(r['skipped'])} "
+                      f"in {r['seconds']:.1f}s")
+            else:
+                print(f"{r['venue']} {r['role']}: FAILED after {r['seconds']:.1f}s with {r['error']}")
+
+        if args.report:
+            with open(args.report, "w") as file:
+                json.dump(results, file, indent=2)
+
+        _dump_metrics(api, args.metrics_file)
+        return
+
+    for f in ["venue", "license_file", "role", "start_date", "due_date", "expiry_date"]:
+        if getattr(args, f) is None:
+            parser.error(f"--{f} is required without --manifest")
+
     # create task config
     with open(args.license_file, "r") as file:
         license_form = json.load(file)
 
-    task_config = {
-        "start": _parse_date(args.start_date),
-        "due": _parse_date(args.due_date),
-        "expiry": _parse_date(args.expiry_date),
-        "license_form": license_form
-    }
-
-    assert task_config["due"] > task_config["start"], "Due date needs to lie after the start date."
-    assert task_config["expiry"] >= task_config["due"], "Expiry date needs to lie after or at the same time as due date"
-
-    if args.title and args.instructions:
-        task_config.update({
-            "title": args.title,
-            "instructions": args.instructions
-        })
+    task_config = _task_config(license_form,
+                               _parse_date(args.start_date),
+                               _parse_date(args.due_date),
+                               _parse_date(args.expiry_date),
+                               args.title,
+                               args.instructions)
 
     print(f"Using the following task configuration:{task_config}")
 
     print("Logging into OpenReview...")
-    api = or_api.login()
+    api = or_api.OpenReviewAPI()
+    api.login()
 
     if args.role == "Reviewers":
         assert "title" in task_config and "instructions" in task_config, "Reviewer license task requires title and " \
@@ -163,5 +340,7 @@ def main():
 
         setup_license_agreement_task_authors(api, args.venue, task_config, submissions)
 
+    _dump_metrics(api, args.metrics_file)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,127 @@
+import ast
+import json
+
+# columns of license records holding lists; stringified by the CSV format of earlier collections
+LIST_COLUMNS = ["signature", "writers", "reviews", "review_ids"]
+
+LICENSE_FORMAT_VERSION = 1
+
+
+class LicenseIndex:
+    """
+    The license (agreement) records of a venue along with an index from the anonymized review IDs and reviewer
+    hashes to their records, built once in a single pass. Records are plain dicts with proper lists in the
+    LIST_COLUMNS.
+
+    :param records: list of license records
+    """
+    def __init__(self, records):
+        self.records = records
+        self.by_review, self.by_reviewer = _index(records)
+
+    def of_review(self, rid):
+        """
+        :param rid: the anonymized review ID
+        :return: the license record covering the review or None
+        """
+        i = self.by_review.get(rid)
+        return self.records[i] if i is not None else None
+
+    def of_reviewer(self, reviewer):
+        """
+        :param reviewer: the reviewer hash
+        :return: the license record of the reviewer or None
+        """
+        i = self.by_reviewer.get(reviewer)
+        return self.records[i] if i is not None else None
+
+    def merge(self, other):
+        """
+        Merges the records of another index into a new one; records of this index win on colliding reviews and
+        reviewers.
+
+        :param other: the LicenseIndex to merge
+        :return: the merged LicenseIndex
+        """
+        records = list(self.records)
+        for r in other.records:
+            review_ids = r["review_ids"] if type(r.get("review_ids")) == list else []
+            if not any(rid in self.by_review for rid in review_ids) and r.get("reviewer_hash") not in self.by_reviewer:
+                records += [r]
+
+        return LicenseIndex(records)
+
+    def frame(self):
+        """
+        :return: the records as pandas DataFrame with list-valued columns
+        """
+        import pandas
+
+        return pandas.DataFrame(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        for r in self.records:
+            yield r
+
+
+def _index(records):
+    by_review, by_reviewer = {}, {}
+    for i, r in enumerate(records):
+        # missing values of CSV records are NaN
+        if type(r.get("review_ids")) == list:
+            for rid in r["review_ids"]:
+                by_review.setdefault(rid, i)
+        if type(r.get("reviewer_hash")) == str:
+            by_reviewer.setdefault(r["reviewer_hash"], i)
+
+    return by_review, by_reviewer
+
+
+def encode_licenses(records):
+    """
+    Serializes license records into the typed license format: JSON with the records, whose list columns stay
+    lists (tuples become lists). The index is not stored, since building it takes as long as parsing it.
+
+    :param records: list of license records
+    :return: the encoded bytes
+    """
+    return json.dumps({"version": LICENSE_FORMAT_VERSION, "records": records}).encode()
+
+
+def decode_licenses(stream):
+    """
+    Reads licenses stored in the typed license format.
+
+    :param stream: the buffer holding the file
+    :return: the LicenseIndex
+    """
+    stored = json.load(stream)
+    if stored.get("version") != LICENSE_FORMAT_VERSION:
+        raise ValueError("Unsupported license format version %s." % stored.get("version"))
+
+    return LicenseIndex(stored["records"])
+
+
+def decode_license_csv(stream):
+    """
+    Reads licenses stored as CSV by earlier collections. The stringified lists are parsed back into lists.
+    Records of collections before the anonymized review IDs and reviewer hashes were stored are not indexed.
+
+    :param stream: the buffer holding the file
+    :return: the LicenseIndex
+    """
+    import pandas
+
+    frame = pandas.read_csv(stream)
+    frame = frame.drop(columns=[c for c in frame.columns if c.startswith("Unnamed:")])
+
+    records = frame.to_dict("records")
+    for r in records:
+        for c in LIST_COLUMNS:
+            if type(r.get(c)) == str:
+                r[c] = [list(x) if type(x) == tuple else x for x in ast.literal_eval(r[c])]
+
+    return LicenseIndex(records)
@@ -0,0 +1,245 @@
+import argparse
+import sys
+import time
+import tracemalloc
+from getpass import getpass
+from types import FunctionType, ModuleType
+
+import pandas
+
+CATEGORIES = ["reviews", "content", "submissions", "index", "descriptor", "features", "licenses", "mapped"]
+
+
+def deep_size(obj, seen=None):
+    """
+    Sums up the sizes of an object and all objects reachable from it via containers and attributes. Objects
+    already in seen are skipped and all visited objects are added, so sharing a seen set across calls counts
+    every object once. NumPy and pandas objects report their own (deep) size and are not traversed. Memory-mapped
+    texts are not on the heap and not counted.
+
+    :param obj: the object
+    :param seen: optionally, a set of the IDs of objects counted already
+    :return: the size in bytes
+    """
+    from yyy.textstore import TextStore
+
+    seen = set() if seen is None else seen
+
+    total = 0
+    stack = [obj]
+    while len(stack) > 0:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, (type, ModuleType, FunctionType, TextStore)):
+            continue
+        seen.add(id(o))
+
+        total += sys.getsizeof(o)
+
+        if type(o).__module__.split(".")[0] in ["numpy", "pandas"]:
+            continue
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        else:
+            if hasattr(o, "__dict__"):
+                stack.append(vars(o))
+            for slot in getattr(type(o), "__slots__", ()):
+                if hasattr(o, slot):
+                    stack.append(getattr(o, slot))
+
+    return total
+
+
+def _venue_rows(venue, dataset, seen):
+    """
+    Accounts the memory of one VenueDataset. Objects shared between components are attributed to the first one
+    in the order of CATEGORIES.
+    """
+    from yyy.textstore import LazyContent
+
+    reviews, fields, stores = 0, {}, {}
+    for sid, revs in dataset.reviews.items():
+        reviews += deep_size(sid, seen) + sys.getsizeof(revs)
+        seen.add(id(revs))
+
+        for rid, r in revs.items():
+            if id(r) not in seen:
+                reviews += sys.getsizeof(r) + sys.getsizeof(vars(r))
+                seen.update([id(r), id(vars(r))])
+            reviews += deep_size(rid, seen) + sum(deep_size(k, seen) + deep_size(v, seen)
+                                                  for k, v in vars(r).items() if k != "content")
+
+            # the values of text fields in a text store are (offset, length) references
+            content = r.content
+            if isinstance(content, LazyContent):
+                stores[id(content.store)] = content.store
+                containers = [content, vars(content), content.refs, content.fields, content.order]
+                items = list(content.refs.items()) + list(content.fields.items())
+            else:
+                containers = [content]
+                items = content.items()
+
+            reviews += sum(sys.getsizeof(c) for c in containers if id(c) not in seen)
+            seen.update(id(c) for c in containers)
+
+            for field, value in items:
+                fields[field] = fields.get(field, 0) + deep_size(field, seen) + deep_size(value, seen)
+
+    reviews += sys.getsizeof(dataset.reviews)
+    seen.add(id(dataset.reviews))
+
+    rows = [(venue, "reviews", "reviews", reviews)]
+    rows += [(venue, "content", f, size) for f, size in sorted(fields.items())]
+    rows += [(venue, "submissions", "submissions", deep_size(dataset.submissions, seen))]
+
+    per_reviewer = dataset.per_reviewer
+    rows += [(venue, "index", "per_reviewer.index", deep_size(per_reviewer.index, seen)),
+             (venue, "index", "per_reviewer", deep_size(per_reviewer, seen)),
+             (venue, "index", "per_sub", deep_size(dataset.per_sub, seen)),
+             (venue, "descriptor", "desc", deep_size(dataset.desc, seen))]
+
+    if getattr(dataset, "_features", None) is not None:
+        rows += [(venue, "features", "features", deep_size(dataset._features, seen))]
+    if getattr(dataset, "licenses", None) is not None:
+        rows += [(venue, "licenses", "licenses", deep_size(dataset.licenses, seen))]
+
+    rows += [(venue, "mapped", "text_store", len(s)) for s in stores.values()]
+
+    return rows
+
+
+def memory_report(dataset):
+    """
+    Breaks down the memory of a VenueDataset or MultiVenueDataset by venue, category and name: the review objects
+    and their IDs ("reviews"), the values of every content field ("content"), the submissions, the index
+    structures like per_reviewer.index and the reviewer index of a MultiVenueDataset ("index"), the descriptors
+    and, if present, the feature tables and licenses. Every object is counted once. Texts moved to a text store
+    are reported under "mapped"; they live in memory-mapped files rather than on the heap.
+
+    Example: memory_report(dataset).groupby("venue")["bytes"].sum()
+
+    :param dataset: the VenueDataset or MultiVenueDataset
+    :return: pandas DataFrame with the columns venue, category, name and bytes
+    """
+    seen = set()
+
+    rows = []
+    if hasattr(dataset, "venues"):
+        for v, venue in dataset.venues.items():
+            rows += _venue_rows(v, venue, seen)
+
+        if dataset._reviewer_index is not None:
+            rows += [(None, "index", "reviewer_index", deep_size(dataset._reviewer_index, seen))]
+    else:
+        rows += _venue_rows(None, dataset, seen)
+
+    return pandas.DataFrame(rows, columns=["venue", "category", "name", "bytes"])
+
+
+def profile_load(parent_dir, password, top=10, **load_kwargs):
+    """
+    Loads a vault with load_vault_data while tracing the allocations of this process with tracemalloc. Allocations
+    of worker processes (see the workers parameter) are not traced.
+
+    :param parent_dir: the directory to load from
+    :param password: password or pair of passwords encrypting the files
+    :param top: the number of source lines with the largest remaining allocations to report
+    :param load_kwargs: further arguments of load_vault_data
+    :return: pair of the MultiVenueDataset and a dict with the seconds, the current and peak traced bytes and the
+             top list of (source line, bytes) pairs
+    """
+    from yyy.data import load_vault_data
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+
+    start = time.perf_counter()
+    before = tracemalloc.take_snapshot()
+    try:
+        dataset = load_vault_data(parent_dir, password, **load_kwargs)
+
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        stats = tracemalloc.take_snapshot().compare_to(before, "lineno")
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    return dataset, {
+        "seconds": elapsed,
+        "current": current,
+        "peak": peak,
+        "top": [(str(s.traceback[0]), s.size_diff) for s in stats[:top]]
+    }
+
+
+def _print_report(report):
+    mb = report.assign(MB=report["bytes"] / 2 ** 20)
+
+    print("By venue:")
+    print(mb.groupby("venue", dropna=False)["MB"].sum().round(2).to_string())
+    print("\nBy category:")
+    print(mb.groupby("category")["MB"].sum().reindex(CATEGORIES).dropna().round(2).to_string())
+    print("\nBy name:")
+    print(mb.groupby(["category", "name"])["MB"].sum().sort_values(ascending=False).round(2).to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print the memory report of a vault.')
+    parser.add_argument('--target_dir',
+                        required=True,
+                        help='path to the vault directory containing data.7z')
+    parser.add_argument('--licenses',
+                        required=False,
+                        choices=["yes", "no"],
+                        default="no",
+                        help='yes, if the licenses should be loaded (and accounted) too')
+    parser.add_argument('--profile',
+                        required=False,
+                        action="store_true",
+                        help='trace the allocations of the load with tracemalloc')
+    parser.add_argument('--budget_mb',
+                        required=False,
+                        type=float,
+                        help='fail if the heap memory of the loaded dataset exceeds this many MB')
+
+    args = parser.parse_args()
+
+    print("Please enter the data password...")
+    password = getpass()
+    if args.licenses == "yes":
+        print("Please enter the license password...")
+        password = (password, getpass())
+
+    kwargs = {"licenses": args.licenses == "yes"}
+    if args.profile:
+        dataset, profile = profile_load(args.target_dir, password, **kwargs)
+
+        print("Loaded in %.2fs, traced %.1f MB (peak %.1f MB)\n" %
+              (profile["seconds"], profile["current"] / 2 ** 20, profile["peak"] / 2 ** 20))
+        print("Largest allocations:")
+        for line, size in profile["top"]:
+            print("%10.2f MB  %s" % (size / 2 ** 20, line))
+        print()
+    else:
+        from yyy.data import load_vault_data
+
+        dataset = load_vault_data(args.target_dir, password, **kwargs)
+
+    report = memory_report(dataset)
+    _print_report(report)
+
+    heap = report.loc[report["category"] != "mapped", "bytes"].sum() / 2 ** 20
+    print("\nTotal: %.2f MB on the heap" % heap)
+
+    if args.budget_mb is not None and heap > args.budget_mb:
+        print("The dataset exceeds the budget of %.2f MB." % args.budget_mb)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
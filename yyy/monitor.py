@@ -0,0 +1,222 @@
+import argparse
+import datetime
+import json
+import os
+import re
+import tempfile
+import time
+
+from yyy import or_api
+
+_PAPER_PATTERN = re.compile(r"/Paper(\d+)/-/")
+
+
+def _agreed(response):
+    """
+    :return: True, if the agreement field of the response note is an agreement
+    """
+    return response.content.get("Agreement", "").lower().strip().endswith("i agree")
+
+
+def _attributed(response):
+    """
+    :return: True, if the reviewer response requests attribution
+    """
+    return response.content.get("attribution", "").lower().strip().startswith("yes")
+
+
+def _creation_time(note):
+    return note.tcdate if getattr(note, "tcdate", None) is not None else note.cdate
+
+
+class LicenseCampaignMonitor:
+    """
+    Tracks the responses to the reviewer registration task and the author license tasks of a venue while the
+    campaign is running. Each poll only retrieves the responses created since the previous one (one cursor per
+    role) and the author responses of all papers are retrieved with wildcard queries. The responses seen so far
+    are kept by note ID in a small JSON state file, so counts stay correct across restarts and overlapping polls.
+
+    Edited and deleted (revoked) responses are only picked up after reset(): the queries do not return deleted
+    notes and select notes by their creation time.
+    """
+    def __init__(self, api, venue_id, state_path, task_name="License_Agreement"):
+        self.api = api
+        self.venue_id = venue_id
+        self.state_path = state_path
+        self.task_name = task_name
+
+        self.state = self._load_state()
+
+    def _empty_state(self):
+        return {
+            "venue": self.venue_id,
+            "task_name": self.task_name,
+            "last_poll": None,
+            "reviewers": {"cursor": None, "total": None, "responses": {}},
+            "authors": {"cursor": None, "total": None, "responses": {}}
+        }
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return self._empty_state()
+
+        with open(self.state_path, "r") as f:
+            state = json.load(f)
+
+        if state["venue"] != self.venue_id or state["task_name"] != self.task_name:
+            raise ValueError("The state file %s belongs to %s, not to %s" % (self.state_path, state["venue"],
+                                                                           self.venue_id))
+
+        return state
+
+    def save(self):
+        directory, name = os.path.split(os.path.abspath(self.state_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=name + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.state, f)
+            os.replace(tmp_path, self.state_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def reset(self):
+        """
+        Forgets all responses seen so far; the next poll retrieves all of them again.
+        """
+        self.state = self._empty_state()
+
+    def poll(self, refresh_totals=False):
+        """
+        Retrieves the responses created since the last poll, updates the counts and stores the state.
+
+        :param refresh_totals: True, if the numbers of reviewers and papers should be retrieved again
+        :return: dict of the numbers of new reviewer and author responses
+        """
+        if refresh_totals or self.state["reviewers"]["total"] is None:
+            self.state["reviewers"]["total"] = len(self.api.reviewers(self.venue_id))
+        if refresh_totals or self.state["authors"]["total"] is None:
+            self.state["authors"]["total"] = sum(1 for _ in self.api.blind_submissions(self.venue_id))
+
+        new_reviewers = self._fetch("reviewers", self.venue_id + "/Reviewers/-/Registration",
+                                    lambda n: [_agreed(n), _attributed(n)])
+        new_authors = self._fetch("authors", self.venue_id + "/Paper.*/-/" + self.task_name,
+                                  lambda n: [int(_PAPER_PATTERN.search(n.invitation).group(1)), _agreed(n)])
+
+        self.state["last_poll"] = datetime.datetime.now().strftime("%Y/%m/%d, %H:%M:%S")
+        self.save()
+
+        return {"reviewers": new_reviewers, "authors": new_authors}
+
+    def _fetch(self, role, invitation, summarize):
+        """
+        Adds the responses to the invitation(s) created since the cursor of the role. The cursor is inclusive,
+        responses created at the same time as the last seen one are recognized by their note ID.
+
+        :return: the number of new responses
+        """
+        role_state = self.state[role]
+        responses = role_state["responses"]
+
+        new = 0
+        for note in self.api.notes_since(invitation, role_state["cursor"]):
+            if note.id not in responses:
+                new += 1
+            responses[note.id] = summarize(note)
+
+            created = _creation_time(note)
+            if created is not None and (role_state["cursor"] is None or created > role_state["cursor"]):
+                role_state["cursor"] = created
+
+        return new
+
+    def counts(self):
+        """
+        :return: dict of the current response counts
+        """
+        reviewers = self.state["reviewers"]["responses"].values()
+        papers = {}
+        for paper, agreed in self.state["authors"]["responses"].values():
+            papers[paper] = papers.get(paper, False) or agreed
+
+        return {
+            "num_reviewers": self.state["reviewers"]["total"],
+            "num_reviewer_responses": len(reviewers),
+            "num_reviewers_agreed": sum(1 for agreed, _ in reviewers if agreed),
+            "num_reviewers_attributed": sum(1 for agreed, attributed in reviewers if agreed and attributed),
+            "num_papers": self.state["authors"]["total"],
+            "num_paper_responses": len(papers),
+            "num_papers_agreed": sum(1 for agreed in papers.values() if agreed)
+        }
+
+    def report(self, new=None):
+        """
+        :param new: optionally, the result of the last poll
+        :return: a one-line report of the current counts
+        """
+        c = self.counts()
+
+        def share(x, total):
+            return "%d/%s (%.1f%%)" % (x, total, 100 * x / total if total else 0)
+
+        res = "%s %s: reviewers %s responded, %d agreed, %d attributed | papers %s responded, %d agreed" % \
+              (self.state["last_poll"], self.venue_id,
+               share(c["num_reviewer_responses"], c["num_reviewers"]), c["num_reviewers_agreed"],
+               c["num_reviewers_attributed"],
+               share(c["num_paper_responses"], c["num_papers"]), c["num_papers_agreed"])
+        if new is not None:
+            res += " | +%d/+%d new" % (new["reviewers"], new["authors"])
+
+        return res
+
+
+def main():
+    from yyy.collect import escape_venue_file_name
+
+    parser = argparse.ArgumentParser(description='Monitor the responses to the license tasks of a venue')
+    parser.add_argument('--venue',
+                        required=True,
+                        help='name of the venue in OpenReview (the base group id)')
+    parser.add_argument('--state_file',
+                        required=False,
+                        help='path to the file keeping the responses seen so far; defaults to one per venue')
+    parser.add_argument('--interval',
+                        required=False,
+                        type=float,
+                        default=0,
+                        help='minutes between polls; polls once if 0')
+    parser.add_argument('--task_name',
+                        required=False,
+                        default="License_Agreement",
+                        help='name of the author license task')
+    parser.add_argument('--refresh',
+                        required=False,
+                        choices=["totals", "all"],
+                        help='retrieve the numbers of reviewers and papers (totals) or all responses (all) again')
+
+    args = parser.parse_args()
+
+    state_file = args.state_file or escape_venue_file_name(args.venue) + "_license_monitor.json"
+
+    print("Logging into OpenReview...")
+    api = or_api.OpenReviewAPI()
+    api.login()
+
+    monitor = LicenseCampaignMonitor(api, args.venue, state_file, args.task_name)
+    if args.refresh == "all":
+        monitor.reset()
+
+    refresh_totals = args.refresh is not None
+    while True:
+        new = monitor.poll(refresh_totals=refresh_totals)
+        print(monitor.report(new), flush=True)
+
+        if args.interval <= 0:
+            break
+
+        refresh_totals = False
+        time.sleep(args.interval * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,42 @@
 import re
 
 from getpass import getpass
-from openreview import openreview, tools
 
 
 class OpenReviewAPI:
     """
     Wraps the OpenReview API adding several convenience methods on top of the basic client abilities.
+    All requests go through a pooled, instrumented transport; its per-endpoint metrics are available
+    via transport.metrics.
+
+    :param pool_size: the maximum number of connections kept open to the API
+    :param timeout: the timeout of each request in seconds or a (connect, read) pair
     """
-    def __init__(self):
+    def __init__(self, pool_size=16, timeout=(10, 120)):
+        from yyy.transport import Transport
+
         self.user = None
         self.client = None
+        self.transport = Transport(pool_size, timeout)
 
     def login(self):
-        self.user, self.client = login()
+        self.user, self.client = login(self.transport)
+
+    def iterate_notes(self, **query):
+        """
+        Iterates over the notes matching a query with pipelined, adaptively sized pages; see
+        pagination.NotePaginator.
+
+        :param query: the parameters of the notes query, e.g. invitation
+        :return: iterable of notes
+        """
+        from yyy.pagination import NotePaginator
+
+        return NotePaginator(self.client, **query)
 
     def blind_submissions(self, venue_id):
         invitation = venue_id + "/-/Blind_Submission"
-        notes = tools.iterget_notes(self.client, invitation=invitation)
+        notes = self.iterate_notes(invitation=invitation)
 
         return notes
 
@@ -37,10 +56,12 @@ class OpenReviewAPI:
         :return: pair of dict reviewer id to reviews and list of submissions
         """
         res = {}
+        blind_subs = []
+
         # todo for now inefficient solution via iterating all blind submissions
-        blind_subs = list(self.blind_submissions(venue_id))
+        for bs in self.blind_submissions(venue_id):
+            blind_subs += [bs]
 
-        for bs in blind_subs:
             revs = self.reviews_for_submission(venue_id, bs)
             for r in revs:
                 rid = self.get_reviewer_id(venue_id, bs, r)
@@ -56,7 +77,7 @@ class OpenReviewAPI:
 
     def reviews_for_submission(self, venue_id, blind_submission):
         invitation = venue_id + "/Paper%d/-/Official_Review" % blind_submission.number
-        notes = tools.iterget_notes(self.client, invitation=invitation)
+        notes = self.iterate_notes(invitation=invitation)
 
         return notes
 
@@ -85,20 +106,67 @@ class OpenReviewAPI:
         members = self.client.get_group(sig).members
         return members[0]
 
+    def identity_terms(self, venue_id, reviewer_ids):
+        """
+        Collects the names, emails and profile IDs of the reviewers and the authors of a venue, e.g. for redacting
+        them from review texts. Authors are taken from the original (non-blind) submissions.
+
+        :param venue_id: the id of the venue (URL of the hompage on OR)
+        :param reviewer_ids: the profile IDs or emails of the reviewers
+        :return: set of terms
+        """
+        from openreview import tools
+
+        from yyy.scrub import identity_terms
+
+        ids = set(reviewer_ids)
+        names = set()
+        for s in self.iterate_notes(invitation=venue_id + "/-/Submission"):
+            ids.update(s.content.get("authorids", []))
+            names.update(s.content.get("authors", []))
+
+        profiles = tools.get_profiles(self.client, list(ids))
+
+        return identity_terms(ids, profiles, names)
+
     def get_reviewer_agreement_responses(self, venue_id):
         # get response invitation
         res_id = venue_id + "/Reviewers/-/Registration"
 
         # get responses
-        responses = list(tools.iterget_notes(self.client, invitation=res_id))
-        sig_to_response = {r.signatures[0]: r for r in responses}
+        sig_to_response = {r.signatures[0]: r for r in self.iterate_notes(invitation=res_id)}
 
         if len(sig_to_response) == 0:
             raise ValueError("There are either no responses yet or no registration tasks exists for %s" % venue_id)
 
         return sig_to_response
 
+    def existing_invitations(self, pattern):
+        """
+        Retrieves the ids of the existing invitations matching a pattern in one (paged) query.
+
+        :param pattern: the invitation id or regex, e.g. venue_id + "/Paper.*/-/License_Agreement"
+        :return: set of invitation ids
+        """
+        from openreview import tools
+
+        return set(inv.id for inv in tools.iterget_invitations(self.client, regex=pattern))
+
+    def notes_since(self, invitation, since=None):
+        """
+        Retrieves the notes of an invitation created after the given time in ascending order of creation. The
+        invitation may be a wildcard pattern, e.g. venue_id + "/Paper.*/-/License_Agreement", to cover the
+        invitations of all papers in the same batched queries.
+
+        :param invitation: the invitation id or pattern
+        :param since: optionally, the creation time in ms since epoch from which on notes are retrieved (inclusive)
+        :return: iterable of notes
+        """
+        return self.iterate_notes(invitation=invitation, mintcdate=since, sort="tcdate:asc")
+
     def reviewer_agreement_task(self, venue_id, title, instructions, task, start_date, due_date, exp_date):
+        from openreview import openreview, tools
+
         revs_id = venue_id + "/Reviewers"
         support_user = ""
         pcs_id = venue_id + "/Program_Chairs"
@@ -190,6 +258,8 @@ class OpenReviewAPI:
         return registration_invitation
 
     def author_agreement_task(self, venue_id, submissions, task_name, task, start_date, due_date, exp_date):
+        from openreview import openreview, tools
+
         pcs_id = venue_id + "/Program_Chairs"
 
         invs = []
@@ -236,21 +306,28 @@ class OpenReviewAPI:
         return invs
 
 
-def get_or_client(user, password, baseurl):
+def get_or_client(user, password, baseurl, transport=None):
     """
     Create an OpenReview client with the provided parameters or the default ones.
 
     :param user: the user name or email (depending on the task, should be PC for full rights)
     :param password: the password used for login
     :param baseurl: the OR API instance URL, for the dev system: https://devapi.openreview.net
+    :param transport: optionally, the transport.Transport to send all requests (including the login) through
     :return: the created client
     """
-    or_client = openreview.Client(baseurl=baseurl, username=user, password=password)
+    from openreview import openreview
+
+    if transport is None:
+        return openreview.Client(baseurl=baseurl, username=user, password=password)
+
+    or_client = transport.install(openreview.Client(baseurl=baseurl))
+    or_client.login_user(user, password)
 
     return or_client
 
 
-def login():
+def login(transport=None):
     print("Please provide your user name or email on openreview.net")
     while True:
         username = input("User name = ")
@@ -266,4 +343,4 @@ def login():
             print("Password accepted")
             break
 
-    return username, get_or_client(username, password, "https://api.openreview.net")
\ No newline at end of file
+    return username, get_or_client(username, password, "https://api.openreview.net", transport)
\ No newline at end of file
@@ -0,0 +1,117 @@
+import time
+from collections import deque
+
+
+class NotePaginator:
+    """
+    Iterates over the notes matching a query with pipelined, adaptively sized pages. While the notes of one page
+    are consumed, the requests for the next pages are already in flight (up to depth requests at a time). The
+    size of the pages adapts to the observed responses: pages grow while a request takes less than the target
+    time and shrink when responses get slow or larger than max_page_bytes.
+
+    Iterating yields openreview Notes in the order of the query, e.g.
+
+        for note in NotePaginator(client, invitation=venue_id + "/-/Blind_Submission"):
+            ...
+
+    :param client: the openreview.Client
+    :param depth: the maximum number of page requests in flight
+    :param page_size: the size of the first page
+    :param min_page_size: the lower bound of the page size
+    :param max_page_size: the upper bound of the page size (the API returns at most 1000 notes per request)
+    :param target_seconds: the targeted duration of a page request
+    :param max_page_bytes: the targeted maximum size of a response
+    :param query: the parameters of the notes query, e.g. invitation, forum, mintcdate or sort
+    """
+    def __init__(self, client, depth=3, page_size=100, min_page_size=25, max_page_size=1000, target_seconds=1.0,
+                 max_page_bytes=8 << 20, **query):
+        self.client = client
+        self.depth = depth
+        self.page_size = page_size
+        self.min_page_size = min_page_size
+        self.max_page_size = max_page_size
+        self.target_seconds = target_seconds
+        self.max_page_bytes = max_page_bytes
+        self.query = {k: v for k, v in query.items() if v is not None}
+
+        self.count = None
+        self.pages = []  # (offset, number of notes, seconds, bytes) of each retrieved page
+
+    def __iter__(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(max_workers=self.depth)
+        pending = deque()
+        state = {"offset": 0, "ended": False}
+
+        def request_pages():
+            while not state["ended"] and len(pending) < self.depth and \
+                    (self.count is None or state["offset"] < self.count):
+                # until the first page tells the number of notes, only request one page at a time
+                if self.count is None and len(pending) > 0:
+                    break
+
+                size = self.page_size
+                pending.append((size, executor.submit(self._fetch, state["offset"], size)))
+                state["offset"] += size
+
+        try:
+            request_pages()
+            while len(pending) > 0:
+                size, future = pending.popleft()
+                notes = future.result()
+
+                if len(notes) < size:
+                    state["ended"] = True
+                    for _, f in pending:
+                        f.cancel()
+                    pending.clear()
+
+                # request the next pages before handing out the notes of this one
+                request_pages()
+                for n in notes:
+                    yield n
+        finally:
+            for _, f in pending:
+                f.cancel()
+            executor.shutdown(wait=False)
+
+    def _fetch(self, offset, limit):
+        """
+        Retrieves one page and adapts the page size to it.
+
+        :return: list of Notes
+        """
+        from openreview import openreview, tools
+
+        params = dict(self.query, offset=offset, limit=limit)
+
+        start = time.perf_counter()
+        response = self.client.session.get(self.client.notes_url, params=tools.format_params(params),
+                                           headers=self.client.headers)
+        if response.status_code >= 400:
+            if "application/json" in response.headers.get("Content-Type", ""):
+                raise openreview.OpenReviewException(response.json())
+            raise openreview.OpenReviewException({"name": "Error", "message": response.text or response.reason})
+
+        body = response.json()
+        seconds = time.perf_counter() - start
+
+        notes = [openreview.Note.from_json(n) for n in body["notes"]]
+        if "count" in body:
+            self.count = body["count"]
+
+        self.pages += [(offset, len(notes), seconds, len(response.content))]
+        self._adapt(limit, seconds, len(response.content))
+
+        return notes
+
+    def _adapt(self, limit, seconds, num_bytes):
+        """
+        Scales the page size towards the target duration and size of a request, at most by a factor of two
+        per page.
+        """
+        factor = min(self.target_seconds / max(seconds, 1e-6), self.max_page_bytes / max(num_bytes, 1), 2.0)
+        factor = max(factor, 0.5)
+
+        self.page_size = int(min(max(limit * factor, self.min_page_size), self.max_page_size))
@@ -0,0 +1,200 @@
+from collections import namedtuple
+from collections.abc import Mapping
+
+Row = namedtuple("Row", ["venue", "sid", "rid", "submission", "review"])
+
+
+class Projection(Mapping):
+    """
+    Read-only view on a subset of the fields of a review. Does not copy the review content.
+    """
+    def __init__(self, review, fields):
+        self.review = review
+        self.fields = fields
+
+    def __getitem__(self, item):
+        if item not in self.fields:
+            raise KeyError(item)
+
+        return self.review[item]
+
+    def __iter__(self):
+        for f in self.fields:
+            if f in self.review.content:
+                yield f
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class Query:
+    """
+    Lazy, composable query over the reviews of one or several venues. Each step returns a new query without
+    evaluating anything; iterating a query yields Row(venue, sid, rid, submission, review) tuples sharing the
+    underlying Submission and Review objects (or Projections of the reviews, if fields were selected).
+
+    Example: dataset.query().where(review=lambda r: "attribution" in r).select("rating").limit(10)
+    """
+    def __init__(self, venues, sub_preds=(), rev_preds=(), reviewer_preds=(), fields=None, max_rows=None):
+        self.venues = venues
+        self.sub_preds = sub_preds
+        self.rev_preds = rev_preds
+        self.reviewer_preds = reviewer_preds
+        self.fields = fields
+        self.max_rows = max_rows
+
+    @staticmethod
+    def of(dataset):
+        """
+        Creates a query over all reviews of a VenueDataset or MultiVenueDataset.
+
+        :param dataset: the dataset
+        :return: the query
+        """
+        if hasattr(dataset, "venues"):
+            return Query(dataset.venues)
+        else:
+            return Query({None: dataset})
+
+    def where(self, submission=None, review=None, reviewer=None):
+        """
+        Restricts the query to rows matching all given predicates.
+
+        :param submission: predicate on the submission
+        :param review: predicate on the Review
+        :param reviewer: predicate on the reviewer ID
+        :return: the restricted query
+        """
+        return self._derive(sub_preds=self.sub_preds + ((submission,) if submission else ()),
+                            rev_preds=self.rev_preds + ((review,) if review else ()),
+                            reviewer_preds=self.reviewer_preds + ((reviewer,) if reviewer else ()))
+
+    def select(self, *fields):
+        """
+        Projects the reviews onto the given fields.
+
+        :param fields: the review fields to keep
+        :return: the projected query
+        """
+        return self._derive(fields=tuple(fields))
+
+    def limit(self, n):
+        """
+        Restricts the query to the first n rows.
+
+        :param n: the maximum number of rows
+        :return: the limited query
+        """
+        return self._derive(max_rows=n if self.max_rows is None else min(n, self.max_rows))
+
+    def venue(self, *venues):
+        """
+        Restricts the query to the given venues of a MultiVenueDataset.
+
+        :param venues: the venue names
+        :return: the restricted query
+        """
+        return self._derive(venues={v: self.venues[v] for v in venues})
+
+    def group_by(self, key):
+        """
+        Groups the rows by reviewer or submission. Groups are built on iteration.
+
+        :param key: either "reviewer" or "submission"
+        :return: a GroupedQuery
+        """
+        if key not in ("reviewer", "submission"):
+            raise ValueError("Can only group by reviewer or submission, not %s" % key)
+
+        return GroupedQuery(self, key)
+
+    def __iter__(self):
+        emitted = 0
+        if self.max_rows is not None and self.max_rows <= 0:
+            return
+
+        reviewer_ok = {}
+        for v, dataset in self.venues.items():
+            for sid, revs in dataset.reviews.items():
+                sub = dataset.submissions.get(sid)
+                if not all(p(sub) for p in self.sub_preds):
+                    continue
+
+                for rid, review in revs.items():
+                    if self.reviewer_preds:
+                        if review.reviewer not in reviewer_ok:
+                            reviewer_ok[review.reviewer] = all(p(review.reviewer) for p in self.reviewer_preds)
+                        if not reviewer_ok[review.reviewer]:
+                            continue
+
+                    if not all(p(review) for p in self.rev_preds):
+                        continue
+
+                    yield Row(v, sid, rid, sub, review if self.fields is None else Projection(review, self.fields))
+
+                    emitted += 1
+                    if self.max_rows is not None and emitted >= self.max_rows:
+                        return
+
+    def count(self):
+        return sum(1 for _ in self)
+
+    def materialize(self):
+        """
+        Evaluates the query into datasets sharing the Submission and Review objects with the queried ones.
+        Projections are ignored.
+
+        :return: a MultiVenueDataset of the matching reviews, or a VenueDataset if a single VenueDataset was queried
+        """
+        from yyy.data import VenueDataset, MultiVenueDataset
+
+        submissions, reviews = {v: {} for v in self.venues}, {v: {} for v in self.venues}
+        for row in self._derive(fields=None):
+            submissions[row.venue][row.sid] = row.submission
+            reviews[row.venue].setdefault(row.sid, {})[row.rid] = row.review
+
+        datasets = {v: VenueDataset(submissions[v], reviews[v], dict(self.venues[v].desc)) for v in self.venues}
+        if list(datasets) == [None]:
+            return datasets[None]
+
+        return MultiVenueDataset(datasets)
+
+    def _derive(self, **changes):
+        params = {
+            "venues": self.venues,
+            "sub_preds": self.sub_preds,
+            "rev_preds": self.rev_preds,
+            "reviewer_preds": self.reviewer_preds,
+            "fields": self.fields,
+            "max_rows": self.max_rows
+        }
+        params.update(changes)
+
+        return Query(**params)
+
+
+class GroupedQuery:
+    """
+    Rows of a query grouped by reviewer or submission. Iterating yields (key, rows) pairs, where the key is the
+    reviewer ID or the (venue, submission ID) pair.
+    """
+    def __init__(self, query, key):
+        self.query = query
+        self.key = key
+
+    def __iter__(self):
+        for k, rows in self.groups().items():
+            yield k, rows
+
+    def groups(self):
+        groups = {}
+        for row in self.query._derive(fields=None):
+            key = row.review.reviewer if self.key == "reviewer" else (row.venue, row.sid)
+            if self.query.fields is not None:
+                row = row._replace(review=Projection(row.review, self.query.fields))
+            groups.setdefault(key, []).append(row)
+
+        return groups
+
+    def counts(self):
+        return {k: len(rows) for k, rows in self.groups().items()}
@@ -0,0 +1,290 @@
+import argparse
+import hashlib
+import hmac
+import os
+import re
+import struct
+import tempfile
+from getpass import getpass
+
+# WinZip AES (AE-1/AE-2) parameters per strength: key and salt lengths in bytes
+_KEY_LENGTHS = {1: 16, 2: 24, 3: 32}
+_SALT_LENGTHS = {1: 8, 2: 12, 3: 16}
+_VERIFIER_LENGTH = 2
+_MAC_LENGTH = 10
+
+_LICENSE_PATTERN = re.compile(r"^.*(sub|rev)_licenses\.(csv|json)(\.part\d{5}of\d{5})?$")
+
+
+def _derive_keys(password, salt, strength):
+    """
+    Derives the encryption key, the authentication key and the password verifier of an entry like WinZip AES,
+    i.e. with PBKDF2-HMAC-SHA1 over 1000 iterations.
+    """
+    key_length = _KEY_LENGTHS[strength]
+    material = hashlib.pbkdf2_hmac("sha1", password, salt, 1000, 2 * key_length + _VERIFIER_LENGTH)
+
+    return material[:key_length], material[key_length:2 * key_length], material[2 * key_length:]
+
+
+def _cipher(key):
+    from Cryptodome.Cipher import AES
+    from Cryptodome.Util import Counter
+
+    # little-endian counter starting at 1
+    return AES.new(key, AES.MODE_CTR, counter=Counter.new(nbits=128, little_endian=True))
+
+
+def _rekey_member(src, dst, name, offset, size, strength, old_password, new_password, chunk_size):
+    """
+    Re-encrypts the payload of one member: the old salt, verifier, ciphertext and authentication code are
+    replaced by ones of the new password, while the compressed bytes (and hence all sizes and offsets) stay
+    the same. The old authentication code is verified on the way.
+
+    :param src: the source file opened for reading
+    :param dst: the destination file opened for writing
+    :param name: the member name for error messages
+    :param offset: the position of the payload (starting with the salt) in the files
+    :param size: the size of the payload including salt, verifier and authentication code
+    :param strength: the WinZip AES strength of the member
+    :param old_password: the encoded old password
+    :param new_password: the encoded new password
+    :param chunk_size: the number of bytes processed at once
+    :return: void
+    """
+    salt_length = _SALT_LENGTHS[strength]
+
+    src.seek(offset)
+    header = src.read(salt_length + _VERIFIER_LENGTH)
+    old_key, old_mac_key, verifier = _derive_keys(old_password, header[:salt_length], strength)
+    if verifier != header[salt_length:]:
+        raise ValueError("The old password does not match the entry %s." % name)
+
+    salt = os.urandom(salt_length)
+    new_key, new_mac_key, new_verifier = _derive_keys(new_password, salt, strength)
+
+    decrypter, encrypter = _cipher(old_key), _cipher(new_key)
+    old_mac = hmac.new(old_mac_key, digestmod=hashlib.sha1)
+    new_mac = hmac.new(new_mac_key, digestmod=hashlib.sha1)
+
+    dst.seek(offset)
+    dst.write(salt + new_verifier)
+
+    remaining = size - len(header) - _MAC_LENGTH
+    while remaining > 0:
+        chunk = src.read(min(chunk_size, remaining))
+        if len(chunk) == 0:
+            raise ValueError("The entry %s is truncated." % name)
+        remaining -= len(chunk)
+
+        old_mac.update(chunk)
+        chunk = encrypter.encrypt(decrypter.decrypt(chunk))
+        new_mac.update(chunk)
+        dst.write(chunk)
+
+    if not hmac.compare_digest(old_mac.digest()[:_MAC_LENGTH], src.read(_MAC_LENGTH)):
+        raise ValueError("The authentication code of the entry %s does not match, the archive is corrupted." % name)
+
+    dst.write(new_mac.digest()[:_MAC_LENGTH])
+
+
+def _rekey_members(src_path, dst_path, members, chunk_size):
+    """
+    Re-encrypts the given members of src_path into the prepared dst_path. Runs in the worker processes of
+    rekey_archive.
+
+    :param members: list of (name, payload offset, payload size, strength, old password, new password) tuples
+    :return: the number of re-encrypted bytes
+    """
+    total = 0
+    with open(src_path, "rb") as src, open(dst_path, "r+b") as dst:
+        for name, offset, size, strength, old_password, new_password in members:
+            _rekey_member(src, dst, name, offset, size, strength, old_password, new_password, chunk_size)
+            total += size
+
+    return total
+
+
+def _payloads(path):
+    """
+    Locates the payloads of all members of a zip archive.
+
+    :return: list of (ZipInfo, payload offset) pairs in the order of the archive
+    """
+    import pyzipper
+
+    with pyzipper.AESZipFile(path, "r") as zf:
+        infos = zf.infolist()
+
+    result = []
+    with open(path, "rb") as f:
+        for info in infos:
+            f.seek(info.header_offset)
+            local_header = f.read(30)
+            if local_header[:4] != b"PK\x03\x04":
+                raise ValueError("Bad local header of the entry %s." % info.filename)
+
+            name_length, extra_length = struct.unpack("<HH", local_header[26:30])
+            result += [(info, info.header_offset + 30 + name_length + extra_length)]
+
+    return result
+
+
+def _copy_range(src, dst, start, end, chunk_size):
+    src.seek(start)
+    dst.seek(start)
+    while start < end:
+        chunk = src.read(min(chunk_size, end - start))
+        dst.write(chunk)
+        start += len(chunk)
+
+
+def _password_of(name, password):
+    """
+    Returns the password of the given member: license files use the second password of a pair, all other
+    files the first one.
+    """
+    if type(password) != tuple:
+        return password
+
+    return password[1] if _LICENSE_PATTERN.match(name) else password[0]
+
+
+def rekey_archive(path, old_password, new_password, workers=None, chunk_size=1 << 20):
+    """
+    Re-encrypts all members of an AES encrypted zip file from the old to the new password(s) without
+    decompressing them. Members are streamed chunk by chunk into a copy of the archive, which replaces the
+    original once all members are done. With several workers, the members of different venues (identified by
+    the prefix of the member names) are processed in parallel.
+
+    Members stored without encryption, like the manifest, are copied as they are. The checksums of the manifest
+    are keyed with the old passwords, so the next store replaces the files instead of skipping unchanged ones.
+
+    :param path: the path to the archive
+    :param old_password: the current password or pair of data and license passwords
+    :param new_password: the new password or pair of data and license passwords
+    :param workers: number of processes re-encrypting members; None for a single process
+    :param chunk_size: the number of bytes processed at once
+    :return: dict with the numbers of re-encrypted and copied members and the re-encrypted bytes
+    """
+    tasks = {}
+    payload_ranges = []
+    copied = 0
+    for info, offset in _payloads(path):
+        old_pwd, new_pwd = _password_of(info.filename, old_password), _password_of(info.filename, new_password)
+        if not info.flag_bits & 0x1 or getattr(info, "wz_aes_strength", None) is None:
+            copied += 1
+            continue
+        if old_pwd is None or new_pwd is None:
+            raise ValueError("No password given for the encrypted entry %s." % info.filename)
+
+        venue = info.filename.split("_")[0]
+        tasks.setdefault(venue, []).append((info.filename, offset, info.compress_size, info.wz_aes_strength,
+                                            bytes(old_pwd, "utf-8"), bytes(new_pwd, "utf-8")))
+        payload_ranges += [(offset, offset + info.compress_size)]
+
+    size = os.path.getsize(path)
+
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=name + ".", suffix=".rekey")
+    os.close(fd)
+
+    try:
+        # copy everything but the payloads: headers, unencrypted members and the central directory
+        with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+            dst.truncate(size)
+
+            pos = 0
+            for start, end in sorted(payload_ranges) + [(size, size)]:
+                _copy_range(src, dst, pos, start, chunk_size)
+                pos = end
+
+        if workers is None or workers <= 1:
+            total = sum(_rekey_members(path, tmp_path, members, chunk_size) for members in tasks.values())
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            from itertools import repeat
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                total = sum(pool.map(_rekey_members, repeat(path), repeat(tmp_path), tasks.values(),
+                                     repeat(chunk_size)))
+
+        with open(tmp_path, "r+b") as dst:
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {"rekeyed": len(payload_ranges), "copied": copied, "bytes": total}
+
+
+def rekey_vault(parent_dir, old_password, new_password, workers=None, chunk_size=1 << 20):
+    """
+    Rotates the password(s) of a vault: the data.7z file and, if present, the search index. Encrypted snapshots
+    of the vault in a cache directory become stale and are discarded on the next load.
+
+    :param parent_dir: the vault directory
+    :param old_password: the current password or pair of data and license passwords
+    :param new_password: the new password or pair of data and license passwords
+    :param workers: number of processes re-encrypting venues in parallel; None for a single process
+    :param chunk_size: the number of bytes processed at once
+    :return: dict of the rotated file names to the results of rekey_archive
+    """
+    path = parent_dir + os.sep + "data.7z"
+    if not os.path.exists(path):
+        raise ValueError("Passed directory does not contain a data.7z file. Aborting.")
+
+    result = {"data.7z": rekey_archive(path, old_password, new_password, workers, chunk_size)}
+
+    # the search index is encrypted with the data password
+    index_path = parent_dir + os.sep + "search_index.7z"
+    if os.path.exists(index_path):
+        old_data = old_password[0] if type(old_password) == tuple else old_password
+        new_data = new_password[0] if type(new_password) == tuple else new_password
+        result["search_index.7z"] = rekey_archive(index_path, old_data, new_data, workers, chunk_size)
+
+    return result
+
+
+def _ask_password(prompt, min_length=0):
+    while True:
+        print(prompt)
+        password = getpass()
+        if len(password) >= min_length:
+            return password
+        print("Password length needs to be >= %d" % min_length)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rotate the passwords of a vault without recompressing it.')
+    parser.add_argument('--target_dir',
+                        required=True,
+                        help='path to the vault directory containing data.7z')
+    parser.add_argument('--licenses',
+                        required=True,
+                        choices=["yes", "no"],
+                        help='yes, if the licenses are protected with a separate password')
+    parser.add_argument('--workers',
+                        required=False,
+                        type=int,
+                        help='number of processes re-encrypting venues in parallel')
+
+    args = parser.parse_args()
+
+    old_password = _ask_password("Please enter the current data password...")
+    new_password = _ask_password("Please enter the new data password...", min_length=6)
+    if args.licenses == "yes":
+        old_password = (old_password, _ask_password("Please enter the current license password..."))
+        new_password = (new_password, _ask_password("Please enter the new license password...", min_length=6))
+
+        if new_password[0] == new_password[1]:
+            print("Having the same password for storing licenses and data is *strongly* discouraged!")
+
+    for name, res in rekey_vault(args.target_dir, old_password, new_password, args.workers).items():
+        print("%s: re-encrypted %d entries (%.1f MB), copied %d unencrypted entries" %
+              (name, res["rekeyed"], res["bytes"] / 2 ** 20, res["copied"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import re
+from collections import deque
+
+from yyy.search import IGNORED_FIELDS
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_PROFILE_ID_SUFFIX = re.compile(r"\d+$")
+
+
+class PIIScrubber:
+    """
+    Redacts identifying terms (names, emails, profile IDs) from review texts. The terms are compiled into an
+    Aho-Corasick automaton over word tokens, so each text is scanned in one linear pass independent of the
+    number of terms. Matching is case-insensitive and respects word boundaries; separators between the words of
+    a term are ignored, e.g. "jane.doe@uni.edu" also matches "Jane Doe uni edu".
+    """
+    def __init__(self, terms, replacement="[REDACTED]", min_length=4):
+        self.replacement = replacement
+
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [0]  # token length of the longest term ending in each state
+
+        for term in terms:
+            if len(term.strip()) < min_length:
+                continue
+
+            tokens = _TOKEN_PATTERN.findall(term.lower())
+            if len(tokens) > 0:
+                self._insert(tokens)
+
+        self._link()
+
+    def _insert(self, tokens):
+        state = 0
+        for token in tokens:
+            if token not in self.goto[state]:
+                self.goto[state][token] = len(self.goto)
+                self.goto += [{}]
+                self.fail += [0]
+                self.out += [0]
+            state = self.goto[state][token]
+
+        self.out[state] = max(self.out[state], len(tokens))
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while len(queue) > 0:
+            state = queue.popleft()
+            for token, nxt in self.goto[state].items():
+                f = self.fail[state]
+                while f != 0 and token not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(token, 0)
+                self.out[nxt] = max(self.out[nxt], self.out[self.fail[nxt]])
+                queue.append(nxt)
+
+    def __len__(self):
+        return len(self.goto) - 1
+
+    def scrub(self, text):
+        """
+        Redacts all terms occurring in the text.
+
+        :param text: the text
+        :return: pair of the redacted text and the number of redacted spans
+        """
+        lowered = text.lower()
+        same_length = len(lowered) == len(text)
+
+        goto, fail, out = self.goto, self.fail, self.out
+        starts = []
+        spans = []
+        state = 0
+        for m in _TOKEN_PATTERN.finditer(lowered if same_length else text):
+            token = m.group() if same_length else m.group().lower()
+            starts.append(m.start())
+
+            while state != 0 and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+
+            if out[state] > 0:
+                start = starts[len(starts) - out[state]]
+                if len(spans) > 0 and start <= spans[-1][1]:
+                    spans[-1] = (min(spans[-1][0], start), m.end())
+                else:
+                    spans.append((start, m.end()))
+
+        if len(spans) == 0:
+            return text, 0
+
+        parts = []
+        pos = 0
+        for start, end in spans:
+            parts += [text[pos:start], self.replacement]
+            pos = end
+        parts += [text[pos:]]
+
+        return "".join(parts), len(spans)
+
+    def scrub_review(self, review, fields=None):
+        """
+        Redacts the text fields of a review dict in place.
+
+        :param review: the review dict
+        :param fields: optionally, the fields to scrub; defaults to all text fields except identifiers
+        :return: the number of redacted spans
+        """
+        total = 0
+        for field in review:
+            if (fields is not None and field not in fields) or (fields is None and field in IGNORED_FIELDS):
+                continue
+            if type(review[field]) != str:
+                continue
+
+            review[field], n = self.scrub(review[field])
+            total += n
+
+        return total
+
+
+def profile_id_name(profile_id):
+    """
+    Derives the name contained in an OpenReview profile ID, e.g. "Jane Doe" from "~Jane_Doe1".
+
+    :param profile_id: the profile ID
+    :return: the name
+    """
+    return _PROFILE_ID_SUFFIX.sub("", profile_id.lstrip("~")).replace("_", " ")
+
+
+def profile_terms(profile):
+    """
+    Collects the identifying terms of an OpenReview profile: its ID, all names and all emails.
+
+    :param profile: the Profile
+    :return: set of terms
+    """
+    terms = {profile.id, profile_id_name(profile.id)}
+
+    for name in profile.content.get("names", []):
+        if name.get("fullname"):
+            terms.add(name["fullname"])
+
+        first, middle, last = name.get("first") or "", name.get("middle") or "", name.get("last") or ""
+        if first and last:
+            terms.add(" ".join(n for n in [first, middle, last] if n))
+            terms.add("%s %s" % (first, last))
+            terms.add("%s, %s" % (last, first))
+        if name.get("username"):
+            terms.update([name["username"], profile_id_name(name["username"])])
+
+    for key in ["emails", "emailsConfirmed"]:
+        terms.update(profile.content.get(key, []))
+    if profile.content.get("preferredEmail"):
+        terms.add(profile.content["preferredEmail"])
+
+    return terms
+
+
+def identity_terms(ids, profiles=(), names=()):
+    """
+    Collects the identifying terms of a venue from the raw IDs (profile IDs or emails) of its participants, their
+    profiles and further names, e.g. author names listed on submissions.
+
+    :param ids: profile IDs or emails
+    :param profiles: the Profiles of the participants
+    :param names: further names
+    :return: set of terms
+    """
+    terms = set(names)
+    for i in ids:
+        terms.add(i)
+        if i.startswith("~"):
+            terms.add(profile_id_name(i))
+
+    for p in profiles:
+        terms.update(profile_terms(p))
+
+    return terms
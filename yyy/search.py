@@ -0,0 +1,386 @@
+import hashlib
+import io
+import os
+import pickle
+import re
+import tempfile
+from array import array
+from bisect import bisect_left
+
+IGNORED_FIELDS = {"id", "tauthor", "signature", "attribution"}
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_QUERY_PATTERN = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+
+
+def tokenize(text):
+    """
+    Splits a text into lower-cased word tokens.
+
+    :param text: the text
+    :return: list of tokens
+    """
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class _Postings:
+    """
+    Compact postings list of one term: ascending document numbers with the positions of the term in them.
+    """
+    __slots__ = ["docs", "offsets", "positions"]
+
+    def __init__(self):
+        self.docs = array("I")
+        self.offsets = array("I", [0])
+        self.positions = array("I")
+
+    def add(self, doc, positions):
+        self.docs.append(doc)
+        self.positions.extend(positions)
+        self.offsets.append(len(self.positions))
+
+    def positions_of(self, doc):
+        i = bisect_left(self.docs, doc)
+        if i == len(self.docs) or self.docs[i] != doc:
+            return None
+
+        return self.positions[self.offsets[i]:self.offsets[i + 1]]
+
+
+class VenueIndex:
+    """
+    Inverted index over the review fields of one VenueDataset. Each indexed field of a review is one document.
+    Reviews can be added incrementally; reviews that disappear from the dataset are masked and reviews whose
+    indexed fields changed are masked and indexed again, as recognized by a fingerprint of their fields.
+    """
+    def __init__(self):
+        self.docs = []
+        self.postings = {}
+        self.review_docs = {}
+        self.fingerprints = {}
+        self.deleted = set()
+
+    def __setstate__(self, state):
+        # indices stored without fingerprints index all reviews again on their next update
+        state.setdefault("fingerprints", {})
+        self.__dict__.update(state)
+
+    def add_review(self, sid, review, fields=None):
+        """
+        Indexes the fields of a review.
+
+        :param sid: the submission ID of the review
+        :param review: the Review
+        :param fields: optionally, the fields to index; defaults to all text fields except identifiers
+        :return: None
+        """
+        docs = []
+        for field, value in _indexed_fields(review, fields):
+            doc = len(self.docs)
+            self.docs += [(sid, review.rid, field)]
+            docs += [doc]
+
+            term_positions = {}
+            for pos, token in enumerate(tokenize(value)):
+                term_positions.setdefault(token, []).append(pos)
+
+            for term, positions in term_positions.items():
+                if term not in self.postings:
+                    self.postings[term] = _Postings()
+                self.postings[term].add(doc, positions)
+
+        self.review_docs[review.rid] = docs
+        self.fingerprints[review.rid] = _fingerprint(sid, review, fields)
+
+    def update(self, dataset, fields=None):
+        """
+        Indexes all reviews of the dataset not indexed yet or changed since and masks the ones no longer
+        contained.
+
+        :param dataset: the VenueDataset
+        :param fields: optionally, the fields to index
+        :return: the number of newly indexed (or reindexed) reviews
+        """
+        contained = set()
+        added = 0
+        for sid, revs in dataset.reviews.items():
+            for rid, review in revs.items():
+                contained.add(rid)
+                if rid in self.review_docs and self.fingerprints.get(rid) == _fingerprint(sid, review, fields):
+                    continue
+
+                self._mask(rid)
+                self.add_review(sid, review, fields)
+                added += 1
+
+        for rid in set(self.review_docs) - contained:
+            self._mask(rid)
+
+        return added
+
+    def _mask(self, rid):
+        self.deleted.update(self.review_docs.pop(rid, []))
+        self.fingerprints.pop(rid, None)
+
+    def term(self, term):
+        """
+        :return: the set of (sid, rid) pairs of reviews containing the term
+        """
+        postings = self.postings.get(term.lower())
+        if postings is None:
+            return set()
+
+        return self._reviews(postings.docs)
+
+    def phrase(self, phrase):
+        """
+        :return: the set of (sid, rid) pairs of reviews containing the phrase within one field
+        """
+        terms = tokenize(phrase)
+        if len(terms) == 0:
+            return set()
+
+        postings = [self.postings.get(t) for t in terms]
+        if any(p is None for p in postings):
+            return set()
+        if len(terms) == 1:
+            return self._reviews(postings[0].docs)
+
+        # check the candidates of the rarest term
+        rarest = min(range(len(terms)), key=lambda i: len(postings[i].docs))
+
+        matches = []
+        for doc in postings[rarest].docs:
+            starts = set(p - rarest for p in postings[rarest].positions_of(doc))
+            for i, p in enumerate(postings):
+                if i == rarest or len(starts) == 0:
+                    continue
+
+                positions = p.positions_of(doc)
+                starts = starts.intersection(q - i for q in positions) if positions is not None else set()
+
+            if len(starts) > 0:
+                matches += [doc]
+
+        return self._reviews(matches)
+
+    def all_reviews(self):
+        return self._reviews(d for docs in self.review_docs.values() for d in docs)
+
+    def _reviews(self, docs):
+        return set((self.docs[d][0], self.docs[d][1]) for d in docs if d not in self.deleted)
+
+
+def _indexed_fields(review, fields):
+    """
+    :return: iterable of the (field, text) pairs of a review to index
+    """
+    for field in review:
+        if (fields is not None and field not in fields) or (fields is None and field in IGNORED_FIELDS):
+            continue
+
+        value = review[field]
+        if type(value) == str:
+            yield field, value
+
+
+def _fingerprint(sid, review, fields):
+    """
+    :return: a digest of the submission and the indexed fields of a review
+    """
+    h = hashlib.blake2b(sid.encode("utf-8"), digest_size=16)
+    for field, value in _indexed_fields(review, fields):
+        h.update(b"\0" + field.encode("utf-8") + b"\0" + value.encode("utf-8"))
+
+    return h.digest()
+
+
+class InvertedIndex:
+    """
+    Full-text index over the reviews of several venues. Supports term and phrase queries as well as boolean
+    queries combining them with AND, OR, NOT and parentheses, e.g. 'baseline AND ("related work" OR missing)'.
+    Adjacent terms without an operator are combined with AND. Hits are (venue, sid, rid) triples.
+
+    The index can be persisted in an encrypted archive next to the vault and updated incrementally.
+    """
+    def __init__(self, fields=None):
+        self.fields = fields
+        self.venues = {}
+
+    def add_venue(self, venue, dataset):
+        """
+        Indexes the reviews of a VenueDataset not indexed yet.
+
+        :param venue: the venue name
+        :param dataset: the VenueDataset
+        :return: the number of newly indexed reviews
+        """
+        if venue not in self.venues:
+            self.venues[venue] = VenueIndex()
+
+        return self.venues[venue].update(dataset, self.fields)
+
+    def update(self, multi_dataset):
+        """
+        Indexes the reviews of all venues of the MultiVenueDataset not indexed yet or changed since and drops
+        the venues no longer contained.
+
+        :param multi_dataset: the MultiVenueDataset
+        :return: the number of newly indexed (or reindexed) reviews
+        """
+        for v in set(self.venues) - set(multi_dataset):
+            del self.venues[v]
+
+        return sum(self.add_venue(v, multi_dataset[v]) for v in multi_dataset)
+
+    def term(self, term):
+        return self._collect(lambda vi: vi.term(term))
+
+    def phrase(self, phrase):
+        return self._collect(lambda vi: vi.phrase(phrase))
+
+    def search(self, query):
+        """
+        Evaluates a boolean query.
+
+        :param query: the query string
+        :return: the set of (venue, sid, rid) hits
+        """
+        tokens = _QUERY_PATTERN.findall(query)
+        if len(tokens) == 0:
+            return set()
+
+        result, pos = self._parse_or(tokens, 0)
+        if pos != len(tokens):
+            raise ValueError("Unexpected token %s in query %s" % (tokens[pos], query))
+
+        return result
+
+    def _parse_or(self, tokens, pos):
+        result, pos = self._parse_and(tokens, pos)
+        while pos < len(tokens) and tokens[pos] == "OR":
+            right, pos = self._parse_and(tokens, pos + 1)
+            result = result | right
+
+        return result, pos
+
+    def _parse_and(self, tokens, pos):
+        result, pos = self._parse_not(tokens, pos)
+        while pos < len(tokens) and tokens[pos] not in ("OR", ")"):
+            if tokens[pos] == "AND":
+                pos += 1
+            right, pos = self._parse_not(tokens, pos)
+            result = result & right
+
+        return result, pos
+
+    def _parse_not(self, tokens, pos):
+        if pos < len(tokens) and tokens[pos] == "NOT":
+            operand, pos = self._parse_not(tokens, pos + 1)
+            return self._collect(lambda vi: vi.all_reviews()) - operand, pos
+
+        return self._parse_atom(tokens, pos)
+
+    def _parse_atom(self, tokens, pos):
+        if pos == len(tokens):
+            raise ValueError("Unexpected end of query")
+
+        token = tokens[pos]
+        if token == "(":
+            result, pos = self._parse_or(tokens, pos + 1)
+            if pos == len(tokens) or tokens[pos] != ")":
+                raise ValueError("Missing closing parenthesis in query")
+            return result, pos + 1
+        elif token.startswith('"'):
+            return self.phrase(token.strip('"')), pos + 1
+        elif token in ("AND", "OR", ")"):
+            raise ValueError("Unexpected operator %s in query" % token)
+        else:
+            return self.phrase(token), pos + 1
+
+    def _collect(self, query):
+        return set((v, sid, rid) for v, vi in self.venues.items() for sid, rid in query(vi))
+
+    def save(self, parent_dir, password):
+        """
+        Stores the index encrypted in the search_index.7z file of the vault directory, one entry per venue.
+
+        :param parent_dir: the vault directory
+        :param password: password or pair of passwords of the vault; the data password is used
+        :return: the path of the stored index
+        """
+        from yyy.collect import store_files_securely, escape_venue_file_name
+
+        if type(password) == tuple:
+            password = password[0]
+
+        path = parent_dir + os.sep + "search_index.7z"
+        names = [escape_venue_file_name(str(v)) + "_search.pkl" for v in self.venues]
+        data = [io.BytesIO(pickle.dumps((v, self.fields, vi), protocol=5)) for v, vi in self.venues.items()]
+
+        # write a fresh archive and swap it in to not accumulate stale entries
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix="search_index.",
+                                        suffix=".tmp")
+        os.close(fd)
+        try:
+            store_files_securely(names, data, tmp_path, password)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return path
+
+    @staticmethod
+    def load(parent_dir, password):
+        """
+        Loads the index stored in the vault directory or returns None, if there is none.
+
+        :param parent_dir: the vault directory
+        :param password: password or pair of passwords of the vault; the data password is used
+        :return: the InvertedIndex or None
+        """
+        from yyy.collect import load_files_securely, load_zip_structure_securely
+
+        if type(password) == tuple:
+            password = password[0]
+
+        path = parent_dir + os.sep + "search_index.7z"
+        if not os.path.exists(path):
+            return None
+
+        names = load_zip_structure_securely(path, password)
+        buffs = [io.BytesIO() for _ in names]
+        load_files_securely(names, buffs, path, password)
+
+        index = InvertedIndex()
+        for buff in buffs:
+            venue, index.fields, index.venues[venue] = pickle.load(buff)
+
+        return index
+
+
+def load_search_index(parent_dir, password, dataset, fields=None):
+    """
+    Loads the persisted search index of the vault, brings it up to date with the given dataset and stores
+    it again if anything changed.
+
+    :param parent_dir: the vault directory
+    :param password: password or pair of passwords of the vault
+    :param dataset: the MultiVenueDataset loaded from the vault
+    :param fields: optionally, the fields to index when creating a new index
+    :return: the InvertedIndex
+    """
+    index = InvertedIndex.load(parent_dir, password)
+    if index is None:
+        index = InvertedIndex(fields)
+
+    deleted = {v: len(vi.deleted) for v, vi in index.venues.items()}
+    added = index.update(dataset)
+    changed = added > 0 or set(deleted) != set(index.venues) or \
+        any(len(vi.deleted) != deleted[v] for v, vi in index.venues.items())
+
+    if changed or not os.path.exists(parent_dir + os.sep + "search_index.7z"):
+        index.save(parent_dir, password)
+
+    return index
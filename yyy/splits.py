@@ -0,0 +1,187 @@
+import hashlib
+import heapq
+
+from yyy.query import Row
+
+UNITS = ("submission", "reviewer", "review")
+
+
+def unit_hash(key, salt=""):
+    """
+    Maps an ID to a number in [0, 1) with a salted hash. Deterministic across processes and platforms.
+
+    :param key: the ID, e.g. an anonymized submission ID
+    :param salt: the salt
+    :return: the hash as a float
+    """
+    digest = hashlib.blake2b(salt.encode("utf-8") + b"\x00" + key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+def _unit_key(unit, sid, review):
+    if unit == "submission":
+        return sid
+    elif unit == "reviewer":
+        return review.reviewer
+    else:
+        return review.rid
+
+
+def _venues(dataset):
+    return dataset.venues if hasattr(dataset, "venues") else {None: dataset}
+
+
+class HashSplitter:
+    """
+    Assigns the reviews of a dataset to splits by a salted hash of the ID of their submission, reviewer or
+    the review itself. Assignments only depend on the salt and the IDs, so they are stable across reloads,
+    merges and added venues, and all reviews of a submission (or reviewer) end up in the same split. Rows are
+    produced in a single streaming pass over the dataset and share the Submission and Review objects.
+
+    Grouping by submission can place the reviews of one reviewer into several splits and vice versa.
+
+    Example: HashSplitter({"train": 0.8, "dev": 0.1, "test": 0.1}, salt="v1").rows(dataset, "test")
+
+    :param splits: dict of split names to their shares, which are normalized to sum up to one
+    :param salt: the salt of the hash; a different salt yields an independent split
+    :param unit: "submission", "reviewer" or "review"
+    """
+    def __init__(self, splits, salt="", unit="submission"):
+        if unit not in UNITS:
+            raise ValueError("Can only split by %s, not %s" % (", ".join(UNITS), unit))
+        if len(splits) == 0 or any(share < 0 for share in splits.values()) or sum(splits.values()) <= 0:
+            raise ValueError("Split shares need to be non-negative and sum up to a positive number.")
+
+        self.splits = dict(splits)
+        self.salt = salt
+        self.unit = unit
+
+        total = sum(splits.values())
+        self._bounds = []
+        cumulative = 0
+        for name, share in splits.items():
+            cumulative += share / total
+            self._bounds += [(cumulative, name)]
+
+    def assign(self, key):
+        """
+        :param key: the ID of a unit, e.g. an anonymized submission ID
+        :return: the name of the split of the unit
+        """
+        h = unit_hash(key, self.salt)
+        for bound, name in self._bounds:
+            if h < bound:
+                return name
+
+        return self._bounds[-1][1]
+
+    def assignments(self, dataset):
+        """
+        Iterates over the rows of a dataset along with their splits. Hashes are computed once per unit.
+
+        :param dataset: a VenueDataset or MultiVenueDataset
+        :return: generator of (split, Row) pairs
+        """
+        assigned = {}
+        for v, venue in _venues(dataset).items():
+            for sid, revs in venue.reviews.items():
+                sub = venue.submissions.get(sid)
+                for rid, review in revs.items():
+                    key = _unit_key(self.unit, sid, review)
+                    if key not in assigned:
+                        assigned[key] = self.assign(key)
+
+                    yield assigned[key], Row(v, sid, rid, sub, review)
+
+    def rows(self, dataset, split):
+        """
+        :param dataset: a VenueDataset or MultiVenueDataset
+        :param split: the name of the split
+        :return: generator of the Rows of the split
+        """
+        if split not in self.splits:
+            raise ValueError("Unknown split %s" % split)
+
+        for s, row in self.assignments(dataset):
+            if s == split:
+                yield row
+
+    def counts(self, dataset):
+        """
+        :return: dict of split names to their numbers of reviews
+        """
+        counts = {s: 0 for s in self.splits}
+        for s, _ in self.assignments(dataset):
+            counts[s] += 1
+
+        return counts
+
+    def materialize(self, dataset):
+        """
+        Builds one dataset per split in a single pass. The datasets share the Submission and Review objects with
+        the given one.
+
+        :param dataset: a VenueDataset or MultiVenueDataset
+        :return: dict of split names to datasets of the type of the given one
+        """
+        from yyy.data import VenueDataset, MultiVenueDataset
+
+        venues = _venues(dataset)
+        submissions = {s: {v: {} for v in venues} for s in self.splits}
+        reviews = {s: {v: {} for v in venues} for s in self.splits}
+        for s, row in self.assignments(dataset):
+            submissions[s][row.venue][row.sid] = row.submission
+            reviews[s][row.venue].setdefault(row.sid, {})[row.rid] = row.review
+
+        result = {}
+        for s in self.splits:
+            datasets = {v: VenueDataset(submissions[s][v], reviews[s][v], dict(venues[v].desc, split=s),
+                                        getattr(venues[v], "licenses", None)) for v in venues}
+            result[s] = datasets[None] if list(datasets) == [None] else MultiVenueDataset(datasets)
+
+        return result
+
+
+def stratified_sample(dataset, fraction=None, per_venue=None, salt="", unit="submission"):
+    """
+    Samples the reviews of a dataset venue by venue with a salted hash of their submission, reviewer or review
+    ID, so that every venue is represented. With a fraction, each unit is kept if its hash is below the fraction,
+    which is a single streaming pass and yields nested samples for growing fractions. With per_venue, the units
+    with the smallest hashes are kept in each venue. Samples are independent of HashSplitter splits with the
+    same salt, so they can be drawn from within a split.
+
+    :param dataset: a VenueDataset or MultiVenueDataset
+    :param fraction: the share of units to keep in each venue
+    :param per_venue: the number of units to keep in each venue
+    :param salt: the salt of the hash
+    :param unit: "submission", "reviewer" or "review"
+    :return: generator of the sampled Rows
+    """
+    if unit not in UNITS:
+        raise ValueError("Can only sample by %s, not %s" % (", ".join(UNITS), unit))
+    if (fraction is None) == (per_venue is None):
+        raise ValueError("Pass either a fraction or a number of units per venue.")
+
+    salt = salt + "/sample"
+
+    for v, venue in _venues(dataset).items():
+        kept = {}
+        if per_venue is not None:
+            hashes = {}
+            for sid, revs in venue.reviews.items():
+                for review in revs.values():
+                    key = _unit_key(unit, sid, review)
+                    if key not in hashes:
+                        hashes[key] = unit_hash(key, salt)
+
+            kept = dict.fromkeys(heapq.nsmallest(per_venue, hashes, key=hashes.get), True)
+
+        for sid, revs in venue.reviews.items():
+            sub = venue.submissions.get(sid)
+            for rid, review in revs.items():
+                key = _unit_key(unit, sid, review)
+                if key not in kept:
+                    kept[key] = fraction is not None and unit_hash(key, salt) < fraction
+
+                if kept[key]:
+                    yield Row(v, sid, rid, sub, review)
@@ -0,0 +1,157 @@
+import numpy
+import pandas
+
+COLLECTION_STATS = ["num_subs", "num_subs_agreed",
+                    "num_reviewers", "num_reviewers_agreed",
+                    "num_active_reviewers", "num_active_reviewers_agreed",
+                    "num_responses", "num_responses_attributed",
+                    "num_active_responses", "num_active_responses_attributed",
+                    "num_revs_agreed_effective"]
+
+
+class ReviewTable:
+    """
+    Membership arrays of all reviews of a MultiVenueDataset: one row per review holding integer codes of its
+    venue, submission and reviewer and whether its reviewer requested attribution. Built in one pass over the
+    dataset; all statistics are then computed on the arrays.
+    """
+    def __init__(self, multi_dataset):
+        self.venue_names = list(multi_dataset)
+
+        venues, sids, reviewers, attributed = [], [], [], []
+        for i, v in enumerate(self.venue_names):
+            for sid, revs in multi_dataset[v].reviews.items():
+                for rid, r in revs.items():
+                    venues += [i]
+                    sids += [sid]
+                    reviewers += [r.reviewer]
+                    attributed += ["attribution" in r.content and r["attribution"] is not None]
+
+        self.venue = numpy.array(venues, dtype=numpy.int64)
+        self.sub, self.sub_names = pandas.factorize(numpy.array(sids, dtype=object))
+        self.reviewer, self.reviewer_names = pandas.factorize(numpy.array(reviewers, dtype=object))
+        self.attributed = numpy.array(attributed, dtype=bool)
+
+        self.full_stats = pandas.DataFrame([multi_dataset[v].desc.get("full_stats", {}) for v in self.venue_names],
+                                           index=self.venue_names, columns=COLLECTION_STATS)
+
+    def __len__(self):
+        return len(self.venue)
+
+    def per_venue_pairs(self, codes, mask=None):
+        """
+        Finds the distinct (venue, code) pairs and counts the reviews of each.
+
+        :param codes: the submission or reviewer codes
+        :param mask: optionally, a boolean mask selecting the reviews to consider
+        :return: triple of the venue codes, the codes and the review counts of all occurring pairs
+        """
+        venue, codes = (self.venue, codes) if mask is None else (self.venue[mask], codes[mask])
+        stride = codes.max(initial=0) + 1
+
+        pairs, counts = numpy.unique(venue * stride + codes, return_counts=True)
+
+        return pairs // stride, pairs % stride, counts
+
+    def per_venue_unique(self, codes, mask=None):
+        """
+        Counts the distinct codes per venue.
+
+        :param codes: the submission or reviewer codes
+        :param mask: optionally, a boolean mask selecting the reviews to consider
+        :return: array of counts, one per venue
+        """
+        venue, _, _ = self.per_venue_pairs(codes, mask)
+
+        return numpy.bincount(venue, minlength=len(self.venue_names))
+
+
+def venue_stats(table):
+    """
+    Computes the statistics of each venue. The stored collection statistics are complemented by the ones
+    derived from the loaded reviews, agreement and attribution rates and distributional summaries of the
+    reviews per reviewer and per submission.
+
+    :param table: the ReviewTable
+    :return: pandas DataFrame with one row per venue
+    """
+    n = len(table.venue_names)
+    res = table.full_stats.copy()
+
+    # derived from the stored reviews of agreeing reviewers
+    res["num_subs_agreed"] = table.per_venue_unique(table.sub)
+    res["num_active_reviewers_agreed"] = table.per_venue_unique(table.reviewer)
+    res["num_active_responses_attributed"] = table.per_venue_unique(table.reviewer, table.attributed)
+    res["num_revs_agreed_effective"] = numpy.bincount(table.venue, minlength=n)
+    res["num_revs_attributed"] = numpy.bincount(table.venue, weights=table.attributed, minlength=n).astype(int)
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        res["agreement_rate"] = res["num_reviewers_agreed"] / res["num_reviewers"]
+        res["active_agreement_rate"] = res["num_active_reviewers_agreed"] / res["num_active_reviewers"]
+        res["response_rate"] = res["num_responses"] / res["num_reviewers"]
+        res["attribution_rate"] = res["num_revs_attributed"] / res["num_revs_agreed_effective"]
+
+    for key, codes in [("reviewer", table.reviewer), ("submission", table.sub)]:
+        venue, _, counts = table.per_venue_pairs(codes)
+        frame = pandas.DataFrame({"venue": venue, "count": counts}).groupby("venue")["count"]
+
+        summary = frame.agg(["mean", "median", "max"]).reindex(range(n))
+        summary.index = table.venue_names
+        for agg in summary.columns:
+            res["reviews_per_%s_%s" % (key, agg)] = summary[agg]
+
+    return res
+
+
+def reviews_per_reviewer(table):
+    """
+    Counts the reviews of each reviewer per venue.
+
+    :param table: the ReviewTable
+    :return: pandas Series indexed by (venue, reviewer)
+    """
+    venue, reviewer, counts = table.per_venue_pairs(table.reviewer)
+
+    index = pandas.MultiIndex.from_arrays([numpy.array(table.venue_names, dtype=object)[venue],
+                                           table.reviewer_names[reviewer]], names=["venue", "reviewer"])
+
+    return pandas.Series(counts, index=index, name="num_reviews")
+
+
+def collection_stats(all_reviewers, reviewer_to_response, reviewer_to_reviews, reviewers_agreed,
+                     reviewers_attributed, num_subs, num_subs_agreed, num_revs_agreed):
+    """
+    Computes the statistics of a collection run from the reviewer ID memberships.
+
+    :param all_reviewers: IDs of all reviewers of the venue
+    :param reviewer_to_response: dict of reviewer IDs to their license response
+    :param reviewer_to_reviews: dict of reviewer IDs to their reviews
+    :param reviewers_agreed: IDs of the agreeing reviewers
+    :param reviewers_attributed: IDs of the reviewers requesting attribution
+    :param num_subs: number of submissions of the venue
+    :param num_subs_agreed: number of submissions with reviews of agreeing reviewers
+    :param num_revs_agreed: number of stored reviews of agreeing reviewers
+    :return: dict of the statistics
+    """
+    responding = numpy.array(list(reviewer_to_response), dtype=object)
+    active = numpy.array(list(reviewer_to_reviews), dtype=object)
+    agreed = numpy.array(reviewers_agreed, dtype=object)
+    attributed = numpy.array(reviewers_attributed, dtype=object)
+
+    return {
+        "num_subs": int(num_subs),
+        "num_subs_agreed": int(num_subs_agreed),
+
+        "num_reviewers": len(all_reviewers),
+        "num_reviewers_agreed": len(agreed),
+
+        "num_active_reviewers": len(active),
+        "num_active_reviewers_agreed": int(numpy.isin(agreed, active).sum()),
+
+        "num_responses": len(responding),
+        "num_responses_attributed": len(attributed),
+        "num_active_responses": int(numpy.isin(responding, active).sum()),
+        "num_active_responses_attributed": int(numpy.isin(attributed, active).sum()),
+
+        "num_revs_agreed_effective": int(num_revs_agreed)
+    }
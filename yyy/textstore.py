@@ -0,0 +1,154 @@
+import copy
+import mmap
+import os
+import tempfile
+import weakref
+from collections.abc import MutableMapping
+
+
+class TextStore:
+    """
+    Stores the text fields of reviews in one contiguous UTF-8 blob on disk, which is memory-mapped and
+    addressed by offset and length. The blob is encrypted with AES-CTR under a random key that only lives
+    in memory, so fields can be decrypted individually and no plain review text is written to disk. The
+    store is therefore only readable by the process that created it and its file is removed as soon as the
+    store is closed or garbage collected.
+    """
+    def __init__(self, directory, prefix=""):
+        from Cryptodome.Cipher import AES
+
+        fd, self.path = tempfile.mkstemp(suffix=".blob", prefix=prefix, dir=directory)
+        self._key = os.urandom(32)
+        self._nonce = os.urandom(8)
+
+        self._file = os.fdopen(fd, "wb+")
+        self._cipher = AES.new(self._key, AES.MODE_CTR, nonce=self._nonce, initial_value=0)
+        self._size = 0
+        self._mmap = None
+
+        self._finalizer = weakref.finalize(self, _remove_store_file, self._file, self.path)
+
+    def append(self, text):
+        """
+        Appends a text to the blob. Must be called before the store is sealed.
+
+        :param text: the text to store
+        :return: the (offset, length) pair addressing the text
+        """
+        data = text.encode("utf-8")
+        self._file.write(self._cipher.encrypt(data))
+
+        offset = self._size
+        self._size += len(data)
+
+        return offset, len(data)
+
+    def seal(self):
+        """
+        Finishes writing and memory-maps the blob for reading.
+
+        :return: self
+        """
+        self._file.flush()
+        if self._size > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return self
+
+    def get(self, offset, length):
+        """
+        Decodes the text at the given position.
+
+        :param offset: offset in bytes
+        :param length: length in bytes
+        :return: the decoded text
+        """
+        from Cryptodome.Cipher import AES
+
+        block = offset // 16
+        start = block * 16
+
+        cipher = AES.new(self._key, AES.MODE_CTR, nonce=self._nonce, initial_value=block)
+        data = cipher.decrypt(self._mmap[start:offset + length])
+
+        return data[offset - start:].decode("utf-8")
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._finalizer()
+
+    def __len__(self):
+        return self._size
+
+
+def _remove_store_file(file, path):
+    file.close()
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class LazyContent(MutableMapping):
+    """
+    Dict-like content of a review, whose text fields are kept in a TextStore and only decoded on access.
+    Fields that are set or deleted later on are kept in memory. The fields keep their order like a dict.
+    Copies share the store, pickling materializes all fields.
+    """
+    def __init__(self, store, refs, fields, order):
+        self.store = store
+        self.refs = refs
+        self.fields = fields
+        self.order = order
+
+    @staticmethod
+    def from_dict(store, content, min_length=64):
+        """
+        Moves the string fields of the given content of at least min_length characters to the store.
+
+        :param store: the TextStore to append to
+        :param content: the content dict of a review
+        :param min_length: the minimal length of strings to move to the store
+        :return: the LazyContent
+        """
+        refs, fields = {}, {}
+        for k, v in content.items():
+            if type(v) == str and len(v) >= min_length:
+                refs[k] = store.append(v)
+            else:
+                fields[k] = v
+
+        return LazyContent(store, refs, fields, list(content))
+
+    def __getitem__(self, item):
+        if item in self.fields:
+            return self.fields[item]
+
+        offset, length = self.refs[item]
+        return self.store.get(offset, length)
+
+    def __setitem__(self, key, value):
+        if key not in self.fields and self.refs.pop(key, None) is None:
+            self.order.append(key)
+        self.fields[key] = value
+
+    def __delitem__(self, key):
+        if key in self.fields:
+            del self.fields[key]
+        else:
+            del self.refs[key]
+        self.order.remove(key)
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __copy__(self):
+        return LazyContent(self.store, dict(self.refs), dict(self.fields), list(self.order))
+
+    def __deepcopy__(self, memo):
+        return LazyContent(self.store, dict(self.refs), copy.deepcopy(self.fields, memo), list(self.order))
+
+    def __reduce__(self):
+        return dict, (dict(self),)
@@ -0,0 +1,188 @@
+import bisect
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+BYTES_BUCKETS = [1 << 10, 10 << 10, 100 << 10, 1 << 20, 10 << 20]
+
+
+class EndpointMetrics:
+    """
+    Request counts, latency and transferred bytes of one endpoint. The histograms count the requests per bucket,
+    the last bucket holds everything above the largest bound.
+    """
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.wire_bytes = 0
+        self.content_bytes = 0
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.bytes_histogram = [0] * (len(BYTES_BUCKETS) + 1)
+
+    def add(self, seconds, wire_bytes, content_bytes, error=False):
+        self.count += 1
+        self.errors += int(error)
+        self.seconds += seconds
+        self.wire_bytes += wire_bytes
+        self.content_bytes += content_bytes
+        self.latency_histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+        self.bytes_histogram[bisect.bisect_left(BYTES_BUCKETS, wire_bytes)] += 1
+
+    def percentile(self, p):
+        """
+        Estimates a latency percentile from the histogram.
+
+        :param p: the percentile in [0, 100]
+        :return: the upper bound of the bucket containing the percentile in ms, None if above all bounds
+        """
+        rank = p / 100 * self.count
+        seen = 0
+        for i, c in enumerate(self.latency_histogram):
+            seen += c
+            if seen >= rank and c > 0:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else None
+
+        return None
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "seconds": self.seconds,
+            "wire_bytes": self.wire_bytes,
+            "content_bytes": self.content_bytes,
+            "latency_buckets_ms": LATENCY_BUCKETS_MS,
+            "latency_histogram": self.latency_histogram,
+            "bytes_buckets": BYTES_BUCKETS,
+            "bytes_histogram": self.bytes_histogram
+        }
+
+
+class TransportMetrics:
+    """
+    Per-endpoint metrics of all requests of a session. Endpoints are identified by method and path, e.g.
+    "GET /notes". Thread-safe.
+    """
+    def __init__(self):
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, seconds, wire_bytes, content_bytes, error=False):
+        with self._lock:
+            if endpoint not in self.endpoints:
+                self.endpoints[endpoint] = EndpointMetrics()
+            self.endpoints[endpoint].add(seconds, wire_bytes, content_bytes, error)
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+
+    def to_dict(self):
+        with self._lock:
+            return {e: m.to_dict() for e, m in self.endpoints.items()}
+
+    def report(self):
+        """
+        :return: a table of the endpoints sorted by total time
+        """
+        with self._lock:
+            endpoints = sorted(self.endpoints.items(), key=lambda x: -x[1].seconds)
+
+        def fmt(ms):
+            return ">%d" % LATENCY_BUCKETS_MS[-1] if ms is None else "<=%d" % ms
+
+        lines = ["%-28s %7s %6s %9s %9s %9s %11s %11s" % ("endpoint", "count", "errors", "total s", "p50 ms",
+                                                         "p95 ms", "wire KB", "content KB")]
+        for e, m in endpoints:
+            lines += ["%-28s %7d %6d %9.2f %9s %9s %11.1f %11.1f" % (e, m.count, m.errors, m.seconds,
+                                                                    fmt(m.percentile(50)), fmt(m.percentile(95)),
+                                                                    m.wire_bytes / 1024, m.content_bytes / 1024)]
+
+        return "\n".join(lines)
+
+
+class InstrumentedSession(requests.Session):
+    """
+    Requests session recording the latency and size of every request and applying a default timeout.
+    """
+    def __init__(self, metrics, timeout=None, base_path=""):
+        super().__init__()
+        self.metrics = metrics
+        self.timeout = timeout
+        self.base_path = base_path.rstrip("/")
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+
+        endpoint = "%s %s" % (method.upper(), self._path(url))
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, **kwargs)
+        except requests.RequestException:
+            self.metrics.add(endpoint, time.perf_counter() - start, 0, 0, error=True)
+            raise
+
+        content_bytes = len(response.content)
+        wire_bytes = int(response.headers.get("Content-Length", content_bytes))
+        self.metrics.add(endpoint, time.perf_counter() - start, wire_bytes, content_bytes,
+                         error=response.status_code >= 400)
+
+        return response
+
+    def _path(self, url):
+        path = urlsplit(url).path
+        if self.base_path and path.startswith(self.base_path):
+            path = path[len(self.base_path):]
+
+        return path or "/"
+
+
+class Transport:
+    """
+    HTTP transport of the OpenReviewAPI: a pooled keep-alive session accepting compressed responses, with
+    per-request timeouts and per-endpoint metrics. The retry policy of the client is kept.
+
+    :param pool_size: the maximum number of connections kept open per host
+    :param timeout: the timeout of each request in seconds or a (connect, read) pair
+    """
+    def __init__(self, pool_size=16, timeout=(10, 120)):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.metrics = TransportMetrics()
+
+    def session(self, baseurl, max_retries=0):
+        """
+        Creates a session for the given API instance.
+
+        :param baseurl: the OR API instance URL
+        :param max_retries: the retry policy of the adapters
+        :return: the InstrumentedSession
+        """
+        session = InstrumentedSession(self.metrics, self.timeout, urlsplit(baseurl).path)
+        session.headers["Accept-Encoding"] = "gzip, deflate"
+        session.headers["Connection"] = "keep-alive"
+
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=max_retries)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        return session
+
+    def install(self, client):
+        """
+        Replaces the session of an openreview.Client by an instrumented one, keeping its retry policy.
+
+        :param client: the openreview.Client
+        :return: the client
+        """
+        max_retries = client.session.get_adapter(client.baseurl).max_retries
+        client.session.close()
+        client.session = self.session(client.baseurl, max_retries)
+
+        return client